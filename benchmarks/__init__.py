@@ -0,0 +1 @@
+"""Benchmarks for the LLMGateway Python SDK."""
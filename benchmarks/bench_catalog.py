@@ -0,0 +1,63 @@
+"""Benchmark for parsing large ``/v1/models`` catalogs.
+
+Compares the parse time and the memory kept by the eager ``ModelList`` with the
+``LazyModelList``, unfiltered, filtered down to one provider and projected to a few
+fields, and the time to materialize one model from the lazy list.
+
+Run with ``python -m benchmarks.bench_catalog``.
+"""
+
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from llmgateway.modellist import LazyModelList
+from llmgateway.models import ModelList
+from llmgateway.serialization import Serializer
+
+from .bench_serialization import build_catalog
+
+ITERATIONS = 5
+
+
+def measure(func: Callable[[], Any]) -> tuple[float, float, float]:
+    """Return the best CPU time of ``func`` in ms, and the peak and retained memory of one call in KB."""
+    best = float("inf")
+    for _ in range(ITERATIONS):
+        start = time.process_time()
+        func()
+        best = min(best, time.process_time() - start)
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best * 1e3, peak / 1024, retained / 1024
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    serializer = Serializer()
+    for num_models in (1_000, 5_000, 20_000):
+        body = build_catalog(num_models)
+        print(f"{num_models:,} models, {len(body) / 1024:,.0f} KB body")
+        print(f"  {'':<24} {'parse ms':>9} {'peak KB':>9} {'kept KB':>9}")
+        scenarios: dict[str, Callable[[], Any]] = {
+            "eager ModelList": lambda body=body: serializer.loads(ModelList, body),
+            "lazy": lambda body=body: LazyModelList(body),
+            "lazy, one provider": lambda body=body: LazyModelList(body, where=lambda entry: entry["id"].endswith("7")),
+            "lazy, projected": lambda body=body: LazyModelList(body, fields=["context_length", "pricing.prompt"]),
+        }
+        for name, func in scenarios.items():
+            cpu, peak, retained = measure(func)
+            print(f"  {name:<24} {cpu:>9,.1f} {peak:>9,.0f} {retained:>9,.0f}")
+        models = LazyModelList(body)
+        start = time.perf_counter()
+        models.get(models.ids[num_models // 2])
+        print(f"  first access to one model: {(time.perf_counter() - start) * 1e6:,.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark for request body compression on large prompts.
+
+For each prompt size and algorithm, reports the encoded body size, the CPU time spent
+compressing it and the resulting upload time over links of a few bandwidths, compared
+with sending the body uncompressed. Compression pays off when the time saved on the wire
+exceeds the time spent compressing.
+
+Run with ``python -m benchmarks.bench_compression``.
+"""
+
+import importlib.util
+import random
+import time
+
+from llmgateway.compression import RequestCompression
+from llmgateway.models import ChatCompletionRequest, Message
+from llmgateway.serialization import Serializer
+
+ITERATIONS = 20
+BANDWIDTHS_MBPS = (10, 100, 1000)
+WORDS = "the model gateway request response token stream prompt context system user assistant".split()
+
+
+def build_body(size: int) -> bytes:
+    """Build an encoded chat completion request of roughly ``size`` bytes of prose."""
+    rng = random.Random(size)
+    messages = []
+    while sum(len(message.content) for message in messages) < size:
+        content = " ".join(rng.choice(WORDS) for _ in range(200))
+        messages.append(Message(role="user" if len(messages) % 2 else "assistant", content=content))
+    return Serializer().dumps(ChatCompletionRequest(model="gpt-4", messages=messages))
+
+
+def measure(compression: RequestCompression, body: bytes) -> tuple[float, int]:
+    """Return the best compression time in seconds and the compressed size."""
+    best = float("inf")
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        compressed = compression.compress(body)
+        best = min(best, time.perf_counter() - start)
+    return best, len(compressed)
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    algorithms = [RequestCompression("gzip"), RequestCompression("gzip", level=6)]
+    if importlib.util.find_spec("zstandard") is not None:
+        algorithms.append(RequestCompression("zstd"))
+
+    header = "".join(f"{f'{mbps} Mbit/s':>14}" for mbps in BANDWIDTHS_MBPS)
+    for size in (10_000, 100_000, 1_000_000):
+        body = build_body(size)
+        print(f"\n{f'{len(body):,} byte request':<32}{'bytes':>10}{'cpu ms':>9}{header}")
+        rows = [("none", 0.0, len(body))]
+        for compression in algorithms:
+            level = "default" if compression.level < 0 else compression.level
+            rows.append((f"{compression.algorithm} ({level})", *measure(compression, body)))
+        for name, seconds, encoded in rows:
+            upload = "".join(f"{(seconds + encoded * 8 / (mbps * 1e6)) * 1e3:>11.2f} ms" for mbps in BANDWIDTHS_MBPS)
+            print(f"  {name:<30}{encoded:>10,}{seconds * 1e3:>9.2f}{upload}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark for request serialization and response validation.
+
+Compares the dict-based path (``model_dump`` + ``json.dumps`` on the way out,
+``json.loads`` + ``Model(**data)`` on the way back) with the bytes-in/bytes-out
+serializer for large ``messages`` histories and large ``/v1/models`` catalogs, and
+builds and encodes requests sharing a long prefix with and without a ``PromptTemplate``.
+
+Run with ``python -m benchmarks.bench_serialization``.
+"""
+
+import importlib.util
+import json
+import time
+from typing import Any, Callable
+
+from llmgateway.models import ChatCompletionRequest, Message, ModelList
+from llmgateway.serialization import Serializer
+from llmgateway.templates import PromptTemplate
+
+ITERATIONS = 50
+
+
+def build_request(num_messages: int) -> ChatCompletionRequest:
+    """Build a request with a long conversation history."""
+    messages = [
+        Message(role="user" if i % 2 else "assistant", content=f"message {i} " + "lorem ipsum " * 40)
+        for i in range(num_messages)
+    ]
+    return ChatCompletionRequest(model="gpt-4", messages=messages, temperature=0.0)
+
+
+def build_catalog(num_models: int) -> bytes:
+    """Build a ``/v1/models`` response body with ``num_models`` entries."""
+    models = [
+        {
+            "id": f"provider/model-{i}",
+            "name": f"Model {i}",
+            "created": 1700000000 + i,
+            "description": "A model " * 20,
+            "architecture": {"input_modalities": ["text", "image"], "output_modalities": ["text"]},
+            "top_provider": {"is_moderated": True},
+            "providers": [
+                {
+                    "providerId": f"p{j}",
+                    "modelName": f"model-{i}",
+                    "pricing": {"prompt": "0.001", "completion": "0.002"},
+                }
+                for j in range(3)
+            ],
+            "pricing": {"prompt": "0.001", "completion": "0.002"},
+            "context_length": 128000,
+            "supported_parameters": ["temperature", "top_p", "max_tokens"],
+        }
+        for i in range(num_models)
+    ]
+    return json.dumps({"data": models}).encode()
+
+
+def measure(func: Callable[[], Any]) -> float:
+    """Return the best average CPU time per call in microseconds."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.process_time()
+        for _ in range(ITERATIONS):
+            func()
+        best = min(best, (time.process_time() - start) / ITERATIONS)
+    return best * 1e6
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    serializers = {"pydantic": Serializer("pydantic")}
+    if importlib.util.find_spec("orjson") is not None:
+        serializers["orjson"] = Serializer("orjson")
+
+    print("Request encoding (us/request)")
+    for num_messages in (10, 100, 1_000):
+        request = build_request(num_messages)
+        row = {"dict": measure(lambda request=request: json.dumps(request.model_dump(exclude_none=True)).encode())}
+        for name, serializer in serializers.items():
+            row[name] = measure(lambda request=request, serializer=serializer: serializer.dumps(request))
+        print(f"  {num_messages:>6} messages: " + "  ".join(f"{k}={v:,.0f}" for k, v in row.items()))
+
+    print("Shared prefix, build and encode with one new message (us/request)")
+    serializer = serializers["pydantic"]
+    new = [{"role": "user", "content": "What is next?"}]
+    for num_messages in (10, 100, 1_000):
+        prefix = [message.model_dump() for message in build_request(num_messages).messages]
+        template = PromptTemplate(prefix, model="gpt-4", temperature=0.0)
+        row = {
+            "request": measure(
+                lambda prefix=prefix: serializer.dumps(
+                    ChatCompletionRequest(model="gpt-4", messages=prefix + new, temperature=0.0)
+                )
+            ),
+            "template": measure(lambda template=template: serializer.dumps(template.build(new))),
+        }
+        print(f"  {num_messages:>6} messages: " + "  ".join(f"{k}={v:,.0f}" for k, v in row.items()))
+
+    print("Catalog validation (us/response)")
+    for num_models in (10, 100, 1_000):
+        body = build_catalog(num_models)
+        row = {"dict": measure(lambda body=body: ModelList(**json.loads(body)))}
+        for name, serializer in serializers.items():
+            row[name] = measure(lambda body=body, serializer=serializer: serializer.loads(ModelList, body))
+        print(f"  {num_models:>6} models:   " + "  ".join(f"{k}={v:,.0f}" for k, v in row.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Micro-benchmark for the SSE stream decoder.
+
+Measures chunks per second for short and long streams so that the per-chunk
+cost of decoding and validating a stream stays flat as streams grow.
+
+Run with ``python -m benchmarks.bench_sse``.
+"""
+
+import time
+
+from llmgateway.models import ChatCompletionResponse
+from llmgateway.streaming import iter_sse_events
+
+STREAM_LENGTHS = (100, 1_000, 10_000, 50_000)
+NETWORK_CHUNK_SIZE = 4096
+
+
+def build_stream(num_chunks: int) -> list[bytes]:
+    """Build an SSE body of ``num_chunks`` events, split into network-sized reads."""
+    body = b"".join(b'data: {"message": "token %d "}\n\n' % i for i in range(num_chunks)) + b"data: [DONE]\n\n"
+    return [body[i : i + NETWORK_CHUNK_SIZE] for i in range(0, len(body), NETWORK_CHUNK_SIZE)]
+
+
+def run(num_chunks: int) -> float:
+    """Decode and validate one stream and return the chunks per second."""
+    reads = build_stream(num_chunks)
+    start = time.perf_counter()
+    count = 0
+    for event in iter_sse_events(reads):
+        ChatCompletionResponse.model_validate_json(event)
+        count += 1
+    elapsed = time.perf_counter() - start
+    assert count == num_chunks
+    return count / elapsed
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    print(f"{'chunks':>10} {'chunks/s':>14} {'us/chunk':>10}")
+    for num_chunks in STREAM_LENGTHS:
+        rate = max(run(num_chunks) for _ in range(3))
+        print(f"{num_chunks:>10} {rate:>14,.0f} {1e6 / rate:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
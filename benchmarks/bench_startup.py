@@ -0,0 +1,108 @@
+"""Benchmark for import time and cold start.
+
+Each run starts a fresh interpreter that imports ``llmgateway``, creates a client and sends
+two chat completions to a local HTTP gateway, as a serverless worker does on a cold start.
+The import time, client creation time, first and second request latency, the first request
+of a second client (which shares what the first one already set up) and the peak RSS of the
+worker are reported as the median and the minimum over the runs.
+
+Run with ``python -m benchmarks.bench_startup``; pass ``--async`` to measure the async
+client instead.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+WORKER = """
+import resource, sys, time, json
+start = time.perf_counter()
+from llmgateway import ChatCompletionRequest, LLMGatewayClient, Message
+imported = time.perf_counter()
+client = LLMGatewayClient(api_key="benchmark", base_url=sys.argv[1])
+created = time.perf_counter()
+request = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="Hi")])
+if sys.argv[2] == "async":
+    import asyncio
+
+    async def send():
+        first = time.perf_counter()
+        await client.achat_completions(request)
+        second = time.perf_counter()
+        await client.achat_completions(request)
+        done = time.perf_counter()
+        await LLMGatewayClient(api_key="benchmark", base_url=sys.argv[1]).achat_completions(request)
+        return first, second, done
+
+    first, second, done = asyncio.run(send())
+else:
+    first = time.perf_counter()
+    client.chat_completions(request)
+    second = time.perf_counter()
+    client.chat_completions(request)
+    done = time.perf_counter()
+    LLMGatewayClient(api_key="benchmark", base_url=sys.argv[1]).chat_completions(request)
+other = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1e3,
+    "client_ms": (created - imported) * 1e3,
+    "first_request_ms": (second - first) * 1e3,
+    "second_request_ms": (done - second) * 1e3,
+    "other_client_ms": (other - done) * 1e3,
+    "cold_start_ms": (second - start) * 1e3,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answer every POST with a small chat completion."""
+
+    body = json.dumps({"message": "Hello!"}).encode()
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Send a completion."""
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep the benchmark output clean."""
+
+
+def main() -> None:
+    """Run the workers and print the medians."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="number of cold starts")
+    parser.add_argument("--async", dest="mode", action="store_const", const="async", default="sync")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-c", WORKER, base_url, args.mode], capture_output=True, check=True, text=True
+        ).stdout
+        runs.append(json.loads(output))
+    server.shutdown()
+
+    print(f"{args.mode} cold start, {args.runs} runs")
+    print(f"  {'':<18} {'median':>10} {'min':>10}")
+    for key in runs[0]:
+        values = [run[key] for run in runs]
+        print(f"  {key:<18} {statistics.median(values):>10,.1f} {min(values):>10,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""In-process stand-in for the LLMGateway API, for benchmarks.
+
+The gateway is an ``httpx.MockTransport`` handler, so requests go through the full client
+stack (serialization, pooling, retries, instrumentation) without touching the network.
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import Optional
+
+import httpx
+
+
+class MockGateway:
+    """Mock gateway with configurable latency, payload size and stream length.
+
+    Attributes:
+        latency: Seconds before the response headers are sent
+        chunk_delay: Seconds between streamed chunks
+        message_size: Characters in each completion message
+        stream_chunks: Number of chunks in a streamed completion
+        num_models: Number of models returned by ``/v1/models``
+        requests: Number of requests handled
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        chunk_delay: float = 0.0,
+        message_size: int = 256,
+        stream_chunks: int = 64,
+        num_models: int = 100,
+    ) -> None:
+        """Initialize the gateway and prebuild its response bodies."""
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.message_size = message_size
+        self.stream_chunks = stream_chunks
+        self.num_models = num_models
+        self.requests = 0
+        self._completion = json.dumps({"message": "x" * message_size}).encode()
+        self._chunk = b"data: " + json.dumps({"message": "token "}).encode() + b"\n\n"
+        self._models = json.dumps({"data": [build_model(i) for i in range(num_models)]}).encode()
+
+    def transport(self) -> httpx.MockTransport:
+        """Return a sync transport serving this gateway."""
+        return httpx.MockTransport(self._handle)
+
+    def async_transport(self) -> httpx.MockTransport:
+        """Return an async transport serving this gateway."""
+        return httpx.MockTransport(self._ahandle)
+
+    def _route(self, request: httpx.Request) -> tuple[Optional[bytes], bool]:
+        """Return the body to send, or None for a stream, and whether the path exists."""
+        self.requests += 1
+        if request.url.path == "/v1/models":
+            return self._models, True
+        if request.url.path == "/v1/chat/completions":
+            return (None if b'"stream":true' in request.content else self._completion), True
+        return None, False
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        body, found = self._route(request)
+        if not found:
+            return httpx.Response(404)
+        if self.latency:
+            time.sleep(self.latency)
+        if body is not None:
+            return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+        return httpx.Response(200, content=self._stream(), headers={"Content-Type": "text/event-stream"})
+
+    async def _ahandle(self, request: httpx.Request) -> httpx.Response:
+        body, found = self._route(request)
+        if not found:
+            return httpx.Response(404)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if body is not None:
+            return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+        return httpx.Response(200, content=self._astream(), headers={"Content-Type": "text/event-stream"})
+
+    def _stream(self) -> Iterator[bytes]:
+        for _ in range(self.stream_chunks):
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield self._chunk
+        yield b"data: [DONE]\n\n"
+
+    async def _astream(self) -> AsyncIterator[bytes]:
+        for _ in range(self.stream_chunks):
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield self._chunk
+        yield b"data: [DONE]\n\n"
+
+
+def build_model(index: int) -> dict[str, object]:
+    """Build a realistic ``/v1/models`` entry."""
+    return {
+        "id": f"provider-{index % 20}/model-{index}",
+        "name": f"Model {index}",
+        "created": 1700000000 + index,
+        "description": "A general purpose language model. " * 8,
+        "architecture": {"input_modalities": ["text", "image"], "output_modalities": ["text"], "tokenizer": "bpe"},
+        "top_provider": {"is_moderated": index % 2 == 0},
+        "providers": [
+            {
+                "providerId": f"provider-{(index + j) % 20}",
+                "modelName": f"model-{index}",
+                "pricing": {"prompt": "0.0000025", "completion": "0.00001"},
+            }
+            for j in range(3)
+        ],
+        "pricing": {"prompt": "0.0000025", "completion": "0.00001", "image": "0.001"},
+        "context_length": 128000,
+        "supported_parameters": ["temperature", "top_p", "max_tokens", "response_format"],
+    }
@@ -0,0 +1,203 @@
+"""Benchmark suite for the client against a local mock gateway.
+
+Measures requests per second, p50/p99 latency, CPU time per request and peak traced
+memory for ``chat_completions``, ``achat_completions``, both streaming generators and
+``list_models``. Results are written as JSON so that runs can be compared between
+versions.
+
+Run with ``python -m benchmarks.run --output results.json``, and compare with a previous
+run using ``--compare baseline.json``.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Awaitable
+from typing import Any, Callable
+
+import llmgateway
+from llmgateway import ChatCompletionRequest, LLMGatewayClient, Message
+
+from .gateway import MockGateway
+
+
+def make_request(num_messages: int, stream: bool = False) -> ChatCompletionRequest:
+    """Build a request with a conversation of ``num_messages`` messages."""
+    messages = [
+        Message(role="user" if i % 2 == 0 else "assistant", content=f"message {i} " + "lorem ipsum " * 20)
+        for i in range(num_messages)
+    ]
+    return ChatCompletionRequest(model="gpt-4", messages=messages, stream=stream)
+
+
+def summarize(name: str, latencies: list[float], wall: float, cpu: float, peak_memory: int) -> dict[str, Any]:
+    """Summarize one scenario."""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "scenario": name,
+        "requests": count,
+        "rps": count / wall,
+        "p50_ms": ordered[count // 2] * 1e3,
+        "p99_ms": ordered[min(count - 1, int(count * 0.99))] * 1e3,
+        "mean_ms": statistics.fmean(ordered) * 1e3,
+        "cpu_us_per_request": cpu / count * 1e6,
+        "peak_memory_kb": peak_memory / 1024,
+    }
+
+
+def measure_sync(name: str, func: Callable[[], Any], count: int) -> dict[str, Any]:
+    """Run ``func`` ``count`` times sequentially.
+
+    Memory is traced in a separate, shorter pass, since tracing slows every allocation down.
+    """
+    func()  # warm up the pool and the validators
+    latencies = []
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    tracemalloc.start()
+    for _ in range(max(1, count // 10)):
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(name, latencies, wall, cpu, peak)
+
+
+async def measure_async(name: str, func: Callable[[], Awaitable[Any]], count: int, concurrency: int) -> dict[str, Any]:
+    """Run ``func`` ``count`` times with ``concurrency`` calls in flight."""
+    await func()
+    latencies: list[float] = []
+
+    async def run(total: int) -> None:
+        remaining = iter(range(total))
+
+        async def worker() -> None:
+            for _ in remaining:
+                start = time.perf_counter()
+                await func()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await run(count)
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    measured = latencies[:]
+    tracemalloc.start()
+    await run(max(concurrency, count // 10))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(name, measured, wall, cpu, peak)
+
+
+async def run_suite(args: argparse.Namespace) -> list[dict[str, Any]]:
+    """Run every scenario and return the results."""
+    gateway = MockGateway(
+        latency=args.latency,
+        chunk_delay=args.chunk_delay,
+        message_size=args.message_size,
+        stream_chunks=args.stream_chunks,
+        num_models=args.models,
+    )
+    client = LLMGatewayClient(
+        api_key="benchmark",
+        transport=gateway.transport(),
+        async_transport=gateway.async_transport(),
+    )
+    request = make_request(args.messages)
+    stream_request = make_request(args.messages, stream=True)
+
+    def stream() -> None:
+        for _ in client.chat_completions(stream_request):  # type: ignore[union-attr]
+            pass
+
+    async def astream() -> None:
+        async for _ in await client.achat_completions(stream_request):  # type: ignore[union-attr]
+            pass
+
+    async def achat() -> None:
+        await client.achat_completions(request)
+
+    async def alist() -> None:
+        await client.alist_models()
+
+    results = [
+        measure_sync("chat_completions", lambda: client.chat_completions(request), args.requests),
+        await measure_async("achat_completions", achat, args.requests, args.concurrency),
+        measure_sync("stream_chat_completions", stream, max(1, args.requests // 10)),
+        await measure_async("astream_chat_completions", astream, max(1, args.requests // 10), args.concurrency),
+        measure_sync("list_models", client.list_models, max(1, args.requests // 10)),
+        await measure_async("alist_models", alist, max(1, args.requests // 10), args.concurrency),
+    ]
+    await client.aclose()
+    return results
+
+
+def compare(results: list[dict[str, Any]], baseline: dict[str, Any]) -> None:
+    """Print the relative change of each scenario against a baseline run."""
+    previous = {result["scenario"]: result for result in baseline["results"]}
+    print(f"\nCompared with {baseline['metadata']['version']} ({baseline['metadata']['timestamp']}):")
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None:
+            continue
+        changes = "  ".join(
+            f"{key}={(result[key] - before[key]) / before[key] * 100:+.1f}%"
+            for key in ("rps", "p99_ms", "cpu_us_per_request", "peak_memory_kb")
+            if before[key]
+        )
+        print(f"  {result['scenario']:<26} {changes}")
+
+
+def main() -> None:
+    """Parse arguments, run the suite and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per non-streaming scenario")
+    parser.add_argument("--concurrency", type=int, default=50, help="async calls in flight")
+    parser.add_argument("--latency", type=float, default=0.0, help="gateway latency in seconds")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="delay between streamed chunks in seconds")
+    parser.add_argument("--message-size", type=int, default=512, help="characters per completion")
+    parser.add_argument("--stream-chunks", type=int, default=128, help="chunks per streamed completion")
+    parser.add_argument("--messages", type=int, default=20, help="messages per request")
+    parser.add_argument("--models", type=int, default=300, help="models in the catalog")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare with the results in this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_suite(args))
+    report = {
+        "metadata": {
+            "version": llmgateway.__version__,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "parameters": vars(args),
+        },
+        "results": results,
+    }
+
+    print(f"{'scenario':<26} {'rps':>10} {'p50 ms':>9} {'p99 ms':>9} {'cpu us/req':>11} {'peak KB':>9}")
+    for result in results:
+        print(
+            f"{result['scenario']:<26} {result['rps']:>10,.0f} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+            f"{result['cpu_us_per_request']:>11,.0f} {result['peak_memory_kb']:>9,.0f}"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,134 @@
-"""LLMGateway Python SDK Client."""
+"""LLMGateway Python SDK Client.
 
-from .client import LLMGatewayClient
-from .models import ChatCompletionRequest, ChatCompletionResponse, Message, Model, ModelList
+Public names are imported from their submodule on first access, so importing the package
+is cheap and only the parts of the SDK that are used get loaded.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .aggregation import AsyncStreamAggregator, StreamAggregator
+    from .balancer import LoadBalancer
+    from .batch import BatchResult
+    from .cache import MemoryCache, ResponseCache, SQLiteCache
+    from .catalog import ModelCatalog, ModelPrices
+    from .client import LLMGatewayClient
+    from .compression import RequestCompression
+    from .concurrency import AdaptiveConcurrencyLimiter
+    from .deadlines import Deadlines
+    from .exceptions import (
+        CircuitOpenError,
+        DeadlineExceededError,
+        FirstChunkTimeoutError,
+        IdleTimeoutError,
+        LLMGatewayError,
+        SlowConsumerError,
+        TotalTimeoutError,
+    )
+    from .hedging import HedgingPolicy
+    from .metrics import Instrumentation, MetricsRecorder, OpenTelemetryInstrumentation, RequestTiming
+    from .modellist import LazyModelList
+    from .models import ChatCompletionRequest, ChatCompletionResponse, Message, Model, ModelList
+    from .ratelimit import RateLimiter
+    from .retry import CircuitBreaker, RetryPolicy
+    from .scheduler import PriorityScheduler
+    from .tee import StreamTee
+    from .templates import PromptTemplate
 
 __version__ = "0.1.1"
 
 __all__ = [
     "LLMGatewayClient",
+    "BatchResult",
+    "StreamAggregator",
+    "AsyncStreamAggregator",
+    "StreamTee",
+    "ResponseCache",
+    "MemoryCache",
+    "SQLiteCache",
+    "ModelCatalog",
+    "ModelPrices",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "LoadBalancer",
+    "Deadlines",
+    "PromptTemplate",
+    "RequestCompression",
+    "RateLimiter",
+    "AdaptiveConcurrencyLimiter",
+    "PriorityScheduler",
+    "HedgingPolicy",
+    "Instrumentation",
+    "MetricsRecorder",
+    "OpenTelemetryInstrumentation",
+    "RequestTiming",
+    "LLMGatewayError",
+    "CircuitOpenError",
+    "SlowConsumerError",
+    "DeadlineExceededError",
+    "FirstChunkTimeoutError",
+    "IdleTimeoutError",
+    "TotalTimeoutError",
     "ChatCompletionRequest",
     "ChatCompletionResponse",
     "Model",
     "ModelList",
+    "LazyModelList",
     "Message",
 ]
+
+_exports = {
+    "LLMGatewayClient": ".client",
+    "BatchResult": ".batch",
+    "StreamAggregator": ".aggregation",
+    "AsyncStreamAggregator": ".aggregation",
+    "StreamTee": ".tee",
+    "ResponseCache": ".cache",
+    "MemoryCache": ".cache",
+    "SQLiteCache": ".cache",
+    "ModelCatalog": ".catalog",
+    "ModelPrices": ".catalog",
+    "RetryPolicy": ".retry",
+    "CircuitBreaker": ".retry",
+    "LoadBalancer": ".balancer",
+    "Deadlines": ".deadlines",
+    "PromptTemplate": ".templates",
+    "RequestCompression": ".compression",
+    "RateLimiter": ".ratelimit",
+    "AdaptiveConcurrencyLimiter": ".concurrency",
+    "PriorityScheduler": ".scheduler",
+    "HedgingPolicy": ".hedging",
+    "Instrumentation": ".metrics",
+    "MetricsRecorder": ".metrics",
+    "OpenTelemetryInstrumentation": ".metrics",
+    "RequestTiming": ".metrics",
+    "LLMGatewayError": ".exceptions",
+    "CircuitOpenError": ".exceptions",
+    "SlowConsumerError": ".exceptions",
+    "DeadlineExceededError": ".exceptions",
+    "FirstChunkTimeoutError": ".exceptions",
+    "IdleTimeoutError": ".exceptions",
+    "TotalTimeoutError": ".exceptions",
+    "ChatCompletionRequest": ".models",
+    "ChatCompletionResponse": ".models",
+    "Model": ".models",
+    "ModelList": ".models",
+    "LazyModelList": ".modellist",
+    "Message": ".models",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import a public name from its submodule on first access."""
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """List the module attributes, including the public names not imported yet."""
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,269 @@
+"""Aggregation of streamed chat completions, with client-side stop conditions."""
+
+from collections.abc import AsyncIterator, Iterable, Iterator
+from typing import Any, Optional
+
+from .models import ChatCompletionResponse
+
+
+class TextAccumulator:
+    """Accumulate streamed text, cutting it at stop sequences or a length cap.
+
+    Text that could be the start of a stop sequence split across chunks is held back until
+    the next chunk shows whether it is, so a stop sequence is never partially emitted. Each
+    chunk is searched together with at most the held back text, so the cost is linear in the
+    length of the stream, and the final text is joined once.
+
+    Attributes:
+        stop: The stop sequences
+        max_chars: Maximum number of characters to keep, or None for no limit
+        finish_reason: ``stop`` or ``length`` once a stop condition was met, otherwise None
+        stop_sequence: The stop sequence that was found, if any
+        length: Number of characters emitted so far
+    """
+
+    def __init__(self, stop: Optional[Iterable[str]] = None, max_chars: Optional[int] = None) -> None:
+        """Initialize the accumulator.
+
+        Args:
+            stop: Sequences ending the text, which are not included in it
+            max_chars: Maximum number of characters to keep
+        """
+        self.stop = tuple(sequence for sequence in (stop or ()) if sequence)
+        self.max_chars = max_chars
+        self.finish_reason: Optional[str] = None
+        self.stop_sequence: Optional[str] = None
+        self.length = 0
+        self._parts: list[str] = []
+        self._pending = ""
+        self._holdback = max((len(sequence) for sequence in self.stop), default=1) - 1
+
+    @property
+    def done(self) -> bool:
+        """Whether a stop condition was met."""
+        return self.finish_reason is not None
+
+    @property
+    def text(self) -> str:
+        """The text emitted so far."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of text.
+
+        Args:
+            chunk: The new text
+
+        Returns:
+            The text that can be emitted now, possibly empty
+        """
+        if self.done:
+            return ""
+        text = self._pending + chunk
+        emit = text
+        self._pending = ""
+        if self.stop:
+            found = min(
+                ((index, sequence) for sequence in self.stop if (index := text.find(sequence)) >= 0),
+                default=None,
+            )
+            if found is not None:
+                emit = text[: found[0]]
+                self.finish_reason, self.stop_sequence = "stop", found[1]
+            elif self._holdback:
+                split = max(0, len(text) - self._holdback)
+                emit, self._pending = text[:split], text[split:]
+        return self._emit(emit)
+
+    def flush(self) -> str:
+        """Emit the text held back at the end of the stream."""
+        text, self._pending = self._pending, ""
+        return "" if self.done else self._emit(text)
+
+    def _emit(self, text: str) -> str:
+        if self.max_chars is not None and self.length + len(text) >= self.max_chars:
+            # A stop sequence found after the cap was never reached
+            if self.finish_reason is None or self.length + len(text) > self.max_chars:
+                self.finish_reason, self.stop_sequence = "length", None
+            text = text[: self.max_chars - self.length]
+            self._pending = ""
+        if text:
+            self._parts.append(text)
+            self.length += len(text)
+        return text
+
+
+class StreamAggregator:
+    r"""Consume a streamed chat completion into one response, stopping early when asked.
+
+    Iterating yields the new text of each chunk. Once a stop sequence is found or the length
+    cap is reached, the underlying stream is closed right away, which closes the HTTP
+    response and returns its connection to the pool. Closing the aggregator, or leaving its
+    ``with`` block, does the same.
+
+    Example:
+        >>> with StreamAggregator(client.chat_completions(request), stop=["\n\n"]) as stream:
+        ...     for text in stream:
+        ...         print(text, end="")
+        >>> stream.response.message
+
+    Attributes:
+        finish_reason: ``stop`` or ``length`` if a client-side stop condition ended the stream
+        stop_sequence: The stop sequence that was found, if any
+    """
+
+    def __init__(
+        self,
+        stream: Iterable[ChatCompletionResponse],
+        *,
+        stop: Optional[Iterable[str]] = None,
+        max_chars: Optional[int] = None,
+    ) -> None:
+        """Wrap a stream returned by ``chat_completions``.
+
+        Args:
+            stream: The stream of chunks
+            stop: Sequences ending the text, which are not included in it
+            max_chars: Maximum number of characters to receive
+        """
+        self._stream = iter(stream)
+        self._text = TextAccumulator(stop, max_chars)
+        self._closed = False
+
+    @property
+    def finish_reason(self) -> Optional[str]:
+        """Client-side reason the stream ended early, if any."""
+        return self._text.finish_reason
+
+    @property
+    def stop_sequence(self) -> Optional[str]:
+        """The stop sequence that ended the stream, if any."""
+        return self._text.stop_sequence
+
+    @property
+    def text(self) -> str:
+        """The text received so far."""
+        return self._text.text
+
+    @property
+    def response(self) -> ChatCompletionResponse:
+        """The response made of the text received so far."""
+        return ChatCompletionResponse(message=self.text)
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield the new text of each chunk until the stream ends or a stop condition is met."""
+        try:
+            for chunk in self._stream:
+                text = self._text.feed(chunk.message)
+                if text:
+                    yield text
+                if self._text.done:
+                    return
+            text = self._text.flush()
+            if text:
+                yield text
+        finally:
+            self.close()
+
+    def collect(self) -> ChatCompletionResponse:
+        """Consume the rest of the stream and return the response."""
+        for _ in self:
+            pass
+        return self.response
+
+    def close(self) -> None:
+        """Close the underlying stream and its HTTP response."""
+        if not self._closed:
+            self._closed = True
+            close = getattr(self._stream, "close", None)
+            if close is not None:
+                close()
+
+    def __enter__(self) -> "StreamAggregator":
+        """Enter the context manager."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the stream."""
+        self.close()
+
+
+class AsyncStreamAggregator:
+    """Async version of StreamAggregator, for streams returned by ``achat_completions``."""
+
+    def __init__(
+        self,
+        stream: AsyncIterator[ChatCompletionResponse],
+        *,
+        stop: Optional[Iterable[str]] = None,
+        max_chars: Optional[int] = None,
+    ) -> None:
+        """Wrap a stream returned by ``achat_completions``.
+
+        Args:
+            stream: The stream of chunks
+            stop: Sequences ending the text, which are not included in it
+            max_chars: Maximum number of characters to receive
+        """
+        self._stream = stream
+        self._text = TextAccumulator(stop, max_chars)
+        self._closed = False
+
+    @property
+    def finish_reason(self) -> Optional[str]:
+        """Client-side reason the stream ended early, if any."""
+        return self._text.finish_reason
+
+    @property
+    def stop_sequence(self) -> Optional[str]:
+        """The stop sequence that ended the stream, if any."""
+        return self._text.stop_sequence
+
+    @property
+    def text(self) -> str:
+        """The text received so far."""
+        return self._text.text
+
+    @property
+    def response(self) -> ChatCompletionResponse:
+        """The response made of the text received so far."""
+        return ChatCompletionResponse(message=self.text)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        """Yield the new text of each chunk until the stream ends or a stop condition is met."""
+        try:
+            async for chunk in self._stream:
+                text = self._text.feed(chunk.message)
+                if text:
+                    yield text
+                if self._text.done:
+                    return
+            text = self._text.flush()
+            if text:
+                yield text
+        finally:
+            await self.aclose()
+
+    async def collect(self) -> ChatCompletionResponse:
+        """Consume the rest of the stream and return the response."""
+        async for _ in self:
+            pass
+        return self.response
+
+    async def aclose(self) -> None:
+        """Close the underlying stream and its HTTP response."""
+        if not self._closed:
+            self._closed = True
+            aclose = getattr(self._stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def __aenter__(self) -> "AsyncStreamAggregator":
+        """Enter the async context manager."""
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close the stream."""
+        await self.aclose()
@@ -0,0 +1,238 @@
+"""Load balancing and failover across several gateway deployments."""
+
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Container, Iterator, Sequence
+from typing import Callable, Literal, Optional, Union
+
+import httpx
+
+Strategy = Literal["ewma", "least_outstanding"]
+
+
+class Endpoint:
+    """Routing state of one gateway deployment.
+
+    Attributes:
+        base_url: Base URL of the deployment
+        outstanding: Number of requests in flight, streams included until they are closed
+        latency: Moving average of the response time in seconds, None until measured
+        error_rate: Moving average of the fraction of failed requests
+        healthy: Whether the endpoint is in rotation
+        requests: Number of requests sent
+        failures: Number of failed requests
+    """
+
+    def __init__(self, base_url: str) -> None:
+        """Initialize the state of a new endpoint."""
+        self.base_url = base_url.rstrip("/")
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.healthy = True
+        self.requests = 0
+        self.failures = 0
+        self._last_probe = time.monotonic()
+        self._probing = False
+
+    def __repr__(self) -> str:
+        """Return a summary of the endpoint state."""
+        return (
+            f"Endpoint({self.base_url!r}, healthy={self.healthy}, outstanding={self.outstanding}, "
+            f"latency={self.latency}, error_rate={self.error_rate:.2f})"
+        )
+
+
+class LoadBalancer:
+    """Route requests across several gateway deployments.
+
+    With the ``ewma`` strategy, each request goes to the endpoint with the lowest moving
+    average latency weighted by its requests in flight; with ``least_outstanding``, to the
+    endpoint with the fewest requests in flight. Endpoints not measured yet are preferred,
+    and ties are broken at random.
+
+    An endpoint whose error rate reaches ``max_error_rate`` is taken out of rotation. Every
+    ``health_check_interval`` seconds the client probes each endpoint with a health check in
+    the background, putting endpoints back into rotation when the probe succeeds and taking
+    them out when it fails. Probes are only sent while the client is making requests. When
+    every endpoint is out of rotation, requests are routed to them anyway rather than failing
+    without trying.
+
+    The client fails a request over to another endpoint immediately after a connection error
+    or a retryable status, trying each endpoint at most once before its retry policy applies.
+    Each endpoint has its own connection pool, unless a transport is injected into the client.
+    """
+
+    def __init__(
+        self,
+        base_urls: Sequence[str],
+        strategy: Strategy = "ewma",
+        smoothing: float = 0.2,
+        max_error_rate: float = 0.5,
+        min_requests: int = 5,
+        health_check_interval: Optional[float] = 10.0,
+    ) -> None:
+        """Initialize the load balancer.
+
+        Args:
+            base_urls: Base URLs of the gateway deployments
+            strategy: Either ``ewma`` or ``least_outstanding``
+            smoothing: Weight of the latest observation in the moving averages, between 0 and 1
+            max_error_rate: Error rate at which an endpoint is taken out of rotation
+            min_requests: Requests an endpoint must have served before its error rate is trusted
+            health_check_interval: Seconds between health probes of each endpoint, or None to
+                never probe, in which case endpoints are never taken out of rotation
+        """
+        if not base_urls:
+            raise ValueError("At least one base URL is required")
+        if strategy not in ("ewma", "least_outstanding"):
+            raise ValueError(f"Unknown load balancing strategy: {strategy!r}")
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be between 0 and 1")
+        self.endpoints = [Endpoint(base_url) for base_url in base_urls]
+        self.strategy = strategy
+        self.smoothing = smoothing
+        self.max_error_rate = max_error_rate
+        self.min_requests = min_requests
+        self.health_check_interval = health_check_interval
+        self._lock = threading.Lock()
+
+    @property
+    def healthy_endpoints(self) -> list[Endpoint]:
+        """Endpoints currently in rotation."""
+        return [endpoint for endpoint in self.endpoints if endpoint.healthy]
+
+    def acquire(
+        self, exclude: Container[Endpoint] = (), available: Optional[Callable[[Endpoint], bool]] = None
+    ) -> Optional[Endpoint]:
+        """Pick the endpoint for the next request and count the request as in flight.
+
+        Args:
+            exclude: Endpoints not to pick, such as those already tried for this request
+            available: Predicate telling whether an endpoint may be picked, such as its
+                circuit being closed; ignored when no endpoint satisfies it
+
+        Returns:
+            The endpoint, or None if every endpoint is excluded
+        """
+        with self._lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+            if not candidates:
+                return None
+            for tier in (
+                [
+                    endpoint
+                    for endpoint in candidates
+                    if endpoint.healthy and (available is None or available(endpoint))
+                ],
+                [endpoint for endpoint in candidates if endpoint.healthy],
+            ):
+                if tier:
+                    candidates = tier
+                    break
+            best = min(self._score(endpoint) for endpoint in candidates)
+            endpoint = random.choice([endpoint for endpoint in candidates if self._score(endpoint) == best])
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, latency: Optional[float] = None, failed: bool = False) -> None:
+        """Record the end of a request.
+
+        Args:
+            endpoint: The endpoint the request was sent to
+            latency: Response time in seconds, if a response was received
+            failed: Whether the request failed because of the endpoint
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if latency is not None:
+                if endpoint.latency is None:
+                    endpoint.latency = latency
+                else:
+                    endpoint.latency += self.smoothing * (latency - endpoint.latency)
+            endpoint.error_rate += self.smoothing * (float(failed) - endpoint.error_rate)
+            if failed:
+                endpoint.failures += 1
+                if (
+                    self.health_check_interval is not None
+                    and endpoint.requests >= self.min_requests
+                    and endpoint.error_rate >= self.max_error_rate
+                ):
+                    endpoint.healthy = False
+
+    def due_for_probe(self) -> list[Endpoint]:
+        """Return the endpoints to probe now, marking their probes as started."""
+        if self.health_check_interval is None:
+            return []
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for endpoint in self.endpoints:
+                if not endpoint._probing and now - endpoint._last_probe >= self.health_check_interval:
+                    endpoint._probing = True
+                    endpoint._last_probe = now
+                    due.append(endpoint)
+        return due
+
+    def probe_done(self, endpoint: Endpoint, healthy: bool) -> None:
+        """Record the outcome of a health probe."""
+        with self._lock:
+            endpoint._probing = False
+            endpoint._last_probe = time.monotonic()
+            if healthy and not endpoint.healthy:
+                endpoint.error_rate = 0.0
+            endpoint.healthy = healthy
+
+    def _score(self, endpoint: Endpoint) -> tuple[float, float]:
+        """Return the routing cost of an endpoint, lower being better."""
+        latency = endpoint.latency or 0.0
+        if self.strategy == "ewma":
+            return (latency * (endpoint.outstanding + 1), endpoint.outstanding)
+        return (endpoint.outstanding, latency)
+
+
+class _ReleasingStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Response stream calling ``on_close`` once when closed, wrapping a sync or async stream."""
+
+    def __init__(
+        self, stream: Union[httpx.SyncByteStream, httpx.AsyncByteStream], on_close: Callable[[], None]
+    ) -> None:
+        self._stream = stream
+        self._on_close: Optional[Callable[[], None]] = on_close
+
+    def __iter__(self) -> Iterator[bytes]:
+        assert isinstance(self._stream, httpx.SyncByteStream)
+        return iter(self._stream)
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        assert isinstance(self._stream, httpx.AsyncByteStream)
+        return self._stream.__aiter__()
+
+    def close(self) -> None:
+        try:
+            assert isinstance(self._stream, httpx.SyncByteStream)
+            self._stream.close()
+        finally:
+            self._release()
+
+    async def aclose(self) -> None:
+        try:
+            assert isinstance(self._stream, httpx.AsyncByteStream)
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+
+def release_on_close(response: httpx.Response, on_close: Callable[[], None]) -> None:
+    """Call ``on_close`` once the body of a streamed response is closed."""
+    if response.is_closed:
+        on_close()
+    else:
+        response.stream = _ReleasingStream(response.stream, on_close)
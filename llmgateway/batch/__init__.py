@@ -0,0 +1,162 @@
+"""Bounded-concurrency batch execution of chat completion requests."""
+
+import asyncio
+import itertools
+from collections.abc import AsyncIterator, Awaitable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from ..exceptions import LLMGatewayError
+from ..models import ChatCompletionRequest, ChatCompletionResponse
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one request in a batch.
+
+    Attributes:
+        index: Position of the request in the input
+        request: The request that was sent
+        response: The response, if the request succeeded
+        error: The exception raised by the request, if it failed
+    """
+
+    index: int
+    request: ChatCompletionRequest
+    response: Optional[ChatCompletionResponse] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the request succeeded."""
+        return self.error is None
+
+
+async def aiter_bounded(
+    func: Callable[[ChatCompletionRequest], Awaitable[ChatCompletionResponse]],
+    requests: Iterable[ChatCompletionRequest],
+    max_concurrency: int,
+) -> AsyncIterator[BatchResult]:
+    """Run ``func`` over ``requests`` with at most ``max_concurrency`` calls in flight.
+
+    Requests are pulled from ``requests`` lazily by a fixed set of workers, and finished
+    results are handed over through a queue bounded by ``max_concurrency``, so memory stays
+    constant even for very large or unbounded inputs. Exceptions are captured per item.
+
+    Args:
+        func: Coroutine function sending one request
+        requests: The requests to send
+        max_concurrency: Maximum number of requests in flight
+
+    Yields:
+        A BatchResult for each request, in completion order
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    items = enumerate(requests)
+    queue: asyncio.Queue[Optional[BatchResult]] = asyncio.Queue(maxsize=max_concurrency)
+    running = max_concurrency
+    failure: Optional[BaseException] = None
+    stopping = False
+
+    async def worker() -> None:
+        nonlocal running, failure
+        try:
+            for index, request in items:
+                try:
+                    result = BatchResult(index, request, response=await func(request))
+                except Exception as exc:
+                    result = BatchResult(index, request, error=exc)
+                await queue.put(result)
+        except BaseException as exc:
+            if stopping:
+                raise
+            # Raised while reading the input, or a BaseException from func: the consumer re-raises it
+            if failure is None:
+                failure = exc
+        finally:
+            if not stopping:
+                running -= 1
+                if running == 0 or failure is not None:
+                    await queue.put(None)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max_concurrency)]
+    try:
+        while True:
+            result = await queue.get()
+            if result is None:
+                break
+            yield result
+        if failure is not None:
+            raise failure
+    finally:
+        stopping = True
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+def iter_bounded(
+    func: Callable[[ChatCompletionRequest], ChatCompletionResponse],
+    requests: Iterable[ChatCompletionRequest],
+    max_concurrency: int,
+    executor: Executor,
+) -> Iterator[BatchResult]:
+    """Run ``func`` over ``requests`` on ``executor`` with at most ``max_concurrency`` calls in flight.
+
+    Thread version of aiter_bounded: requests are pulled lazily and a new one is submitted as
+    each one finishes. Closing the generator early, or an interrupt while waiting, cancels
+    the calls not started yet; calls already running finish in the background. If the
+    executor is shut down, the results of the calls submitted so far are yielded, with
+    ``CancelledError`` for those that never started, then ``LLMGatewayError`` is raised.
+
+    Args:
+        func: Function sending one request
+        requests: The requests to send
+        max_concurrency: Maximum number of requests in flight
+        executor: Executor running the calls, typically a thread pool
+
+    Yields:
+        A BatchResult for each request, in completion order
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    items = enumerate(requests)
+    pending: dict[Future[ChatCompletionResponse], tuple[int, ChatCompletionRequest]] = {}
+    shut_down = False
+
+    def submit(count: int) -> None:
+        nonlocal shut_down
+        if shut_down:
+            return
+        for index, request in itertools.islice(items, count):
+            try:
+                pending[executor.submit(func, request)] = (index, request)
+            except RuntimeError:  # the executor was shut down
+                shut_down = True
+                return
+
+    try:
+        submit(max_concurrency)
+        while pending:
+            # wait() does not count futures cancelled by the executor's shutdown as done
+            done = {future for future in pending if future.cancelled()}
+            if not done:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            results = []
+            for future in done:
+                index, request = pending.pop(future)
+                try:
+                    results.append(BatchResult(index, request, response=future.result()))
+                except Exception as exc:
+                    results.append(BatchResult(index, request, error=exc))
+            submit(max_concurrency - len(pending))
+            yield from results
+        if shut_down:
+            raise LLMGatewayError("The batch was cancelled because its executor was shut down")
+    finally:
+        for future in pending:
+            future.cancel()
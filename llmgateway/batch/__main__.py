@@ -0,0 +1,121 @@
+"""Run the chat completion requests of a JSONL file.
+
+Each input line is a ``ChatCompletionRequest``; each output line holds the ``index`` of the
+input line and its ``response`` or ``error``. Progress is checkpointed, so running the same
+command again after a crash resumes where it stopped.
+
+Usage: ``python -m llmgateway.batch requests.jsonl results.jsonl --concurrency 64``
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from ..client import LLMGatewayClient
+from .runner import CHECKPOINT_SUFFIX, BatchSummary, merge_shards, run_batch, shard_path
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m llmgateway.batch", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input", help="JSONL file of chat completion requests")
+    parser.add_argument("output", help="JSONL file of results")
+    parser.add_argument(
+        "--api-key", default=os.environ.get("LLMGATEWAY_API_KEY"), help="defaults to $LLMGATEWAY_API_KEY"
+    )
+    parser.add_argument(
+        "--base-url",
+        default=os.environ.get("LLMGATEWAY_BASE_URL", "https://api.llmgateway.io"),
+        help="defaults to $LLMGATEWAY_BASE_URL or the public gateway",
+    )
+    parser.add_argument("--concurrency", type=int, default=64, help="requests in flight per process")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes, each with its own client")
+    parser.add_argument("--timeout", type=float, default=120.0, help="request timeout in seconds")
+    parser.add_argument("--checkpoint-interval", type=float, default=5.0, help="seconds between checkpoints")
+    parser.add_argument("--overwrite", action="store_true", help="start over if the output exists without a checkpoint")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("an API key is required, with --api-key or $LLMGATEWAY_API_KEY")
+    if args.concurrency < 1 or args.processes < 1:
+        parser.error("--concurrency and --processes must be at least 1")
+    return args
+
+
+async def run(
+    args: argparse.Namespace, output_path: str, shard: int = 0, shards: int = 1, overwrite: Optional[bool] = None
+) -> BatchSummary:
+    """Run one shard of the batch with its own client, overwriting as ``--overwrite`` says unless told otherwise."""
+    client = LLMGatewayClient(
+        api_key=args.api_key,
+        base_url=args.base_url,
+        timeout=args.timeout,
+        max_connections=args.concurrency,
+        max_keepalive_connections=args.concurrency,
+    )
+    async with client:
+        return await run_batch(
+            client,
+            args.input,
+            output_path,
+            concurrency=args.concurrency,
+            shard=shard,
+            shards=shards,
+            checkpoint_interval=args.checkpoint_interval,
+            overwrite=args.overwrite if overwrite is None else overwrite,
+        )
+
+
+def run_shard(args: argparse.Namespace, shard: int) -> BatchSummary:
+    """Run one shard in a worker process.
+
+    Shard outputs are the run's own files: one left without a checkpoint, by a crash while
+    merging, is started over.
+    """
+    return asyncio.run(run(args, shard_path(args.output, shard), shard, args.processes, overwrite=True))
+
+
+def run_sharded(args: argparse.Namespace) -> BatchSummary:
+    """Run the batch across ``--processes`` worker processes and merge their outputs.
+
+    Each process handles the lines whose number modulo the process count is its shard, and
+    writes its own output and checkpoint. Running again after a crash resumes every shard
+    from its checkpoint and merges the outputs again, replacing a partially merged output.
+    """
+    checkpoints = [shard_path(args.output, shard) + CHECKPOINT_SUFFIX for shard in range(args.processes)]
+    if os.path.exists(args.output) and not any(map(os.path.exists, checkpoints)) and not args.overwrite:
+        raise FileExistsError(f"{args.output} exists without a checkpoint to resume from")
+    with ProcessPoolExecutor(args.processes) as executor:
+        summaries = list(executor.map(run_shard, [args] * args.processes, range(args.processes)))
+    merge_shards(args.output, args.processes)
+    return BatchSummary(
+        succeeded=sum(s.succeeded for s in summaries),
+        failed=sum(s.failed for s in summaries),
+        skipped=sum(s.skipped for s in summaries),
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run the batch and print a summary."""
+    args = parse_args(argv)
+    try:
+        summary = asyncio.run(run(args, args.output)) if args.processes == 1 else run_sharded(args)
+    except FileExistsError as exc:
+        print(f"{exc}; use --overwrite to start over", file=sys.stderr)
+        return 1
+    except FileNotFoundError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    print(
+        f"{summary.succeeded} succeeded, {summary.failed} failed, {summary.skipped} already done",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
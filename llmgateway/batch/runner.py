@@ -0,0 +1,271 @@
+"""Offline batch runs over JSONL files, resumable from checkpoints."""
+
+import bisect
+import json
+import os
+import shutil
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, BinaryIO, Optional
+
+from pydantic import ValidationError
+
+from ..models import ChatCompletionRequest, ChatCompletionResponse
+
+if TYPE_CHECKING:
+    from ..client import LLMGatewayClient
+
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+
+@dataclass
+class BatchSummary:
+    """Counts of a batch run.
+
+    Attributes:
+        succeeded: Requests answered in this run
+        failed: Requests that failed or could not be parsed in this run
+        skipped: Requests already finished by a previous run
+    """
+
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+
+class Checkpoint:
+    """Progress of a batch run, saved next to its output.
+
+    Results complete out of order, so progress is kept as a watermark below which every
+    input line is finished, plus the ranges of finished lines above it. Lines are handed out
+    in order, so the gaps between ranges are lines in flight: the number of ranges depends on
+    the concurrency rather than on the input size, even while an early line is slow or
+    retried and the run gets far ahead of it. The output size at the time of saving is
+    recorded as well: lines written after the last save are truncated and redone on resume,
+    so the output never holds the same line twice.
+
+    Attributes:
+        path: Path of the checkpoint file
+        shard: Index of the shard of input lines handled by the run
+        shards: Number of shards, lines being assigned to shards by line number modulo ``shards``
+        done_below: Every line of the shard below this one is finished
+        done: Sorted ``[first, last]`` ranges of finished lines of the shard above ``done_below``,
+            every line of the shard between ``first`` and ``last`` being finished
+        output_size: Size of the output when the checkpoint was saved
+    """
+
+    def __init__(self, path: str, shard: int = 0, shards: int = 1) -> None:
+        """Load the checkpoint at ``path``, or start a new one if there is none.
+
+        Args:
+            path: Path of the checkpoint file
+            shard: Index of the shard of input lines handled by the run
+            shards: Number of shards
+        """
+        self.path = path
+        self.shard = shard
+        self.shards = shards
+        self.done_below = 0
+        self.done: list[list[int]] = []
+        self.output_size = 0
+        if os.path.exists(path):
+            with open(path) as file:
+                state = json.load(file)
+            if (state["shard"], state["shards"]) != (shard, shards):
+                raise ValueError(f"{path} was written by a run with different shards")
+            self.done_below = state["done_below"]
+            self.done = state["done"]
+            self.output_size = state["output_size"]
+        self._advance()
+
+    def is_done(self, index: int) -> bool:
+        """Return whether input line ``index`` is finished."""
+        if index < self.done_below:
+            return True
+        position = bisect.bisect_left(self.done, [index + 1])
+        return position > 0 and self.done[position - 1][1] >= index
+
+    def mark_done(self, index: int) -> None:
+        """Record that input line ``index`` is finished."""
+        if self.is_done(index):
+            return
+        ranges, step = self.done, self.shards
+        # Ranges before this position start at or below the line
+        position = bisect.bisect_left(ranges, [index + 1])
+        extends_previous = position > 0 and ranges[position - 1][1] + step == index
+        extends_next = position < len(ranges) and ranges[position][0] - step == index
+        if extends_previous and extends_next:
+            ranges[position - 1][1] = ranges.pop(position)[1]
+        elif extends_previous:
+            ranges[position - 1][1] = index
+        elif extends_next:
+            ranges[position][0] = index
+        else:
+            ranges.insert(position, [index, index])
+        self._advance()
+
+    def save(self, output_size: int) -> None:
+        """Atomically save the progress, given the size of the flushed output."""
+        self.output_size = output_size
+        state = {
+            "shard": self.shard,
+            "shards": self.shards,
+            "done_below": self.done_below,
+            "done": self.done,
+            "output_size": output_size,
+        }
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    def _advance(self) -> None:
+        """Move the watermark past finished lines and lines of other shards."""
+        while self.done_below % self.shards != self.shard:
+            self.done_below += 1
+        if self.done and self.done[0][0] == self.done_below:
+            self.done_below = self.done.pop(0)[1] + self.shards
+
+
+def encode_result(
+    index: int, response: Optional[ChatCompletionResponse] = None, error: Optional[BaseException] = None
+) -> bytes:
+    """Encode one output line."""
+    if response is not None:
+        return b'{"index":%d,"response":%s}\n' % (index, response.model_dump_json().encode())
+    assert error is not None
+    return json.dumps({"index": index, "error": {"type": type(error).__name__, "message": str(error)}}).encode() + b"\n"
+
+
+async def run_batch(
+    client: "LLMGatewayClient",
+    input_path: str,
+    output_path: str,
+    *,
+    concurrency: int = 64,
+    shard: int = 0,
+    shards: int = 1,
+    checkpoint_interval: float = 5.0,
+    overwrite: bool = False,
+) -> BatchSummary:
+    """Send the requests of a JSONL file and write the results to a JSONL file.
+
+    Each input line is a ``ChatCompletionRequest``. Each output line holds the ``index`` of
+    the input line and either its ``response`` or its ``error``, in completion order. The
+    input is read lazily and results are written as they complete, so memory stays constant
+    whatever the input size. Progress is checkpointed to ``output_path + ".checkpoint"``
+    every ``checkpoint_interval`` seconds; running again after a crash resumes from the
+    last checkpoint. The checkpoint is kept once the run is complete, so running again
+    does nothing.
+
+    Args:
+        client: Client sending the requests
+        input_path: Path of the JSONL requests
+        output_path: Path of the JSONL results
+        concurrency: Maximum number of requests in flight
+        shard: Index of the lines handled by this run, for splitting a file across processes
+        shards: Number of runs the file is split across
+        checkpoint_interval: Seconds between checkpoints
+        overwrite: Start over if the output exists without a checkpoint, instead of failing
+
+    Returns:
+        The counts of the run
+    """
+    checkpoint_path = output_path + CHECKPOINT_SUFFIX
+    if os.path.exists(output_path) and not os.path.exists(checkpoint_path) and not overwrite:
+        raise FileExistsError(f"{output_path} exists without a checkpoint to resume from")
+    checkpoint = Checkpoint(checkpoint_path, shard, shards)
+    output_size = os.path.getsize(output_path) if os.path.exists(output_path) else None
+    if os.path.exists(checkpoint_path) and (output_size is None or output_size < checkpoint.output_size):
+        # Resuming would pad the output with NUL bytes where the checkpointed results were
+        raise FileNotFoundError(
+            f"{output_path} is missing or shorter than recorded in {checkpoint_path}; remove the checkpoint to start over"
+        )
+    summary = BatchSummary()
+    # Input line of each request handed to the client, by position; only holds requests in flight
+    line_numbers: dict[int, int] = {}
+
+    with open(output_path, "wb" if output_size is None else "r+b") as output:
+        output.seek(checkpoint.output_size)
+        output.truncate()
+        last_save = time.monotonic()
+
+        def finish(index: int, line: bytes) -> None:
+            nonlocal last_save
+            output.write(line)
+            checkpoint.mark_done(index)
+            if time.monotonic() - last_save >= checkpoint_interval:
+                save_checkpoint(output, checkpoint)
+                last_save = time.monotonic()
+
+        def requests() -> Iterator[ChatCompletionRequest]:
+            position = 0
+            for index, line in read_lines(input_path):
+                if index % shards != shard:
+                    continue
+                if checkpoint.is_done(index):
+                    summary.skipped += 1
+                    continue
+                if not line.strip():
+                    checkpoint.mark_done(index)
+                    continue
+                try:
+                    request = ChatCompletionRequest.model_validate_json(line)
+                except ValidationError as exc:
+                    summary.failed += 1
+                    finish(index, encode_result(index, error=exc))
+                    continue
+                line_numbers[position] = index
+                position += 1
+                yield request
+
+        async for result in client.aiter_chat_completions_many(requests(), max_concurrency=concurrency):
+            index = line_numbers.pop(result.index)
+            if result.ok:
+                summary.succeeded += 1
+            else:
+                summary.failed += 1
+            finish(index, encode_result(index, result.response, result.error))
+        save_checkpoint(output, checkpoint)
+    return summary
+
+
+def read_lines(path: str) -> Iterator[tuple[int, bytes]]:
+    """Yield the number and content of each line of a file, lazily."""
+    with open(path, "rb") as file:
+        yield from enumerate(file)
+
+
+def save_checkpoint(output: BinaryIO, checkpoint: Checkpoint) -> None:
+    """Make the output durable, then save the checkpoint pointing at its end."""
+    output.flush()
+    os.fsync(output.fileno())
+    checkpoint.save(output.tell())
+
+
+def shard_path(output_path: str, shard: int) -> str:
+    """Return the path of the output of one shard."""
+    return f"{output_path}.part{shard}"
+
+
+def merge_shards(output_path: str, shards: int) -> None:
+    """Concatenate the outputs of every shard into ``output_path`` and remove them.
+
+    The merged output replaces ``output_path`` atomically, so a crash while merging leaves
+    the shards in place to be merged again.
+    """
+    temporary = output_path + ".tmp"
+    with open(temporary, "wb") as output:
+        for shard in range(shards):
+            with open(shard_path(output_path, shard), "rb") as part:
+                shutil.copyfileobj(part, output)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(temporary, output_path)
+    for shard in range(shards):
+        # A shard output left without its checkpoint is started over rather than resumed
+        os.remove(shard_path(output_path, shard) + CHECKPOINT_SUFFIX)
+        os.remove(shard_path(output_path, shard))
@@ -0,0 +1,241 @@
+"""Response caching for deterministic chat completions."""
+
+import asyncio
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+from .models import ChatCompletionRequest
+
+
+def cache_key(body: bytes) -> str:
+    """Return the cache key for an encoded request body.
+
+    Args:
+        body: The JSON-encoded request, as sent to the gateway
+
+    Returns:
+        Hex SHA-256 digest of the body
+    """
+    return hashlib.sha256(body).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Base class for chat completion response caches.
+
+    Caches map the hash of an encoded request to the raw response body. Subclasses implement
+    the storage, guarded by ``_lock``; hit and miss counters are kept here. The async client
+    uses ``aget`` and ``aset``, which subclasses with blocking storage run off the event loop.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, deterministic_only: bool = True) -> None:
+        """Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry stays valid, or None to keep entries until evicted
+            deterministic_only: Only cache requests sent with ``temperature=0``
+        """
+        self.ttl = ttl
+        self.deterministic_only = deterministic_only
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def accepts(self, request: ChatCompletionRequest) -> bool:
+        """Whether responses to ``request`` may be cached.
+
+        Args:
+            request: The chat completion request
+
+        Returns:
+            False for streaming requests and, with ``deterministic_only``, for sampled ones
+        """
+        if request.stream:
+            return False
+        return not self.deterministic_only or request.temperature == 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Look up a cached response body.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached response body, or None on a miss
+        """
+        value = self._get(key, time.time())
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store a response body.
+
+        Args:
+            key: The cache key
+            value: The raw response body
+        """
+        expires_at = None if self.ttl is None else time.time() + self.ttl
+        self._set(key, value, expires_at)
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        """Async version of get."""
+        return self.get(key)
+
+    async def aset(self, key: str, value: bytes) -> None:
+        """Async version of set."""
+        self.set(key, value)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @abstractmethod
+    def _get(self, key: str, now: float) -> Optional[bytes]:
+        """Return the unexpired value stored under ``key``, if any."""
+
+    @abstractmethod
+    def _set(self, key: str, value: bytes, expires_at: Optional[float]) -> None:
+        """Store ``value`` under ``key``."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Return the number of stored entries."""
+
+
+class MemoryCache(ResponseCache):
+    """Bounded in-memory LRU cache with optional TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, deterministic_only: bool = True) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid, or None to keep entries until evicted
+            deterministic_only: Only cache requests sent with ``temperature=0``
+        """
+        super().__init__(ttl=ttl, deterministic_only=deterministic_only)
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[bytes, Optional[float]]] = OrderedDict()
+
+    def _get(self, key: str, now: float) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: bytes, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Return the number of stored entries."""
+        return len(self._entries)
+
+
+class SQLiteCache(ResponseCache):
+    """On-disk cache backed by SQLite that survives restarts."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        deterministic_only: bool = True,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            path: Path of the database file, created if missing
+            ttl: Seconds an entry stays valid, or None to keep entries until evicted
+            max_entries: Maximum number of entries kept before the least recently used are evicted
+            deterministic_only: Only cache requests sent with ``temperature=0``
+        """
+        super().__init__(ttl=ttl, deterministic_only=deterministic_only)
+        self.path = Path(path)
+        self.max_entries = max_entries
+        import sqlite3
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def _get(self, key: str, now: float) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return bytes(value)
+
+    def _set(self, key: str, value: bytes, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, time.time()),
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        """Look up a cached response body from a worker thread, keeping the event loop free."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: bytes) -> None:
+        """Store a response body from a worker thread, keeping the event loop free."""
+        await asyncio.to_thread(self.set, key, value)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        """Return the number of stored entries."""
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return int(count)
@@ -0,0 +1,339 @@
+"""Indexed, cached model catalog built on top of ``/v1/models``."""
+
+import asyncio
+import contextlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple, Optional, Union
+
+import httpx
+
+from .models import Model, ModelList, ModelPricing
+
+if TYPE_CHECKING:
+    from .client import LLMGatewayClient
+
+REFRESH_RETRY_DELAY = 30.0
+SNAPSHOT_FORMAT = 1
+
+
+def parse_price(value: Optional[str]) -> Optional[float]:
+    """Parse a price string from the API into a number.
+
+    Args:
+        value: The price as sent by the API
+
+    Returns:
+        The price as a float, or None when missing or not numeric
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class ModelPrices(NamedTuple):
+    """Model pricing with every price parsed into a number."""
+
+    prompt: Optional[float]
+    completion: Optional[float]
+    image: Optional[float] = None
+    request: Optional[float] = None
+    input_cache_read: Optional[float] = None
+    input_cache_write: Optional[float] = None
+    web_search: Optional[float] = None
+    internal_reasoning: Optional[float] = None
+
+    @classmethod
+    def from_pricing(cls, pricing: ModelPricing) -> "ModelPrices":
+        """Build parsed prices from the API pricing model."""
+        return cls(*(parse_price(getattr(pricing, field)) for field in cls._fields))
+
+
+class CatalogSnapshot:
+    """Set of models with lookup indexes built once.
+
+    Attributes:
+        models: The models, in API order
+        by_id: Models by id
+        by_provider: Models by ``providerId`` of any of their providers
+        by_input_modality: Models by supported input modality
+        by_output_modality: Models by supported output modality
+        by_parameter: Models by supported request parameter
+        prices: Parsed pricing by model id
+        etag: ``ETag`` of the response the snapshot was built from
+        last_modified: ``Last-Modified`` of the response the snapshot was built from
+        fetched_at: Time the snapshot was last confirmed fresh, from ``time.monotonic()``
+    """
+
+    def __init__(
+        self,
+        models: list[Model],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        fetched_at: Optional[float] = None,
+    ) -> None:
+        """Build the indexes for ``models``."""
+        self.models = models
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.monotonic() if fetched_at is None else fetched_at
+        self.by_id: dict[str, Model] = {}
+        self.by_provider: dict[str, list[Model]] = {}
+        self.by_input_modality: dict[str, list[Model]] = {}
+        self.by_output_modality: dict[str, list[Model]] = {}
+        self.by_parameter: dict[str, list[Model]] = {}
+        self.prices: dict[str, ModelPrices] = {}
+        for model in models:
+            self.by_id[model.id] = model
+            self.prices[model.id] = ModelPrices.from_pricing(model.pricing)
+            for provider_id in {provider.providerId for provider in model.providers}:
+                self.by_provider.setdefault(provider_id, []).append(model)
+            for modality in model.architecture.input_modalities:
+                self.by_input_modality.setdefault(modality, []).append(model)
+            for modality in model.architecture.output_modalities:
+                self.by_output_modality.setdefault(modality, []).append(model)
+            for parameter in model.supported_parameters or ():
+                self.by_parameter.setdefault(parameter, []).append(model)
+
+
+class ModelCatalog:
+    """Cached, indexed view of the models available on the gateway.
+
+    The model list is fetched once and kept for ``ttl`` seconds. Once it is stale, lookups
+    keep answering from the current snapshot while a refresh runs in the background; the
+    refresh is a conditional GET (``If-None-Match`` / ``If-Modified-Since``), so an unchanged
+    catalog costs a ``304`` and no revalidation. All lookups are dictionary reads.
+
+    Sync code can use the catalog directly: the first lookup blocks on the initial fetch.
+    Async code should ``await catalog.arefresh()`` once before the first lookup; later
+    background refreshes then run as tasks on the event loop.
+
+    With a ``path``, every response is also persisted to disk, and a new process starts from
+    that file instead of waiting on the network, in sync and async code alike. The file's
+    age counts towards ``ttl``; a stale file is served while it is revalidated in the
+    background after a random delay of up to ``jitter`` seconds, and a fresh one is
+    revalidated up to ``jitter`` seconds after it expires, so processes started together or
+    from the same file do not all hit ``/v1/models`` at once, and most of them get a ``304``.
+    """
+
+    def __init__(
+        self,
+        client: "LLMGatewayClient",
+        ttl: float = 300.0,
+        path: Optional[Union[str, Path]] = None,
+        jitter: float = 30.0,
+    ) -> None:
+        """Initialize the catalog.
+
+        Args:
+            client: Client used to fetch the model list
+            ttl: Seconds before the cached list is revalidated
+            path: File persisting the model list between processes, or None to keep it in memory only
+            jitter: Maximum random delay in seconds before revalidating a stale list loaded from ``path``
+        """
+        self.client = client
+        self.ttl = ttl
+        self.path = None if path is None else Path(path)
+        self.jitter = jitter
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._retry_at = 0.0
+        # Keeps background refresh tasks alive until they finish
+        self._tasks: set[asyncio.Task[bool]] = set()
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """The current snapshot, loaded from ``path`` or fetched first if the catalog is empty."""
+        snapshot = self._snapshot
+        if snapshot is None and self.path is not None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._load()
+            snapshot = self._snapshot
+        if snapshot is None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                self.refresh()
+                assert self._snapshot is not None
+                return self._snapshot
+            raise RuntimeError("The model catalog is empty: await catalog.arefresh() before the first lookup")
+        now = time.monotonic()
+        if now - snapshot.fetched_at >= self.ttl and now >= self._retry_at:
+            self._refresh_in_background()
+        return snapshot
+
+    @property
+    def models(self) -> list[Model]:
+        """All models, in API order."""
+        return self.snapshot.models
+
+    def get(self, model_id: str) -> Optional[Model]:
+        """Return the model with the given id, if any."""
+        return self.snapshot.by_id.get(model_id)
+
+    def __contains__(self, model_id: str) -> bool:
+        """Return whether a model with the given id exists."""
+        return model_id in self.snapshot.by_id
+
+    def __len__(self) -> int:
+        """Return the number of models."""
+        return len(self.snapshot.models)
+
+    def by_provider(self, provider_id: str) -> list[Model]:
+        """Return the models served by the given provider."""
+        return self.snapshot.by_provider.get(provider_id, [])
+
+    def by_input_modality(self, modality: str) -> list[Model]:
+        """Return the models accepting the given input modality."""
+        return self.snapshot.by_input_modality.get(modality, [])
+
+    def by_output_modality(self, modality: str) -> list[Model]:
+        """Return the models producing the given output modality."""
+        return self.snapshot.by_output_modality.get(modality, [])
+
+    def by_parameter(self, parameter: str) -> list[Model]:
+        """Return the models supporting the given request parameter."""
+        return self.snapshot.by_parameter.get(parameter, [])
+
+    def prices(self, model_id: str) -> Optional[ModelPrices]:
+        """Return the parsed pricing of the given model, if any."""
+        return self.snapshot.prices.get(model_id)
+
+    def refresh(self) -> bool:
+        """Revalidate the catalog against the gateway.
+
+        Returns:
+            Whether the model list changed
+        """
+        response = self.client._request("GET", "/v1/models", headers=self._conditional_headers())
+        return self._apply(response)
+
+    async def arefresh(self) -> bool:
+        """Async version of refresh."""
+        response = await self.client._arequest("GET", "/v1/models", headers=self._conditional_headers())
+        return self._apply(response)
+
+    def _conditional_headers(self) -> dict[str, str]:
+        """Return the validators of the current snapshot as request headers."""
+        headers: dict[str, str] = {}
+        snapshot = self._snapshot
+        if snapshot is not None:
+            if snapshot.etag:
+                headers["If-None-Match"] = snapshot.etag
+            if snapshot.last_modified:
+                headers["If-Modified-Since"] = snapshot.last_modified
+        return headers
+
+    def _apply(self, response: httpx.Response) -> bool:
+        """Update the snapshot from a ``/v1/models`` response."""
+        if response.status_code == 304 and self._snapshot is not None:
+            self._snapshot.fetched_at = time.monotonic()
+            self._touch()
+            return False
+        model_list = self.client._serializer.loads(ModelList, response.content)
+        self._snapshot = CatalogSnapshot(
+            model_list.data,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        self._save(self._snapshot, response.content)
+        return True
+
+    def _load(self) -> Optional[CatalogSnapshot]:
+        """Read the snapshot persisted at ``path``, or return None if it is missing or unreadable.
+
+        The file is one JSON header line with the validators, followed by the raw response
+        body, and its modification time is when the list was last confirmed fresh.
+        """
+        assert self.path is not None
+        try:
+            with self.path.open("rb") as file:
+                header = json.loads(file.readline())
+                body = file.read()
+                saved_at = os.fstat(file.fileno()).st_mtime
+            if not isinstance(header, dict) or header.get("format") != SNAPSHOT_FORMAT:
+                return None
+            model_list = self.client._serializer.loads(ModelList, body)
+        except (OSError, ValueError):
+            return None
+        now = time.monotonic()
+        snapshot = CatalogSnapshot(
+            model_list.data,
+            etag=header.get("etag"),
+            last_modified=header.get("last_modified"),
+            fetched_at=now - max(0.0, time.time() - saved_at),
+        )
+        # Processes sharing the file must not all revalidate at the instant it expires
+        expires_at = max(now, snapshot.fetched_at + self.ttl)
+        self._retry_at = expires_at + random.uniform(0, min(self.jitter, self.ttl))
+        return snapshot
+
+    def _save(self, snapshot: CatalogSnapshot, body: bytes) -> None:
+        """Persist a response body to ``path``, atomically, ignoring write errors."""
+        if self.path is None:
+            return
+        header = {"format": SNAPSHOT_FORMAT, "etag": snapshot.etag, "last_modified": snapshot.last_modified}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(json.dumps(header).encode() + b"\n")
+                file.write(body)
+            os.replace(temp, self.path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.unlink(temp)
+
+    def _touch(self) -> None:
+        """Record on disk that the persisted list was just confirmed fresh."""
+        if self.path is not None:
+            with contextlib.suppress(OSError):
+                os.utime(self.path)
+
+    def _refresh_in_background(self) -> None:
+        """Start a background refresh unless one is already running."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+        else:
+            task = loop.create_task(self.arefresh())
+            self._tasks.add(task)
+            task.add_done_callback(self._refresh_done)
+
+    def _background_refresh(self) -> None:
+        """Refresh from a background thread."""
+        try:
+            self.refresh()
+        except Exception:
+            self._refresh_failed()
+        finally:
+            self._refreshing = False
+
+    def _refresh_done(self, task: "asyncio.Task[bool]") -> None:
+        """Clear the refreshing flag and drop the task once a background refresh finishes."""
+        self._tasks.discard(task)
+        self._refreshing = False
+        if task.cancelled() or task.exception() is not None:
+            self._refresh_failed()
+
+    def _refresh_failed(self) -> None:
+        """Keep serving the stale snapshot and hold off the next attempt for a while."""
+        self._retry_at = time.monotonic() + min(self.ttl, REFRESH_RETRY_DELAY)
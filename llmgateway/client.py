@@ -1,19 +1,60 @@
 """LLMGateway API client."""
 
-import json
-from collections.abc import AsyncGenerator, Generator
+import asyncio
+import importlib.util
+import ssl
+import threading
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Generator, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Any, Optional, TypeVar, Union
 
 import httpx
 
+from .balancer import Endpoint, LoadBalancer, release_on_close
+from .batch import BatchResult, aiter_bounded, iter_bounded
+from .cache import ResponseCache, cache_key
+from .catalog import ModelCatalog
+from .coalesce import SingleFlight
+from .compression import RequestCompression
+from .concurrency import AdaptiveConcurrencyLimiter
+from .deadlines import Deadlines, DeadlineTracker, aiter_with_deadline, iter_with_deadline, wait_with_deadline
+from .hedging import HedgingPolicy, hedged
+from .metrics import Instrumentation, RequestTiming
+from .modellist import LazyModelList, ModelFilter
 from .models import (
     ChatCompletionRequest,
     ChatCompletionResponse,
     ModelList,
 )
+from .ratelimit import RateLimiter
+from .retry import RETRYABLE_STATUSES, CircuitBreaker, RetryPolicy
+from .scheduler import PriorityScheduler
+from .serialization import JSONBackend, Serializer
+from .streaming import aiter_sse_events, iter_sse_events
 
 T = TypeVar("T")
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+_ssl_contexts: dict[bool, ssl.SSLContext] = {}
+
+
+def default_ssl_context(http2: bool = False) -> ssl.SSLContext:
+    """Return the SSL context shared by the connection pools of every client with the same ``http2`` setting.
+
+    Loading the CA bundle takes tens of milliseconds, so it is done once per process, on the
+    first connection pool created, rather than once per pool. httpcore sets the ALPN protocols
+    on the context at every connect, so HTTP/1.1 and HTTP/2 clients must not share one.
+    """
+    context = _ssl_contexts.get(http2)
+    if context is None:
+        context = _ssl_contexts.setdefault(http2, httpx.create_ssl_context())
+    return context
+
 
 class LLMGatewayClient:
     """Client for interacting with the LLMGateway API."""
@@ -23,27 +64,154 @@ class LLMGatewayClient:
         api_key: str,
         base_url: str = "https://api.llmgateway.io",
         timeout: float = 30.0,
+        *,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 20,
+        keepalive_expiry: Optional[float] = 5.0,
+        http2: bool = False,
+        transport: Optional[httpx.BaseTransport] = None,
+        async_transport: Optional[httpx.AsyncBaseTransport] = None,
+        json_backend: JSONBackend = "pydantic",
+        cache: Optional[ResponseCache] = None,
+        catalog_ttl: float = 300.0,
+        catalog_path: Optional[Union[str, Path]] = None,
+        retry: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        coalesce: bool = False,
+        hedging: Optional[HedgingPolicy] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        compression: Optional[RequestCompression] = None,
+        load_balancer: Optional[LoadBalancer] = None,
+        deadlines: Optional[Deadlines] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        scheduler: Optional[PriorityScheduler] = None,
     ) -> None:
         """Initialize the LLMGateway client.
 
+        The underlying HTTP clients are created lazily on first use, so a
+        client that only ever makes async calls never opens a sync pool.
+
         Args:
             api_key: Your LLMGateway API key
             base_url: The base URL for the API
             timeout: Request timeout in seconds
+            max_connections: Maximum number of concurrent connections per pool
+            max_keepalive_connections: Maximum number of idle connections kept alive per pool
+            keepalive_expiry: Seconds an idle keep-alive connection is kept before being closed
+            http2: Enable HTTP/2 multiplexing (requires the ``http2`` extra)
+            transport: Shared sync transport to use instead of a private pool
+            async_transport: Shared async transport to use instead of a private pool
+            json_backend: JSON backend used to encode requests and decode responses
+            cache: Cache for non-streaming chat completion responses
+            catalog_ttl: Seconds before the model catalog is revalidated
+            catalog_path: File persisting the model catalog, so that new processes start from it
+                instead of waiting on ``/v1/models``
+            retry: Policy for retrying failed requests, or None to never retry
+            circuit_breaker: Breaker failing requests fast while an endpoint is down
+            rate_limiter: Request and token budget to stay within, possibly shared with other clients
+            coalesce: Share one upstream request between identical concurrent async calls
+            hedging: Policy for hedging slow non-streaming async chat completions
+            instrumentation: Hooks receiving the latency breakdown of every request
+            compression: Settings for compressing large chat completion request bodies
+            load_balancer: Balancer routing requests across several base URLs, which are
+                used instead of ``base_url``
+            deadlines: Default time limits for chat completion calls, which can also be set per call
+            concurrency_limiter: Adaptive limit of async requests in flight, adjusted from the
+                gateway's latency, 429s and 5xx responses
+            scheduler: Scheduler sharing the async chat completion capacity between priority
+                classes, such as interactive and bulk calls
         """
+        if http2 and importlib.util.find_spec("h2") is None:
+            raise ImportError("HTTP/2 support requires the 'h2' package: pip install 'llmgateway-sdk[http2]'")
+
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
-        self._client = httpx.Client(
-            base_url=self.base_url,
-            timeout=timeout,
-            headers={"Authorization": f"Bearer {api_key}"},
-        )
-        self._async_client = httpx.AsyncClient(
-            base_url=self.base_url,
-            timeout=timeout,
-            headers={"Authorization": f"Bearer {api_key}"},
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
         )
+        self.http2 = http2
+        self._transport = transport
+        self._async_transport = async_transport
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._serializer = Serializer(json_backend)
+        self.cache = cache
+        self.catalog_ttl = catalog_ttl
+        self.catalog_path = catalog_path
+        self._catalog: Optional[ModelCatalog] = None
+        self.retry = retry
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self._singleflight = SingleFlight() if coalesce else None
+        self.hedging = hedging
+        self.instrumentation = instrumentation
+        self.compression = compression
+        self.load_balancer = load_balancer
+        self.deadlines = deadlines
+        self.concurrency_limiter = concurrency_limiter
+        self.scheduler = scheduler
+        self._endpoint_clients: dict[str, httpx.Client] = {}
+        self._async_endpoint_clients: dict[str, httpx.AsyncClient] = {}
+        self._probe_tasks: set[asyncio.Future[None]] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Guards the lazy creation of objects shared between threads
+        self._lock = threading.Lock()
+
+    def _client_kwargs(
+        self, base_url: str, transport: Union[httpx.BaseTransport, httpx.AsyncBaseTransport, None]
+    ) -> dict[str, Any]:
+        """Return the keyword arguments shared by the sync and async HTTP clients."""
+        kwargs = {
+            "base_url": base_url,
+            "timeout": self.timeout,
+            "headers": {"Authorization": f"Bearer {self.api_key}"},
+            "limits": self.limits,
+            "http2": self.http2,
+            "transport": transport,
+        }
+        if transport is None:
+            kwargs["verify"] = default_ssl_context(self.http2)
+        return kwargs
+
+    @property
+    def catalog(self) -> ModelCatalog:
+        """Cached, indexed model catalog, created on first access."""
+        if self._catalog is None:
+            self._catalog = ModelCatalog(self, ttl=self.catalog_ttl, path=self.catalog_path)
+        return self._catalog
+
+    def _get_client(self, endpoint: Optional[Endpoint] = None) -> httpx.Client:
+        """Return the sync HTTP client of ``endpoint``, or of ``base_url``, creating it on first use."""
+        if endpoint is None:
+            if self._client is None:
+                with self._lock:
+                    if self._client is None:
+                        self._client = httpx.Client(**self._client_kwargs(self.base_url, self._transport))
+            return self._client
+        client = self._endpoint_clients.get(endpoint.base_url)
+        if client is None:
+            with self._lock:
+                client = self._endpoint_clients.get(endpoint.base_url)
+                if client is None:
+                    client = httpx.Client(**self._client_kwargs(endpoint.base_url, self._transport))
+                    self._endpoint_clients[endpoint.base_url] = client
+        return client
+
+    def _get_async_client(self, endpoint: Optional[Endpoint] = None) -> httpx.AsyncClient:
+        """Async version of _get_client."""
+        if endpoint is None:
+            if self._async_client is None:
+                self._async_client = httpx.AsyncClient(**self._client_kwargs(self.base_url, self._async_transport))
+            return self._async_client
+        client = self._async_endpoint_clients.get(endpoint.base_url)
+        if client is None:
+            client = httpx.AsyncClient(**self._client_kwargs(endpoint.base_url, self._async_transport))
+            self._async_endpoint_clients[endpoint.base_url] = client
+        return client
 
     def __enter__(self) -> "LLMGatewayClient":
         """Enter the context manager."""
@@ -55,102 +223,811 @@ class LLMGatewayClient:
         """Exit the context manager."""
         self.close()
 
+    async def __aenter__(self) -> "LLMGatewayClient":
+        """Enter the async context manager."""
+        return self
+
+    async def __aexit__(
+        self, exc_type: Optional[type[BaseException]], exc_val: Optional[BaseException], exc_tb: Optional[Any]
+    ) -> None:
+        """Exit the async context manager."""
+        await self.aclose()
+
     def close(self) -> None:
-        """Close the HTTP client."""
-        self._client.close()
+        """Close the sync HTTP client.
+
+        Batch requests not started yet are cancelled. Injected transports are left open,
+        since they may be shared with other clients. Use :meth:`aclose` to release both the
+        sync and the async pools.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        clients = list(self._endpoint_clients.values())
+        if self._client is not None:
+            clients.append(self._client)
+        if self._transport is None:
+            for client in clients:
+                client.close()
+        self._client = None
+        self._endpoint_clients.clear()
 
     async def aclose(self) -> None:
-        """Close the async HTTP client."""
-        await self._async_client.aclose()
+        """Close both the sync and the async HTTP clients, cancelling background health probes."""
+        self.close()
+        probes = list(self._probe_tasks)
+        for task in probes:
+            task.cancel()
+        await asyncio.gather(*probes, return_exceptions=True)
+        clients = list(self._async_endpoint_clients.values())
+        if self._async_client is not None:
+            clients.append(self._async_client)
+        if self._async_transport is None:
+            for client in clients:
+                await client.aclose()
+        self._async_client = None
+        self._async_endpoint_clients.clear()
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        stream: bool = False,
+        tokens: int = 0,
+        timing: Optional[RequestTiming] = None,
+        deadline: Optional[DeadlineTracker] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request, applying the client's rate limit, retry and circuit breaker policies.
+
+        Error statuses raise ``httpx.HTTPStatusError``. ``304 Not Modified`` is returned as is,
+        for callers sending conditional requests. With ``stream=True`` the body is not read and
+        the caller must close the response. ``tokens`` is the estimated token cost charged to
+        the rate limiter for each attempt.
+
+        When instrumentation is enabled, streaming callers pass their own ``timing`` and report
+        it once the stream is consumed; it is reported here if the request fails.
+
+        ``deadline`` caps the socket timeouts of each attempt, since blocking reads cannot be
+        interrupted otherwise; async callers enforce deadlines with ``asyncio.wait_for``.
+        """
+        if self.instrumentation is None:
+            return self._send(method, path, kwargs, stream, tokens, None, deadline)
+        if timing is None:
+            timing = RequestTiming(method, path, stream)
+        try:
+            response = self._send(method, path, kwargs, stream, tokens, timing, deadline)
+        except BaseException as exc:
+            self._report_timing(timing, exc)
+            raise
+        if not stream:
+            self._report_timing(timing)
+        return response
+
+    async def _arequest(
+        self,
+        method: str,
+        path: str,
+        *,
+        stream: bool = False,
+        tokens: int = 0,
+        timing: Optional[RequestTiming] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Async version of _request."""
+        if self.instrumentation is None:
+            return await self._asend(method, path, kwargs, stream, tokens, None)
+        if timing is None:
+            timing = RequestTiming(method, path, stream)
+        try:
+            response = await self._asend(method, path, kwargs, stream, tokens, timing)
+        except BaseException as exc:
+            self._report_timing(timing, exc)
+            raise
+        if not stream:
+            self._report_timing(timing)
+        return response
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        kwargs: dict[str, Any],
+        stream: bool,
+        tokens: int,
+        timing: Optional[RequestTiming],
+        deadline: Optional[DeadlineTracker] = None,
+    ) -> httpx.Response:
+        """Send a request with retries and failover, raising for error statuses."""
+        if self.load_balancer is not None:
+            self._probe_in_background()
+        start = time.monotonic()
+        attempt = 0
+        tried: list[Endpoint] = []
+        failover = False
+        while True:
+            if not failover:
+                attempt += 1
+            if deadline is not None:
+                deadline.check()
+            # Wait on the rate limit before taking an endpoint slot, so waiting requests do not count as in flight
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(tokens)
+            endpoint = None
+            try:
+                endpoint, key = self._acquire_endpoint(path, tried)
+                self._before_attempt(key)
+            except BaseException:
+                self._release_endpoint(endpoint)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.refund(tokens)
+                raise
+            client = self._get_client(endpoint)
+            request = client.build_request(method, path, **kwargs)
+            if deadline is not None:
+                deadline.apply(request)
+            if timing is not None:
+                request.extensions["trace"] = timing.trace
+                timing.start_attempt()
+            sent_at = time.perf_counter()
+            try:
+                response = client.send(request, stream=stream)
+            except BaseException as exc:
+                self._release_endpoint(endpoint, failed=isinstance(exc, httpx.TransportError))
+                delay = self._after_error(key, attempt, start, exc)
+                delay, failover = self._failover_delay(endpoint, tried, delay, error=exc)
+                if delay is None:
+                    if deadline is not None and deadline.caused(exc):
+                        raise deadline.expired() from exc
+                    raise
+            else:
+                latency = time.perf_counter() - sent_at
+                if timing is not None:
+                    timing.response_received(response.status_code)
+                delay = self._after_response(key, attempt, start, response)
+                delay, failover = self._failover_delay(endpoint, tried, delay, response=response)
+                if delay is None:
+                    if not response.is_success and response.status_code != 304:
+                        self._release_endpoint(endpoint, latency, response.status_code >= 500)
+                        try:
+                            _ = response.read()
+                        finally:
+                            response.close()
+                        _ = response.raise_for_status()
+                    self._release_endpoint(endpoint, latency, response=response if stream else None)
+                    return response
+                self._release_endpoint(endpoint, latency, response.status_code >= 500)
+                response.close()
+            if delay:
+                if deadline is not None:
+                    deadline.check(delay)
+                time.sleep(delay)
+
+    async def _asend(
+        self,
+        method: str,
+        path: str,
+        kwargs: dict[str, Any],
+        stream: bool,
+        tokens: int,
+        timing: Optional[RequestTiming],
+    ) -> httpx.Response:
+        """Async version of _send."""
+        if self.load_balancer is not None:
+            self._aprobe_in_background()
+        start = time.monotonic()
+        attempt = 0
+        tried: list[Endpoint] = []
+        failover = False
+        while True:
+            if not failover:
+                attempt += 1
+            # Wait on the rate limit before taking a concurrency permit and an endpoint slot, so
+            # waiting requests do not count as in flight
+            if self.rate_limiter is not None:
+                await self.rate_limiter.aacquire(tokens)
+            permit = endpoint = None
+            try:
+                if self.concurrency_limiter is not None:
+                    permit = await self.concurrency_limiter.acquire()
+                endpoint, key = self._acquire_endpoint(path, tried)
+                self._before_attempt(key)
+                client = self._get_async_client(endpoint)
+                request = client.build_request(method, path, **kwargs)
+            except BaseException:
+                self._release_endpoint(endpoint)
+                self._release_permit(permit)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.refund(tokens)
+                raise
+            if timing is not None:
+                request.extensions["trace"] = timing.atrace
+                timing.start_attempt()
+            sent_at = time.perf_counter()
+            try:
+                response = await client.send(request, stream=stream)
+            except BaseException as exc:
+                self._release_endpoint(endpoint, failed=isinstance(exc, httpx.TransportError))
+                self._release_permit(permit, overloaded=isinstance(exc, httpx.TimeoutException))
+                delay = self._after_error(key, attempt, start, exc)
+                delay, failover = self._failover_delay(endpoint, tried, delay, error=exc)
+                if delay is None:
+                    raise
+            else:
+                latency = time.perf_counter() - sent_at
+                if timing is not None:
+                    timing.response_received(response.status_code)
+                self._release_permit(permit, latency, response)
+                delay = self._after_response(key, attempt, start, response)
+                delay, failover = self._failover_delay(endpoint, tried, delay, response=response)
+                if delay is None:
+                    if not response.is_success and response.status_code != 304:
+                        self._release_endpoint(endpoint, latency, response.status_code >= 500)
+                        try:
+                            _ = await response.aread()
+                        finally:
+                            await response.aclose()
+                        _ = response.raise_for_status()
+                    self._release_endpoint(endpoint, latency, response=response if stream else None)
+                    return response
+                self._release_endpoint(endpoint, latency, response.status_code >= 500)
+                await response.aclose()
+            if delay:
+                await asyncio.sleep(delay)
 
-    def health_check(self) -> dict[str, Any]:
+    def _acquire_endpoint(self, path: str, tried: list[Endpoint]) -> tuple[Optional[Endpoint], str]:
+        """Pick the endpoint for the next attempt and return it with its circuit breaker key.
+
+        Endpoints already tried for this request are avoided until every endpoint was tried.
+        """
+        if self.load_balancer is None:
+            return None, path
+        breaker = self.circuit_breaker
+        available = None if breaker is None else (lambda endpoint: not breaker.is_open(endpoint.base_url + path))
+        endpoint = self.load_balancer.acquire(tried, available)
+        if endpoint is None:
+            tried.clear()
+            endpoint = self.load_balancer.acquire(tried, available)
+            assert endpoint is not None
+        return endpoint, endpoint.base_url + path
+
+    def _release_endpoint(
+        self,
+        endpoint: Optional[Endpoint],
+        latency: Optional[float] = None,
+        failed: bool = False,
+        response: Optional[httpx.Response] = None,
+    ) -> None:
+        """Record the end of an attempt on ``endpoint``, or once ``response`` is closed if it is streamed."""
+        if endpoint is None or self.load_balancer is None:
+            return
+        if response is not None:
+            balancer = self.load_balancer
+            release_on_close(response, lambda: balancer.release(endpoint, latency, failed))
+        else:
+            self.load_balancer.release(endpoint, latency, failed)
+
+    def _release_permit(
+        self,
+        permit: Optional[float],
+        latency: Optional[float] = None,
+        response: Optional[httpx.Response] = None,
+        overloaded: bool = False,
+    ) -> None:
+        """Free the concurrency slot of an attempt, once ``response`` is closed if it is streamed."""
+        if permit is None or self.concurrency_limiter is None:
+            return
+        limiter = self.concurrency_limiter
+        if response is None:
+            limiter.release(permit, latency, overloaded)
+            return
+        overloaded = response.status_code == 429 or response.status_code >= 500
+        latency = None if overloaded else latency
+        release_on_close(response, lambda: limiter.release(permit, latency, overloaded))
+
+    def _failover_delay(
+        self,
+        endpoint: Optional[Endpoint],
+        tried: list[Endpoint],
+        delay: Optional[float],
+        *,
+        error: Optional[BaseException] = None,
+        response: Optional[httpx.Response] = None,
+    ) -> tuple[Optional[float], bool]:
+        """Return the delay before the next attempt, and whether it fails over to another endpoint.
+
+        Connection errors and retryable statuses are retried at once on an endpoint not tried
+        yet; otherwise the retry policy's ``delay`` applies.
+        """
+        if endpoint is None or self.load_balancer is None:
+            return delay, False
+        tried.append(endpoint)
+        if len(tried) >= len(self.load_balancer.endpoints):
+            return delay, False
+        if error is not None:
+            exceptions = self.retry.retry_exceptions if self.retry is not None else (httpx.TransportError,)
+            retryable = isinstance(error, exceptions)
+        else:
+            statuses = self.retry.retry_statuses if self.retry is not None else RETRYABLE_STATUSES
+            retryable = response is not None and response.status_code in statuses
+        return (0.0, True) if retryable else (delay, False)
+
+    def _probe_in_background(self) -> None:
+        """Start health probes of the endpoints that are due, each in its own thread."""
+        assert self.load_balancer is not None
+        for endpoint in self.load_balancer.due_for_probe():
+            threading.Thread(target=self._probe, args=(endpoint,), daemon=True).start()
+
+    def _probe(self, endpoint: Endpoint) -> None:
+        """Probe an endpoint and record whether it is healthy."""
+        assert self.load_balancer is not None
+        try:
+            self._get_client(endpoint).get("/").raise_for_status()
+        except Exception:
+            self.load_balancer.probe_done(endpoint, False)
+        else:
+            self.load_balancer.probe_done(endpoint, True)
+
+    def _aprobe_in_background(self) -> None:
+        """Start health probes of the endpoints that are due, each in its own task."""
+        assert self.load_balancer is not None
+        for endpoint in self.load_balancer.due_for_probe():
+            task = asyncio.ensure_future(self._aprobe(endpoint))
+            self._probe_tasks.add(task)
+            task.add_done_callback(self._probe_tasks.discard)
+
+    async def _aprobe(self, endpoint: Endpoint) -> None:
+        """Async version of _probe."""
+        assert self.load_balancer is not None
+        healthy = False
+        try:
+            (await self._get_async_client(endpoint).get("/")).raise_for_status()
+            healthy = True
+        except asyncio.CancelledError:
+            # Closing the client is no sign of the endpoint's health
+            healthy = endpoint.healthy
+            raise
+        except Exception:
+            pass
+        finally:
+            self.load_balancer.probe_done(endpoint, healthy)
+
+    def _start_timing(self, method: str, path: str, stream: bool = False) -> Optional[RequestTiming]:
+        """Start timing a call if instrumentation is enabled."""
+        return None if self.instrumentation is None else RequestTiming(method, path, stream)
+
+    def _report_timing(self, timing: Optional[RequestTiming], error: Optional[BaseException] = None) -> None:
+        """Finish ``timing`` and hand it to the instrumentation hooks."""
+        if timing is not None and self.instrumentation is not None:
+            timing.finish(error)
+            self.instrumentation.on_request_end(timing)
+
+    def _json_content(self, body: bytes) -> dict[str, Any]:
+        """Return the content and headers for sending an encoded JSON body, compressed if enabled."""
+        if self.compression is None:
+            return {"content": body, "headers": JSON_HEADERS}
+        content, headers = self.compression.encode(body, JSON_HEADERS)
+        return {"content": content, "headers": headers}
+
+    def _estimate_tokens(self, request: ChatCompletionRequest) -> int:
+        """Return the token cost of ``request`` for the rate limiter."""
+        return 0 if self.rate_limiter is None else self.rate_limiter.estimate_tokens(request)
+
+    def _before_attempt(self, endpoint: str) -> None:
+        """Fail fast if the circuit for ``endpoint`` is open."""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request(endpoint)
+
+    def _after_error(self, endpoint: str, attempt: int, start: float, error: BaseException) -> Optional[float]:
+        """Record a failed attempt and return the delay before retrying, or None to raise."""
+        if not isinstance(error, Exception):
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.release(endpoint)
+            return None
+        if self.circuit_breaker is not None:
+            if isinstance(error, httpx.TransportError):
+                self.circuit_breaker.record_failure(endpoint)
+            else:
+                self.circuit_breaker.release(endpoint)
+        if self.retry is None:
+            return None
+        return self.retry.next_delay(attempt, time.monotonic() - start, error=error)
+
+    def _after_response(self, endpoint: str, attempt: int, start: float, response: httpx.Response) -> Optional[float]:
+        """Record a completed attempt and return the delay before retrying, or None to stop."""
+        if self.circuit_breaker is not None:
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure(endpoint)
+            else:
+                self.circuit_breaker.record_success(endpoint)
+        if self.retry is None or response.is_success:
+            return None
+        return self.retry.next_delay(attempt, time.monotonic() - start, response=response)
+
+    def health_check(self, base_url: Optional[str] = None) -> dict[str, Any]:
         """Check the health of the API.
 
+        Args:
+            base_url: Base URL of one load-balanced endpoint to check directly, bypassing retries
+                and routing, or None to check the API like any other request
+
         Returns:
             Dict containing health check information
+
+        Raises:
+            ValueError: If ``base_url`` is not an endpoint of the load balancer
         """
-        response = self._client.get("/")
-        _ = response.raise_for_status()
-        return response.json()
+        if base_url is not None:
+            response = self._get_client(self._balanced_endpoint(base_url)).get("/")
+            return response.raise_for_status().json()
+        return self._request("GET", "/").json()
 
-    async def ahealth_check(self) -> dict[str, Any]:
+    async def ahealth_check(self, base_url: Optional[str] = None) -> dict[str, Any]:
         """Async version of health_check."""
-        response = await self._async_client.get("/")
-        _ = await response.raise_for_status()  # type: ignore
-        return await response.json()
+        if base_url is not None:
+            response = await self._get_async_client(self._balanced_endpoint(base_url)).get("/")
+            return response.raise_for_status().json()
+        return (await self._arequest("GET", "/")).json()
+
+    def _balanced_endpoint(self, base_url: str) -> Endpoint:
+        """Return the load balancer endpoint with the given base URL."""
+        endpoints = [] if self.load_balancer is None else self.load_balancer.endpoints
+        for endpoint in endpoints:
+            if endpoint.base_url == base_url:
+                return endpoint
+        raise ValueError(f"{base_url} is not a load-balanced endpoint")
 
     def chat_completions(
         self,
         request: ChatCompletionRequest,
+        *,
+        use_cache: bool = True,
+        deadlines: Optional[Deadlines] = None,
     ) -> Union[ChatCompletionResponse, Generator[ChatCompletionResponse, None, None]]:
         """Create a chat completion.
 
         Args:
             request: The chat completion request
+            use_cache: Whether the response cache may be used for this request
+            deadlines: Time limits for this call, instead of the client's ``deadlines``
 
         Returns:
             ChatCompletionResponse or Generator for streaming responses
+
+        Raises:
+            DeadlineExceededError: A deadline passed; the connection is released first
         """
+        deadlines = deadlines or self.deadlines
         if request.stream:
-            return self._stream_chat_completions(request)
+            return self._stream_chat_completions(request, deadlines)
+        return self._chat_completion(request, use_cache=use_cache, deadlines=deadlines)
 
-        response = self._client.post(
-            "/v1/chat/completions",
-            json=request.model_dump(exclude_none=True),
+    def _chat_completion(
+        self, request: ChatCompletionRequest, use_cache: bool = True, deadlines: Optional[Deadlines] = None
+    ) -> ChatCompletionResponse:
+        """Create a non-streaming chat completion, going through the cache when enabled."""
+        body = self._serializer.dumps(request)
+        cache = self.cache if use_cache and self.cache is not None and self.cache.accepts(request) else None
+        deadline = None if deadlines is None else deadlines.start()
+        if cache is None:
+            content = self._post_chat_completion(body, self._estimate_tokens(request), deadline)
+        else:
+            key = cache_key(body)
+            cached = cache.get(key)
+            if cached is not None:
+                return self._serializer.loads(ChatCompletionResponse, cached)
+            content = self._post_chat_completion(body, self._estimate_tokens(request), deadline)
+            cache.set(key, content)
+        return self._serializer.loads(ChatCompletionResponse, content)
+
+    def _post_chat_completion(self, body: bytes, tokens: int = 0, deadline: Optional[DeadlineTracker] = None) -> bytes:
+        """Send an encoded chat completion request and return the raw response body."""
+        response = self._request(
+            "POST", "/v1/chat/completions", tokens=tokens, deadline=deadline, **self._json_content(body)
         )
-        _ = response.raise_for_status()
-        return ChatCompletionResponse(**response.json())
+        return response.content
 
     async def achat_completions(
         self,
         request: ChatCompletionRequest,
+        *,
+        use_cache: bool = True,
+        deadlines: Optional[Deadlines] = None,
+        priority: Optional[str] = None,
     ) -> Union[ChatCompletionResponse, AsyncGenerator[ChatCompletionResponse, None]]:
-        """Async version of chat_completions."""
+        """Async version of chat_completions.
+
+        Args:
+            request: The chat completion request
+            use_cache: Whether the response cache may be used for this request
+            deadlines: Time limits for this call, instead of the client's ``deadlines``
+            priority: Priority class of the call when a scheduler is set, defaults to the
+                scheduler's default class
+
+        Returns:
+            ChatCompletionResponse or AsyncGenerator for streaming responses
+        """
+        deadlines = deadlines or self.deadlines
         if request.stream:
-            return self._astream_chat_completions(request)
+            return self._astream_chat_completions(request, deadlines, priority)
+        return await self._achat_completion(request, use_cache=use_cache, deadlines=deadlines, priority=priority)
 
-        response = await self._async_client.post(
-            "/v1/chat/completions",
-            json=request.model_dump(exclude_none=True),
-        )
-        _ = await response.raise_for_status()  # type: ignore
-        return ChatCompletionResponse(**await response.json())
+    async def _achat_completion(
+        self,
+        request: ChatCompletionRequest,
+        use_cache: bool = True,
+        deadlines: Optional[Deadlines] = None,
+        priority: Optional[str] = None,
+    ) -> ChatCompletionResponse:
+        """Async version of _chat_completion."""
+        body = self._serializer.dumps(request)
+        cache = self.cache if use_cache and self.cache is not None and self.cache.accepts(request) else None
+        deadline = None if deadlines is None else deadlines.start()
+        if cache is None:
+            content = await self._apost_chat_completion(body, self._estimate_tokens(request), deadline, priority)
+        else:
+            key = cache_key(body)
+            cached = await cache.aget(key)
+            if cached is not None:
+                return self._serializer.loads(ChatCompletionResponse, cached)
+            content = await self._apost_chat_completion(body, self._estimate_tokens(request), deadline, priority)
+            await cache.aset(key, content)
+        return self._serializer.loads(ChatCompletionResponse, content)
+
+    async def _apost_chat_completion(
+        self,
+        body: bytes,
+        tokens: int = 0,
+        deadline: Optional[DeadlineTracker] = None,
+        priority: Optional[str] = None,
+    ) -> bytes:
+        """Async version of _post_chat_completion, sharing identical in-flight requests when coalescing."""
+        if deadline is not None:
+            return await wait_with_deadline(self._apost_chat_completion(body, tokens, priority=priority), deadline)
+        if self._singleflight is not None:
+            key = f"POST /v1/chat/completions {cache_key(body)}"
+            return await self._singleflight.do(key, lambda: self._asend_chat_completion(body, tokens, priority))
+        return await self._asend_chat_completion(body, tokens, priority)
+
+    async def _asend_chat_completion(self, body: bytes, tokens: int, priority: Optional[str] = None) -> bytes:
+        """Send an encoded chat completion request once the scheduler allows it, hedging it when enabled."""
+        if self.scheduler is not None:
+            await self.scheduler.acquire(priority)
+        try:
+            # Hedged attempts share the compressed body
+            content = self._json_content(body)
+            if self.hedging is not None:
+                return await hedged(lambda: self._asend_chat_completion_once(content, tokens), self.hedging)
+            return await self._asend_chat_completion_once(content, tokens)
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.release(priority)
+
+    async def _asend_chat_completion_once(self, content: dict[str, Any], tokens: int) -> bytes:
+        """Send a chat completion request with the content from ``_json_content`` and return the raw response body."""
+        response = await self._arequest("POST", "/v1/chat/completions", tokens=tokens, **content)
+        return response.content
+
+    def chat_completions_many(
+        self,
+        requests: Iterable[ChatCompletionRequest],
+        *,
+        max_concurrency: Optional[int] = None,
+    ) -> list[BatchResult]:
+        """Create many chat completions on a thread pool, with bounded concurrency.
+
+        The threads share the client's connection pool. A failing request does not affect
+        the others: its exception is captured in the corresponding result instead of being
+        raised.
+
+        Args:
+            requests: The chat completion requests, which must not be streaming
+            max_concurrency: Maximum number of requests in flight, defaults to the pool size
+
+        Returns:
+            One BatchResult per request, in input order
+        """
+        results: dict[int, BatchResult] = {}
+        for result in self.iter_chat_completions_many(requests, max_concurrency=max_concurrency):
+            results[result.index] = result
+        return [results[index] for index in range(len(results))]
+
+    def iter_chat_completions_many(
+        self,
+        requests: Iterable[ChatCompletionRequest],
+        *,
+        max_concurrency: Optional[int] = None,
+    ) -> Iterator[BatchResult]:
+        """Create many chat completions on a thread pool, yielding results as they complete.
+
+        Requests are consumed lazily, so ``requests`` may be a generator over an arbitrarily
+        large input. Closing the iterator cancels the requests not started yet. Closing the
+        client does too, and the iterator then raises ``LLMGatewayError`` once the results of
+        the requests already submitted are yielded.
+
+        Args:
+            requests: The chat completion requests, which must not be streaming
+            max_concurrency: Maximum number of requests in flight, defaults to the pool size
+
+        Returns:
+            Iterator of BatchResult in completion order; use ``index`` to match inputs
+        """
+        if max_concurrency is None:
+            max_concurrency = self.limits.max_connections or DEFAULT_MAX_CONCURRENCY
+        return iter_bounded(self._batch_item, requests, max_concurrency, self._get_executor())
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the thread pool running sync batches, creating it on first use."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        self.limits.max_connections or DEFAULT_MAX_CONCURRENCY, thread_name_prefix="llmgateway"
+                    )
+        return self._executor
+
+    def _batch_item(self, request: ChatCompletionRequest) -> ChatCompletionResponse:
+        """Send one request of a sync batch."""
+        if request.stream:
+            raise ValueError("Streaming requests cannot be sent in a batch")
+        return self._chat_completion(request, deadlines=self.deadlines)
+
+    async def achat_completions_many(
+        self,
+        requests: Iterable[ChatCompletionRequest],
+        *,
+        max_concurrency: Optional[int] = None,
+        priority: Optional[str] = None,
+    ) -> list[BatchResult]:
+        """Create many chat completions with bounded concurrency.
+
+        A failing request does not affect the others: its exception is captured in the
+        corresponding result instead of being raised.
+
+        Args:
+            requests: The chat completion requests, which must not be streaming
+            max_concurrency: Maximum number of requests in flight, defaults to the pool size
+            priority: Priority class of the requests when a scheduler is set
+
+        Returns:
+            One BatchResult per request, in input order
+        """
+        results: dict[int, BatchResult] = {}
+        async for result in self.aiter_chat_completions_many(
+            requests, max_concurrency=max_concurrency, priority=priority
+        ):
+            results[result.index] = result
+        return [results[index] for index in range(len(results))]
+
+    def aiter_chat_completions_many(
+        self,
+        requests: Iterable[ChatCompletionRequest],
+        *,
+        max_concurrency: Optional[int] = None,
+        priority: Optional[str] = None,
+    ) -> AsyncIterator[BatchResult]:
+        """Create many chat completions with bounded concurrency, yielding results as they complete.
+
+        Requests are consumed lazily, so ``requests`` may be a generator over an arbitrarily
+        large input.
+
+        Args:
+            requests: The chat completion requests, which must not be streaming
+            max_concurrency: Maximum number of requests in flight, defaults to the pool size
+            priority: Priority class of the requests when a scheduler is set
+
+        Returns:
+            Async iterator of BatchResult in completion order; use ``index`` to match inputs
+        """
+        if max_concurrency is None:
+            max_concurrency = self.limits.max_connections or DEFAULT_MAX_CONCURRENCY
+        return aiter_bounded(lambda request: self._abatch_item(request, priority), requests, max_concurrency)
+
+    async def _abatch_item(
+        self, request: ChatCompletionRequest, priority: Optional[str] = None
+    ) -> ChatCompletionResponse:
+        """Send one request of a batch."""
+        if request.stream:
+            raise ValueError("Streaming requests cannot be sent in a batch")
+        return await self._achat_completion(request, deadlines=self.deadlines, priority=priority)
 
     def _stream_chat_completions(
         self,
         request: ChatCompletionRequest,
+        deadlines: Optional[Deadlines] = None,
     ) -> Generator[ChatCompletionResponse, None, None]:
         """Stream chat completions."""
-        with self._client.stream(
+        timing = self._start_timing("POST", "/v1/chat/completions", stream=True)
+        deadline = None if deadlines is None else deadlines.start()
+        response = self._request(
             "POST",
             "/v1/chat/completions",
-            json=request.model_dump(exclude_none=True),
-        ) as response:
-            _ = response.raise_for_status()
-            for line in response.iter_lines():
-                if line:
-                    if isinstance(line, bytes):
-                        line = line.decode()
-                    data = json.loads(line)
-                    yield ChatCompletionResponse(**data)
+            stream=True,
+            tokens=self._estimate_tokens(request),
+            timing=timing,
+            deadline=deadline,
+            **self._json_content(self._serializer.dumps(request)),
+        )
+        events = iter_sse_events(response.iter_bytes())
+        if deadline is not None:
+            # The body is read with the socket timeouts set when it starts
+            deadline.apply_to_body(response.request)
+            events = iter_with_deadline(events, deadline)
+        error: Optional[BaseException] = None
+        try:
+            for event in events:
+                if timing is not None:
+                    timing.chunk_received()
+                yield self._serializer.loads(ChatCompletionResponse, event)
+        except BaseException as exc:
+            error = None if isinstance(exc, GeneratorExit) else exc
+            raise
+        finally:
+            response.close()
+            self._report_timing(timing, error)
 
     async def _astream_chat_completions(
         self,
         request: ChatCompletionRequest,
+        deadlines: Optional[Deadlines] = None,
+        priority: Optional[str] = None,
     ) -> AsyncGenerator[ChatCompletionResponse, None]:
         """Async stream chat completions."""
-        async with self._async_client.stream(
-            "POST",
-            "/v1/chat/completions",
-            json=request.model_dump(exclude_none=True),
-        ) as response:
-            _ = await response.raise_for_status()  # type: ignore
-            async for line in response.aiter_lines():
-                if line:
-                    if isinstance(line, bytes):
-                        line = line.decode()
-                    data = json.loads(line)
-                    yield ChatCompletionResponse(**data)
+        body = self._serializer.dumps(request)
+        tokens = self._estimate_tokens(request)
+        deadline = None if deadlines is None else deadlines.start()
+        if self._singleflight is not None:
+            key = f"POST /v1/chat/completions {cache_key(body)}"
+            events = self._singleflight.stream(key, lambda: self._astream_events(body, tokens, priority, deadline))
+        else:
+            events = self._astream_events(body, tokens, priority, deadline)
+        chunks = events if deadline is None else aiter_with_deadline(events, deadline)
+        try:
+            async for event in chunks:
+                yield self._serializer.loads(ChatCompletionResponse, event)
+        finally:
+            if chunks is not events:
+                await chunks.aclose()
+            await events.aclose()
+
+    async def _astream_events(
+        self, body: bytes, tokens: int, priority: Optional[str] = None, deadline: Optional[DeadlineTracker] = None
+    ) -> AsyncGenerator[bytes, None]:
+        """Send an encoded streaming chat completion request and yield the raw event payloads.
+
+        When a scheduler is set, the stream holds its slot until it is closed. ``deadline`` is
+        told when the body starts, from which its idle deadline counts.
+        """
+        if self.scheduler is not None:
+            await self.scheduler.acquire(priority)
+        try:
+            timing = self._start_timing("POST", "/v1/chat/completions", stream=True)
+            response = await self._arequest(
+                "POST",
+                "/v1/chat/completions",
+                stream=True,
+                tokens=tokens,
+                timing=timing,
+                **self._json_content(body),
+            )
+            if deadline is not None:
+                deadline.start_body()
+            error: Optional[BaseException] = None
+            try:
+                async for event in aiter_sse_events(response.aiter_bytes()):
+                    if timing is not None:
+                        timing.chunk_received()
+                    yield event
+            except BaseException as exc:
+                error = None if isinstance(exc, GeneratorExit) else exc
+                raise
+            finally:
+                await response.aclose()
+                self._report_timing(timing, error)
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.release(priority)
 
     def list_models(self) -> ModelList:
         """List all available models.
@@ -158,12 +1035,43 @@ class LLMGatewayClient:
         Returns:
             ModelList containing available models
         """
-        response = self._client.get("/v1/models")
-        _ = response.raise_for_status()
-        return ModelList(**response.json())
+        response = self._request("GET", "/v1/models")
+        return self._serializer.loads(ModelList, response.content)
 
     async def alist_models(self) -> ModelList:
         """Async version of list_models."""
-        response = await self._async_client.get("/v1/models")
-        _ = await response.raise_for_status()  # type: ignore
-        return ModelList(**await response.json())
+        if self._singleflight is not None:
+            content = await self._singleflight.do("GET /v1/models", self._afetch_models)
+        else:
+            content = await self._afetch_models()
+        return self._serializer.loads(ModelList, content)
+
+    def list_models_lazy(self, where: Optional[ModelFilter] = None, fields: Sequence[str] = ()) -> LazyModelList:
+        """List the available models without validating them up front.
+
+        Suited to large catalogs when only a few models or fields are needed: each model is
+        validated on first access, ``where`` drops models while parsing and ``fields`` are
+        extracted into columns.
+
+        Args:
+            where: Predicate on the raw JSON entry of each model; models it rejects are dropped
+            fields: Fields to extract into columns, with dots for nested fields such as
+                ``pricing.prompt``
+
+        Returns:
+            LazyModelList of the models kept
+        """
+        response = self._request("GET", "/v1/models")
+        return LazyModelList(response.content, where=where, fields=fields, serializer=self._serializer)
+
+    async def alist_models_lazy(self, where: Optional[ModelFilter] = None, fields: Sequence[str] = ()) -> LazyModelList:
+        """Async version of list_models_lazy."""
+        if self._singleflight is not None:
+            content = await self._singleflight.do("GET /v1/models", self._afetch_models)
+        else:
+            content = await self._afetch_models()
+        return LazyModelList(content, where=where, fields=fields, serializer=self._serializer)
+
+    async def _afetch_models(self) -> bytes:
+        """Fetch the raw ``/v1/models`` response body."""
+        return (await self._arequest("GET", "/v1/models")).content
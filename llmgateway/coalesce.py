@@ -0,0 +1,149 @@
+"""Single-flight coalescing of identical concurrent requests."""
+
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from .exceptions import LLMGatewayError
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    """A shared in-flight call and the number of callers waiting on it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future[T]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class _Broadcast:
+    """Items of a shared stream, replayed to every subscriber."""
+
+    __slots__ = ("items", "done", "error", "event", "subscribers", "task")
+
+    def __init__(self) -> None:
+        self.items: list[bytes] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.event = asyncio.Event()
+        self.subscribers = 0
+        self.task: Optional[asyncio.Future[None]] = None
+
+    def notify(self) -> None:
+        """Wake up every subscriber waiting for a change."""
+        event, self.event = self.event, asyncio.Event()
+        event.set()
+
+
+class SingleFlight:
+    """Share one upstream call between concurrent callers using the same key.
+
+    The first caller for a key starts the call in its own task; callers arriving while it is
+    in flight wait for the same result. A caller being cancelled does not affect the others,
+    and the upstream call is cancelled only once every caller has gone. Keys are forgotten
+    as soon as the call finishes or is abandoned, so nothing is cached and a later caller
+    never joins a call that is being cancelled.
+    """
+
+    def __init__(self) -> None:
+        """Initialize with no calls in flight."""
+        self._calls: dict[str, _Call[Any]] = {}
+        self._streams: dict[str, _Broadcast] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls and streams in flight."""
+        return len(self._calls) + len(self._streams)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Run ``func`` unless a call with the same key is already in flight, and return its result.
+
+        Args:
+            key: Canonical key of the call
+            func: Coroutine function making the upstream call
+
+        Returns:
+            The result of the shared call
+        """
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(func())
+            call = _Call(task)
+            self._calls[key] = call
+            task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Callers arriving from now on must start a new call rather than join this one
+                self._forget(self._calls, key, call)
+                call.task.cancel()
+
+    async def stream(self, key: str, open_stream: Callable[[], AsyncIterator[bytes]]) -> AsyncGenerator[bytes, None]:
+        """Subscribe to a shared stream, opening it unless one with the same key is in flight.
+
+        Subscribers joining late first receive the items already produced, so every
+        subscriber sees the whole stream.
+
+        Args:
+            key: Canonical key of the stream
+            open_stream: Function opening the upstream stream
+
+        Yields:
+            Each item of the shared stream
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.ensure_future(self._pump(key, broadcast, open_stream()))
+        broadcast.subscribers += 1
+        try:
+            index = 0
+            while True:
+                event = broadcast.event
+                if index < len(broadcast.items):
+                    yield broadcast.items[index]
+                    index += 1
+                    continue
+                if broadcast.done:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+                await event.wait()
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and broadcast.task is not None and not broadcast.task.done():
+                self._forget(self._streams, key, broadcast)
+                broadcast.task.cancel()
+
+    async def _pump(self, key: str, broadcast: _Broadcast, upstream: AsyncIterator[bytes]) -> None:
+        """Read the upstream stream into the broadcast."""
+        try:
+            async for item in upstream:
+                broadcast.items.append(item)
+                broadcast.notify()
+        except Exception as exc:
+            broadcast.error = exc
+        except asyncio.CancelledError:
+            # Never let a cancelled stream look complete to anyone still reading it
+            broadcast.error = LLMGatewayError("The shared stream was cancelled before it ended")
+            raise
+        finally:
+            self._forget(self._streams, key, broadcast)
+            broadcast.done = True
+            broadcast.notify()
+            aclose = getattr(upstream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    @staticmethod
+    def _forget(registry: dict[str, T], key: str, value: T) -> None:
+        """Remove ``key`` from ``registry`` if it still maps to ``value``."""
+        if registry.get(key) is value:
+            del registry[key]
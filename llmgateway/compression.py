@@ -0,0 +1,72 @@
+"""Compression of request bodies."""
+
+import gzip
+import importlib.util
+import threading
+from typing import Any, Literal
+
+CompressionAlgorithm = Literal["gzip", "zstd"]
+
+
+class RequestCompression:
+    """Compress large request bodies before sending them.
+
+    Bodies smaller than ``threshold`` bytes are sent as is, since compressing them costs
+    more CPU than the bytes saved are worth. Responses need no configuration: the client
+    advertises every encoding it can decode in ``Accept-Encoding`` (gzip and deflate, plus
+    zstd with the ``zstd`` extra and brotli when installed) and decompresses responses,
+    including streamed ones, incrementally as they arrive.
+
+    Each body is compressed once per call, and the compressed bytes are reused by every
+    retry, hedge and failover attempt of that call.
+
+    The gateway must accept compressed request bodies for this to be enabled.
+    """
+
+    def __init__(self, algorithm: CompressionAlgorithm = "gzip", threshold: int = 8192, level: int = -1) -> None:
+        """Initialize the compression settings.
+
+        Args:
+            algorithm: Either ``gzip`` or ``zstd`` (requires the ``zstd`` extra)
+            threshold: Minimum body size in bytes to compress
+            level: Compression level, -1 for a fast default (1 for gzip, 3 for zstd), as
+                compression runs before every call is sent and its CPU time adds to latency
+        """
+        if algorithm not in ("gzip", "zstd"):
+            raise ValueError(f"Unknown compression algorithm: {algorithm!r}")
+        if algorithm == "zstd" and importlib.util.find_spec("zstandard") is None:
+            raise ImportError("zstd compression requires the 'zstandard' package: pip install 'llmgateway-sdk[zstd]'")
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self.level = level
+        self._local = threading.local()
+
+    def compress(self, body: bytes) -> bytes:
+        """Compress a body with the configured algorithm."""
+        if self.algorithm == "gzip":
+            return gzip.compress(body, compresslevel=1 if self.level < 0 else self.level, mtime=0)
+        return self._zstd_compressor().compress(body)
+
+    def encode(self, body: bytes, headers: dict[str, str]) -> tuple[bytes, dict[str, str]]:
+        """Compress ``body`` if it is large enough.
+
+        Args:
+            body: The request body
+            headers: The request headers
+
+        Returns:
+            The body to send and its headers, with ``Content-Encoding`` set when compressed
+        """
+        if len(body) < self.threshold:
+            return body, headers
+        return self.compress(body), {**headers, "Content-Encoding": self.algorithm}
+
+    def _zstd_compressor(self) -> Any:
+        """Return this thread's zstd compressor, since compressors are not thread safe."""
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            import zstandard
+
+            level = 3 if self.level < 0 else self.level
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=level)
+        return compressor
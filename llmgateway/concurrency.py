@@ -0,0 +1,140 @@
+"""Adaptive limit of requests in flight, in the style of TCP congestion control."""
+
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limit of concurrent requests that adapts to the gateway's health (AIMD).
+
+    Each successful request raises the limit by ``1 / limit``, so it grows by about one per
+    window of ``limit`` requests, but only while the limit is actually being used. A 429, a
+    5xx, a timeout or a latency above ``latency_tolerance`` times the average cuts the limit
+    by ``backoff_ratio``. Requests started before the last cut cannot cut it again, so a burst
+    of failures from one window counts once. Requests over the limit wait in arrival order.
+
+    The limiter belongs to one event loop; share it between clients on that loop only.
+
+    Attributes:
+        min_limit: Lowest the limit can go
+        max_limit: Highest the limit can go
+        backoff_ratio: Factor applied to the limit on overload
+        latency_tolerance: Ratio to the average latency above which a response counts as
+            overload, or None to ignore latency
+        smoothing: Weight of each new sample in the average latency
+        decreases: Number of times the limit was cut
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: Optional[float] = 2.0,
+        smoothing: float = 0.05,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            initial_limit: Requests allowed in flight at first
+            min_limit: Lowest the limit can go
+            max_limit: Highest the limit can go
+            backoff_ratio: Factor applied to the limit on overload
+            latency_tolerance: Ratio to the average latency above which a response counts as
+                overload, or None to ignore latency
+            smoothing: Weight of each new sample in the average latency
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.decreases = 0
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._latency: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def limit(self) -> int:
+        """Requests currently allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Requests currently in flight."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for a slot."""
+        return len(self._waiters)
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Average latency of successful requests, in seconds."""
+        return self._latency
+
+    async def acquire(self) -> float:
+        """Wait for a slot.
+
+        Returns:
+            The time the slot was granted, to pass to :meth:`release`
+        """
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the caller was cancelled
+                self._in_flight -= 1
+                self._wake()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        return time.monotonic()
+
+    def release(self, started: float, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        """Free a slot and adjust the limit from the outcome of the request.
+
+        Args:
+            started: The time returned by :meth:`acquire`
+            latency: Time to the response, if one was received
+            overloaded: Whether the request failed in a way showing the gateway is overloaded
+        """
+        in_flight = self._in_flight
+        self._in_flight -= 1
+        if latency is not None and not overloaded:
+            average = self._latency
+            if average is not None and self.latency_tolerance is not None:
+                overloaded = latency > average * self.latency_tolerance
+            self._latency = latency if average is None else average + self.smoothing * (latency - average)
+        if overloaded:
+            if started >= self._last_decrease:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+                self._last_decrease = time.monotonic()
+                self.decreases += 1
+        elif latency is not None and in_flight * 2 >= self._limit:
+            self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters, in arrival order."""
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
@@ -0,0 +1,197 @@
+"""Per-request deadlines for chat completions: time to first chunk, idle gaps and total time."""
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Iterator
+from typing import Optional, TypeVar
+
+import httpx
+
+from .exceptions import DeadlineExceededError, FirstChunkTimeoutError, IdleTimeoutError, TotalTimeoutError
+
+T = TypeVar("T")
+
+# Socket timeouts may fire slightly before the deadline they were set to
+TIMER_SLACK = 0.01
+
+
+class Deadlines:
+    """Time limits for one chat completion call, on top of the client's ``timeout``.
+
+    For a non-streaming call the whole response counts as the first chunk, so ``idle``
+    does not apply to it. Limits run from the start of the call and cover retries.
+
+    In the async client, an expired deadline interrupts the call at once. Blocking reads of
+    the sync client cannot be interrupted, so there deadlines bound the socket timeouts of
+    each read, and are checked again as each chunk arrives. With ``idle`` set, both clients
+    also count the wait between the response headers and the first chunk as idle time.
+
+    Attributes:
+        first_chunk: Seconds until the first chunk, or the response when not streaming
+        idle: Seconds allowed between two chunks
+        total: Seconds allowed for the whole call, including reading the stream
+    """
+
+    __slots__ = ("first_chunk", "idle", "total")
+
+    def __init__(
+        self, first_chunk: Optional[float] = None, idle: Optional[float] = None, total: Optional[float] = None
+    ) -> None:
+        """Initialize the deadlines; None means no limit.
+
+        Args:
+            first_chunk: Seconds until the first chunk, or the response when not streaming
+            idle: Seconds allowed between two chunks
+            total: Seconds allowed for the whole call
+        """
+        if any(limit is not None and limit <= 0 for limit in (first_chunk, idle, total)):
+            raise ValueError("Deadlines must be positive")
+        self.first_chunk = first_chunk
+        self.idle = idle
+        self.total = total
+
+    def start(self) -> "DeadlineTracker":
+        """Start tracking a call against these deadlines."""
+        return DeadlineTracker(self)
+
+
+class DeadlineTracker:
+    """Progress of one call against its Deadlines."""
+
+    __slots__ = ("deadlines", "started", "body_started", "last_chunk", "_wakeup")
+
+    def __init__(self, deadlines: Deadlines) -> None:
+        """Start tracking a call now."""
+        self.deadlines = deadlines
+        self.started = time.monotonic()
+        self.body_started: Optional[float] = None
+        self.last_chunk: Optional[float] = None
+        # Wakes up wait_with_deadline when the body starts, as the idle deadline then counts
+        self._wakeup: Optional[asyncio.Future[None]] = None
+
+    def _next_deadline(self) -> Optional[tuple[float, DeadlineExceededError]]:
+        """Return the time of the next deadline, with the error raised when it passes."""
+        deadlines = self.deadlines
+        candidates: list[tuple[float, DeadlineExceededError]] = []
+        if self.last_chunk is None and deadlines.first_chunk is not None:
+            candidates.append((self.started + deadlines.first_chunk, FirstChunkTimeoutError(deadlines.first_chunk)))
+        idle_from = self.body_started if self.last_chunk is None else self.last_chunk
+        if idle_from is not None and deadlines.idle is not None:
+            candidates.append((idle_from + deadlines.idle, IdleTimeoutError(deadlines.idle)))
+        if deadlines.total is not None:
+            candidates.append((self.started + deadlines.total, TotalTimeoutError(deadlines.total)))
+        return min(candidates, key=lambda candidate: candidate[0], default=None)
+
+    def remaining(self) -> Optional[float]:
+        """Return the seconds left until the next deadline, or None if there is none."""
+        deadline = self._next_deadline()
+        return None if deadline is None else max(0.0, deadline[0] - time.monotonic())
+
+    def expired(self) -> DeadlineExceededError:
+        """Return the error for the next deadline, once it has passed."""
+        deadline = self._next_deadline()
+        assert deadline is not None
+        return deadline[1]
+
+    def check(self, delay: float = 0.0) -> None:
+        """Raise if the next deadline has passed, or will have after ``delay`` seconds."""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= delay:
+            raise self.expired()
+
+    def caused(self, error: BaseException) -> bool:
+        """Return whether ``error`` is an httpx timeout set off by a deadline rather than the client's timeout."""
+        remaining = self.remaining()
+        return isinstance(error, httpx.TimeoutException) and remaining is not None and remaining <= TIMER_SLACK
+
+    def chunk_received(self) -> None:
+        """Record a chunk, raising if it arrived after a deadline."""
+        self.check()
+        self.last_chunk = time.monotonic()
+
+    def start_body(self) -> None:
+        """Record that the response headers arrived, from which the ``idle`` deadline counts."""
+        self.body_started = time.monotonic()
+        wakeup = self._wakeup
+        if wakeup is not None and not wakeup.done():
+            wakeup.set_result(None)
+
+    def apply(self, request: httpx.Request) -> None:
+        """Cap every socket timeout of ``request`` to the time left until the next deadline."""
+        remaining = self.remaining()
+        if remaining is None:
+            return
+        timeouts = request.extensions.get("timeout", {})
+        request.extensions["timeout"] = {
+            phase: remaining if value is None else min(value, remaining) for phase, value in timeouts.items()
+        }
+
+    def apply_to_body(self, request: httpx.Request) -> None:
+        """Cap the socket timeouts used to read the streamed body of ``request``, which starts now.
+
+        httpx reads the timeouts once for the whole body, so with an ``idle`` deadline the read
+        timeout is capped to it, and to the time left until the ``total`` deadline. Any read
+        stalling for longer then times out as the deadline passes.
+        """
+        self.start_body()
+        deadlines = self.deadlines
+        if deadlines.idle is None:
+            self.apply(request)
+            return
+        limit = deadlines.idle
+        if deadlines.total is not None:
+            limit = min(limit, max(0.0, self.started + deadlines.total - time.monotonic()))
+        timeouts = dict(request.extensions.get("timeout", {}))
+        read = timeouts.get("read")
+        timeouts["read"] = limit if read is None else min(read, limit)
+        request.extensions["timeout"] = timeouts
+
+
+def iter_with_deadline(iterator: Iterator[T], tracker: DeadlineTracker) -> Iterator[T]:
+    """Yield the chunks of a sync stream, raising once a deadline passes.
+
+    Socket timeouts raised by httpx after a deadline are turned into the deadline's error.
+    """
+    try:
+        for item in iterator:
+            tracker.chunk_received()
+            yield item
+    except httpx.TimeoutException as exc:
+        if not tracker.caused(exc):
+            raise
+        raise tracker.expired() from exc
+
+
+async def wait_with_deadline(awaitable: Awaitable[T], tracker: DeadlineTracker) -> T:
+    """Await ``awaitable``, cancelling it once a deadline passes.
+
+    The wait is rearmed when the body starts during it, since the idle deadline then counts.
+    """
+    task = asyncio.ensure_future(awaitable)
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            tracker._wakeup = wakeup = loop.create_future()
+            done, _ = await asyncio.wait(
+                (task, wakeup), timeout=tracker.remaining(), return_when=asyncio.FIRST_COMPLETED
+            )
+            if task in done:
+                return task.result()
+            if wakeup not in done:
+                raise tracker.expired()
+    finally:
+        tracker._wakeup = None
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+async def aiter_with_deadline(iterator: AsyncIterator[T], tracker: DeadlineTracker) -> AsyncGenerator[T, None]:
+    """Yield the chunks of an async stream, interrupting the wait for a chunk once a deadline passes."""
+    while True:
+        try:
+            item = await wait_with_deadline(iterator.__anext__(), tracker)
+        except StopAsyncIteration:
+            return
+        tracker.chunk_received()
+        yield item
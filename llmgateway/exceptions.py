@@ -0,0 +1,69 @@
+"""Exceptions raised by the LLMGateway client."""
+
+
+class LLMGatewayError(Exception):
+    """Base class for errors raised by the client itself."""
+
+
+class CircuitOpenError(LLMGatewayError):
+    """Raised without sending a request while the circuit for an endpoint is open."""
+
+    def __init__(self, endpoint: str, retry_in: float) -> None:
+        """Initialize the error.
+
+        Args:
+            endpoint: The endpoint whose circuit is open
+            retry_in: Seconds until a trial request will be allowed
+        """
+        super().__init__(f"Circuit open for {endpoint}, retry in {retry_in:.1f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class SlowConsumerError(LLMGatewayError):
+    """Raised by a stream tee consumer that fell too far behind and was detached."""
+
+    def __init__(self, buffer_size: int) -> None:
+        """Initialize the error.
+
+        Args:
+            buffer_size: The number of items the consumer was allowed to fall behind
+        """
+        super().__init__(f"Consumer fell {buffer_size} items behind the stream and was detached")
+        self.buffer_size = buffer_size
+
+
+class DeadlineExceededError(LLMGatewayError, TimeoutError):
+    """Base class for errors raised when a per-request deadline passes.
+
+    The request is abandoned and its connection released before the error is raised.
+    """
+
+    message = "Deadline of {limit}s exceeded"
+
+    def __init__(self, limit: float) -> None:
+        """Initialize the error.
+
+        Args:
+            limit: The limit that was exceeded, in seconds
+        """
+        super().__init__(self.message.format(limit=limit))
+        self.limit = limit
+
+
+class FirstChunkTimeoutError(DeadlineExceededError):
+    """Raised when the first chunk, or the response when not streaming, takes too long."""
+
+    message = "No first chunk within {limit}s"
+
+
+class IdleTimeoutError(DeadlineExceededError):
+    """Raised when a stream goes too long without a chunk."""
+
+    message = "No chunk for {limit}s"
+
+
+class TotalTimeoutError(DeadlineExceededError):
+    """Raised when a call takes too long in total."""
+
+    message = "Call not finished within {limit}s"
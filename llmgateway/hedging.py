@@ -0,0 +1,143 @@
+"""Hedged requests to cut tail latency."""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class HedgingPolicy:
+    """When to send a second, identical request while the first one is slow.
+
+    The hedge delay is either fixed or the ``percentile`` of recently observed latencies, so
+    only the slowest requests are hedged. ``max_hedge_rate`` caps hedges to a fraction of all
+    requests, bounding the extra load and cost. The counters show how many hedges were sent
+    and how many of them beat the original request.
+
+    Attributes:
+        requests: Number of hedgeable requests sent
+        hedges_sent: Number of hedge requests sent
+        hedges_won: Number of hedge requests that answered first
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: float = 0.95,
+        max_hedge_rate: float = 0.1,
+        min_samples: int = 20,
+        window: int = 1000,
+        initial_delay: float = 1.0,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+            delay: Fixed hedge delay in seconds, or None to derive it from observed latencies
+            percentile: Latency percentile used as the hedge delay, between 0 and 1
+            max_hedge_rate: Maximum fraction of requests that may be hedged
+            min_samples: Latencies to observe before the percentile is trusted
+            window: Number of recent latencies kept
+            initial_delay: Hedge delay used until ``min_samples`` latencies are observed
+        """
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self.fixed_delay = delay
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    @property
+    def delay(self) -> float:
+        """Seconds to wait for the first response before hedging."""
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)]
+
+    @property
+    def hedge_rate(self) -> float:
+        """Fraction of requests that were hedged."""
+        with self._lock:
+            return self.hedges_sent / self.requests if self.requests else 0.0
+
+    def record_request(self) -> None:
+        """Count a hedgeable request towards the hedge rate cap."""
+        with self._lock:
+            self.requests += 1
+
+    def record_win(self) -> None:
+        """Count a hedge request that answered first."""
+        with self._lock:
+            self.hedges_won += 1
+
+    def record_latency(self, latency: float) -> None:
+        """Record the latency of a completed request."""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def try_hedge(self) -> bool:
+        """Claim a hedge if the hedge rate cap allows one.
+
+        Returns:
+            Whether a hedge request may be sent
+        """
+        with self._lock:
+            if self.hedges_sent + 1 > self.max_hedge_rate * self.requests:
+                return False
+            self.hedges_sent += 1
+            return True
+
+
+async def hedged(call: Callable[[], Awaitable[T]], policy: HedgingPolicy) -> T:
+    """Run ``call``, sending an identical second call if the first is slower than the hedge delay.
+
+    The first successful result wins and the other call is cancelled, which closes its
+    connection. If one call fails, the other one is still awaited.
+
+    Args:
+        call: Coroutine function making one request
+        policy: The hedging policy
+
+    Returns:
+        The result of the first call to succeed
+    """
+    policy.record_request()
+    start = time.monotonic()
+    primary = asyncio.ensure_future(call())
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=policy.delay)
+        if not done and policy.try_hedge():
+            tasks.add(asyncio.ensure_future(call()))
+        while True:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                tasks.discard(task)
+                if task.exception() is None or not tasks:
+                    if task is not primary and task.exception() is None:
+                        policy.record_win()
+                    result = task.result()
+                    policy.record_latency(time.monotonic() - start)
+                    return result
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+            for task in tasks:
+                if not task.cancelled():
+                    task.exception()
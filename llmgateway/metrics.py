@@ -0,0 +1,298 @@
+"""Per-request latency instrumentation."""
+
+import math
+import threading
+import time
+from typing import Any, Optional
+
+CONNECT_STARTED = "connection.connect_tcp.started"
+CONNECT_COMPLETE = ("connection.connect_tcp.complete", "connection.start_tls.complete")
+SEND_HEADERS_STARTED = ("http11.send_request_headers.started", "http2.send_request_headers.started")
+HEADERS_RECEIVED = ("http11.receive_response_headers.complete", "http2.receive_response_headers.complete")
+
+
+class RequestTiming:
+    """Timings of one call to the gateway, in seconds.
+
+    Connection phases come from httpcore trace events and describe the last attempt.
+    ``pool_wait`` is the time from the start of the attempt until a connection was being
+    opened or a pooled one was used; ``connect`` is the TCP and TLS setup time, and is None
+    when a pooled connection was reused.
+
+    Attributes:
+        method: HTTP method
+        endpoint: Request path
+        stream: Whether the response body was streamed
+        status_code: Response status, or None if no response was received
+        error: Name of the exception raised, if any
+        attempts: Number of attempts made, including retries
+        pool_wait: Time waiting for a connection from the pool
+        connect: Time to open a new connection
+        time_to_headers: Time from the start of the attempt to the response headers
+        time_to_first_chunk: Time from the start of the call to the first streamed chunk
+        chunk_gaps: Time between consecutive streamed chunks
+        chunks: Number of streamed chunks
+        total: Time from the start of the call until the response was fully consumed
+    """
+
+    def __init__(self, method: str, endpoint: str, stream: bool = False) -> None:
+        """Start timing a call."""
+        self.method = method
+        self.endpoint = endpoint
+        self.stream = stream
+        self.status_code: Optional[int] = None
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.pool_wait: Optional[float] = None
+        self.connect: Optional[float] = None
+        self.time_to_headers: Optional[float] = None
+        self.time_to_first_chunk: Optional[float] = None
+        self.chunk_gaps: list[float] = []
+        self.chunks = 0
+        self.total: Optional[float] = None
+        self.started_at = time.perf_counter()
+        self._attempt_started_at = self.started_at
+        self._connect_started_at: Optional[float] = None
+        self._last_chunk_at: Optional[float] = None
+
+    @property
+    def chunks_per_second(self) -> Optional[float]:
+        """Streamed chunks per second after the first chunk."""
+        if self.chunks < 2 or self.total is None or self.time_to_first_chunk is None:
+            return None
+        elapsed = self.total - self.time_to_first_chunk
+        return (self.chunks - 1) / elapsed if elapsed > 0 else None
+
+    def start_attempt(self) -> None:
+        """Mark the start of an attempt, resetting the connection phases."""
+        self.attempts += 1
+        self._attempt_started_at = time.perf_counter()
+        self._connect_started_at = None
+        self.pool_wait = self.connect = self.time_to_headers = None
+
+    def trace(self, event: str, info: dict[str, Any]) -> None:
+        """Record an httpcore trace event; passed as the ``trace`` request extension."""
+        now = time.perf_counter()
+        if event == CONNECT_STARTED:
+            self._connect_started_at = now
+            if self.pool_wait is None:
+                self.pool_wait = now - self._attempt_started_at
+        elif event in CONNECT_COMPLETE:
+            if self._connect_started_at is not None:
+                self.connect = now - self._connect_started_at
+        elif event in SEND_HEADERS_STARTED:
+            if self.pool_wait is None:
+                self.pool_wait = now - self._attempt_started_at
+        elif event in HEADERS_RECEIVED:
+            self.time_to_headers = now - self._attempt_started_at
+
+    async def atrace(self, event: str, info: dict[str, Any]) -> None:
+        """Async version of trace, for the async client."""
+        self.trace(event, info)
+
+    def response_received(self, status_code: int) -> None:
+        """Record the response status of the current attempt."""
+        self.status_code = status_code
+        if self.time_to_headers is None:
+            self.time_to_headers = time.perf_counter() - self._attempt_started_at
+
+    def chunk_received(self) -> None:
+        """Record the arrival of a streamed chunk."""
+        now = time.perf_counter()
+        if self._last_chunk_at is None:
+            self.time_to_first_chunk = now - self.started_at
+        else:
+            self.chunk_gaps.append(now - self._last_chunk_at)
+        self._last_chunk_at = now
+        self.chunks += 1
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Mark the end of the call."""
+        self.total = time.perf_counter() - self.started_at
+        if error is not None:
+            self.error = type(error).__name__
+
+
+class Instrumentation:
+    """Hooks called by the client for every request.
+
+    Subclass and override :meth:`on_request_end` to export timings elsewhere.
+    """
+
+    def on_request_end(self, timing: RequestTiming) -> None:
+        """Handle the timings of a finished call.
+
+        Args:
+            timing: The timings of the call
+        """
+
+
+class Histogram:
+    """Log-bucketed histogram with bounded memory.
+
+    Values are counted in buckets growing geometrically by ``precision``, so percentiles are
+    accurate to within that relative error regardless of how many values are recorded.
+    """
+
+    def __init__(self, precision: float = 0.02, min_value: float = 1e-6) -> None:
+        """Initialize an empty histogram.
+
+        Args:
+            precision: Relative width of each bucket
+            min_value: Smallest value distinguished from zero
+        """
+        self.min_value = min_value
+        self._log_base = math.log1p(precision)
+        self._buckets: dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        """Record a value."""
+        index = -1 if value < self.min_value else int(math.log(value / self.min_value) / self._log_base)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        """Mean of the recorded values."""
+        return self.sum / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Return the value below which a fraction ``p`` of recorded values fall.
+
+        Args:
+            p: The percentile, between 0 and 1
+
+        Returns:
+            The estimated value, or 0 if nothing was recorded
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(p * self.count))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                if index < 0:
+                    return 0.0
+                return min(self.max, self.min_value * math.exp((index + 1) * self._log_base))
+        return self.max
+
+
+class MetricsRecorder(Instrumentation):
+    """In-memory histograms of request timings, per endpoint.
+
+    Recorded metrics are ``total``, ``pool_wait``, ``connect``, ``time_to_headers``,
+    ``time_to_first_chunk``, ``chunk_gap`` and ``chunks_per_second``.
+    """
+
+    PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+    def __init__(self) -> None:
+        """Initialize with no recorded values."""
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        self.errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def on_request_end(self, timing: RequestTiming) -> None:
+        """Record the timings of a finished call."""
+        values = {
+            "total": timing.total,
+            "pool_wait": timing.pool_wait,
+            "connect": timing.connect,
+            "time_to_headers": timing.time_to_headers,
+            "time_to_first_chunk": timing.time_to_first_chunk,
+            "chunks_per_second": timing.chunks_per_second,
+        }
+        with self._lock:
+            for name, value in values.items():
+                if value is not None:
+                    self._histogram(name, timing.endpoint).record(value)
+            for gap in timing.chunk_gaps:
+                self._histogram("chunk_gap", timing.endpoint).record(gap)
+            if timing.error is not None or (timing.status_code is not None and timing.status_code >= 400):
+                self.errors[timing.endpoint] = self.errors.get(timing.endpoint, 0) + 1
+
+    def histogram(self, metric: str, endpoint: str) -> Optional[Histogram]:
+        """Return the histogram of ``metric`` for ``endpoint``, if anything was recorded."""
+        return self.histograms.get((metric, endpoint))
+
+    def export(self) -> dict[str, dict[str, dict[str, float]]]:
+        """Export count, mean, max and percentiles of every metric.
+
+        Returns:
+            Summaries keyed by endpoint, then by metric
+        """
+        summary: dict[str, dict[str, dict[str, float]]] = {}
+        with self._lock:
+            for (metric, endpoint), histogram in sorted(self.histograms.items()):
+                stats = {"count": float(histogram.count), "mean": histogram.mean, "max": histogram.max}
+                for p in self.PERCENTILES:
+                    stats[f"p{round(p * 100)}"] = histogram.percentile(p)
+                summary.setdefault(endpoint, {})[metric] = stats
+        return summary
+
+    def reset(self) -> None:
+        """Drop all recorded values."""
+        with self._lock:
+            self.histograms.clear()
+            self.errors.clear()
+
+    def _histogram(self, metric: str, endpoint: str) -> Histogram:
+        key = (metric, endpoint)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        return histogram
+
+
+class OpenTelemetryInstrumentation(Instrumentation):
+    """Export request timings as OpenTelemetry histograms.
+
+    Requires the ``opentelemetry-api`` package. Durations are recorded in seconds under
+    ``llmgateway.client.<metric>`` with the method, endpoint and status code as attributes.
+    """
+
+    def __init__(self, meter: Optional[Any] = None) -> None:
+        """Initialize the instrumentation.
+
+        Args:
+            meter: OpenTelemetry meter to use, defaults to the global ``llmgateway`` meter
+        """
+        if meter is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError as exc:
+                raise ImportError(
+                    "OpenTelemetry instrumentation requires the 'opentelemetry-api' package: "
+                    "pip install 'llmgateway-sdk[otel]'"
+                ) from exc
+            meter = metrics.get_meter("llmgateway")
+        self.meter = meter
+        self._instruments: dict[str, Any] = {}
+
+    def on_request_end(self, timing: RequestTiming) -> None:
+        """Record the timings of a finished call."""
+        attributes: dict[str, Any] = {"http.request.method": timing.method, "url.path": timing.endpoint}
+        if timing.status_code is not None:
+            attributes["http.response.status_code"] = timing.status_code
+        if timing.error is not None:
+            attributes["error.type"] = timing.error
+        for name in ("total", "pool_wait", "connect", "time_to_headers", "time_to_first_chunk"):
+            value = getattr(timing, name)
+            if value is not None:
+                self._instrument(name, "s").record(value, attributes)
+        for gap in timing.chunk_gaps:
+            self._instrument("chunk_gap", "s").record(gap, attributes)
+        if timing.chunks_per_second is not None:
+            self._instrument("chunks_per_second", "{chunk}/s").record(timing.chunks_per_second, attributes)
+
+    def _instrument(self, name: str, unit: str) -> Any:
+        instrument = self._instruments.get(name)
+        if instrument is None:
+            instrument = self._instruments[name] = self.meter.create_histogram(f"llmgateway.client.{name}", unit=unit)
+        return instrument
@@ -0,0 +1,185 @@
+"""Lazy, low-memory view of a ``/v1/models`` response."""
+
+import json
+import re
+from collections.abc import Iterator, Sequence
+from typing import Any, Callable, Optional, Union, overload
+
+from .models import Model
+from .serialization import Serializer
+
+ModelFilter = Callable[[dict[str, Any]], bool]
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+def _skip(text: str, pos: int) -> int:
+    """Return the position of the first non-whitespace character from ``pos``."""
+    match = _whitespace.match(text, pos)
+    assert match is not None
+    return match.end()
+
+
+def _expect(text: str, pos: int, char: str) -> int:
+    """Check that ``text`` has ``char`` at ``pos`` and return the position after it and any whitespace."""
+    if text[pos : pos + 1] != char:
+        raise ValueError(f"Invalid /v1/models response: expected {char!r} at position {pos}")
+    return _skip(text, pos + 1)
+
+
+def iter_model_spans(text: str) -> Iterator[tuple[int, int, Any]]:
+    """Walk the ``data`` array of a ``/v1/models`` response one entry at a time.
+
+    Only one entry is decoded at a time, so the whole response never exists as Python
+    objects at once.
+
+    Args:
+        text: The response body
+
+    Yields:
+        The start and end position of each entry in ``text`` and the decoded entry
+    """
+    pos = _expect(text, _skip(text, 0), "{")
+    found = False
+    while text[pos : pos + 1] != "}":
+        key, pos = _decoder.raw_decode(text, pos)
+        pos = _expect(text, _skip(text, pos), ":")
+        if key == "data":
+            found = True
+            pos = _expect(text, pos, "[")
+            while text[pos : pos + 1] != "]":
+                value, end = _decoder.raw_decode(text, pos)
+                yield pos, end, value
+                pos = _skip(text, end)
+                if text[pos : pos + 1] == ",":
+                    pos = _skip(text, pos + 1)
+            pos = _skip(text, pos + 1)
+        else:
+            pos = _skip(text, _decoder.raw_decode(text, pos)[1])
+        if text[pos : pos + 1] == ",":
+            pos = _skip(text, pos + 1)
+        elif text[pos : pos + 1] != "}":
+            raise ValueError(f"Invalid /v1/models response: expected ',' or '}}' at position {pos}")
+    if not found:
+        raise ValueError("Invalid /v1/models response: missing 'data'")
+
+
+def project(entry: dict[str, Any], field: str) -> Any:
+    """Return the value of a dotted ``field`` path in a raw model entry, or None if missing."""
+    value: Any = entry
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class LazyModelList(Sequence[Model]):
+    """Models of a ``/v1/models`` response, validated only when accessed.
+
+    Each model is kept as its raw JSON text and validated into a :class:`Model` on first
+    access, so a large catalog costs about the size of its body instead of a tree of
+    pydantic objects. ``where`` drops entries while parsing, and the ``fields`` given are
+    extracted into columns that can be read without validating any model.
+
+    Attributes:
+        ids: Model ids, in API order
+        fields: The projected fields
+    """
+
+    def __init__(
+        self,
+        data: Union[bytes, str],
+        *,
+        where: Optional[ModelFilter] = None,
+        fields: Sequence[str] = (),
+        serializer: Optional[Serializer] = None,
+    ) -> None:
+        """Parse a ``/v1/models`` response body.
+
+        Args:
+            data: The response body
+            where: Predicate on the raw JSON entry of each model; entries it rejects are dropped
+            fields: Fields to extract into columns, with dots for nested fields such as
+                ``pricing.prompt``
+            serializer: Serializer validating the models, defaults to the pydantic backend
+
+        Raises:
+            ValueError: If the body is not a valid ``/v1/models`` response
+        """
+        text = data.decode() if isinstance(data, bytes) else data
+        self.fields = tuple(fields)
+        self.ids: list[str] = []
+        self._raw: list[str] = []
+        self._columns: dict[str, list[Any]] = {field: [] for field in self.fields}
+        self._serializer = serializer or Serializer()
+        for start, end, entry in iter_model_spans(text):
+            if not isinstance(entry, dict) or not isinstance(entry.get("id"), str):
+                raise ValueError(f"Invalid /v1/models response: entry at position {start} has no id")
+            if where is not None and not where(entry):
+                continue
+            self.ids.append(entry["id"])
+            self._raw.append(text[start:end])
+            for field, column in self._columns.items():
+                column.append(project(entry, field))
+        self._models: list[Optional[Model]] = [None] * len(self.ids)
+        self._index = {model_id: i for i, model_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        """Return the number of models."""
+        return len(self.ids)
+
+    @overload
+    def __getitem__(self, index: int) -> Model: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Model]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Model, list[Model]]:
+        """Return the model at ``index``, validating it on first access."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        model = self._models[index]
+        if model is None:
+            model = self._models[index] = self._serializer.loads(Model, self._raw[index])
+        return model
+
+    def __contains__(self, value: object) -> bool:
+        """Return whether ``value`` is one of the models, validating only the one sharing its id."""
+        if not isinstance(value, Model):
+            return False
+        index = self._index.get(value.id)
+        return index is not None and self[index] == value
+
+    def has(self, model_id: str) -> bool:
+        """Return whether a model with the given id is in the list, without validating it."""
+        return model_id in self._index
+
+    def get(self, model_id: str) -> Optional[Model]:
+        """Return the model with the given id, if any."""
+        index = self._index.get(model_id)
+        return None if index is None else self[index]
+
+    def raw(self, model_id: str) -> Optional[str]:
+        """Return the raw JSON of the model with the given id, if any."""
+        index = self._index.get(model_id)
+        return None if index is None else self._raw[index]
+
+    def column(self, field: str) -> list[Any]:
+        """Return the values of a projected field, in model order.
+
+        Raises:
+            ValueError: If ``field`` was not projected
+        """
+        if field == "id":
+            return self.ids
+        try:
+            return self._columns[field]
+        except KeyError:
+            raise ValueError(f"Field {field!r} was not projected; pass it in fields") from None
+
+    def rows(self) -> list[dict[str, Any]]:
+        """Return the id and projected fields of every model as dictionaries."""
+        columns = {"id": self.ids, **self._columns}
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
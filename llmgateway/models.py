@@ -2,23 +2,29 @@
 
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
-class Message(BaseModel):
+class DeferredModel(BaseModel):
+    """Base model whose validator and serializer are built on first use instead of at import."""
+
+    model_config = ConfigDict(defer_build=True)
+
+
+class Message(DeferredModel):
     """A message in a chat conversation."""
 
     role: str
     content: str
 
 
-class ResponseFormat(BaseModel):
+class ResponseFormat(DeferredModel):
     """Response format configuration."""
 
     type: str = Field(pattern="^(text|json_object)$")
 
 
-class ChatCompletionRequest(BaseModel):
+class ChatCompletionRequest(DeferredModel):
     """Request model for chat completions."""
 
     model: str
@@ -32,19 +38,19 @@ class ChatCompletionRequest(BaseModel):
     stream: bool = False
 
 
-class ChatCompletionResponse(BaseModel):
+class ChatCompletionResponse(DeferredModel):
     """Response model for chat completions."""
 
     message: str
 
 
-class ErrorResponse(BaseModel):
+class ErrorResponse(DeferredModel):
     """Error response model."""
 
     error: dict[str, Any]
 
 
-class Architecture(BaseModel):
+class Architecture(DeferredModel):
     """Model architecture information."""
 
     input_modalities: list[str]
@@ -52,13 +58,13 @@ class Architecture(BaseModel):
     tokenizer: Optional[str] = None
 
 
-class TopProvider(BaseModel):
+class TopProvider(DeferredModel):
     """Top provider information."""
 
     is_moderated: bool
 
 
-class ProviderPricing(BaseModel):
+class ProviderPricing(DeferredModel):
     """Provider pricing information."""
 
     prompt: str
@@ -66,7 +72,7 @@ class ProviderPricing(BaseModel):
     image: Optional[str] = None
 
 
-class Provider(BaseModel):
+class Provider(DeferredModel):
     """Provider information."""
 
     providerId: str
@@ -74,7 +80,7 @@ class Provider(BaseModel):
     pricing: ProviderPricing
 
 
-class ModelPricing(BaseModel):
+class ModelPricing(DeferredModel):
     """Model pricing information."""
 
     prompt: str
@@ -87,7 +93,7 @@ class ModelPricing(BaseModel):
     internal_reasoning: Optional[str] = None
 
 
-class Model(BaseModel):
+class Model(DeferredModel):
     """Model information."""
 
     id: str
@@ -104,7 +110,7 @@ class Model(BaseModel):
     supported_parameters: Optional[list[str]] = None
 
 
-class ModelList(BaseModel):
+class ModelList(DeferredModel):
     """List of available models."""
 
     data: list[Model]
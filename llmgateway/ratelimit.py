@@ -0,0 +1,171 @@
+"""Client-side rate limiting by requests per second and tokens per minute."""
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+from .models import ChatCompletionRequest
+from .templates import TemplatedRequest
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of polling.
+
+    Callers reserve what they need up front and the bucket level may go negative; each
+    caller is told how long to wait until its reservation is covered. Reservations are
+    served strictly in arrival order, so waiting is fair and nobody spins.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initialize the bucket, starting full.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens the bucket holds, i.e. the allowed burst
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._level = capacity
+        self._updated_at = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Reserve ``amount`` tokens.
+
+        Not thread-safe on its own; callers must serialize calls.
+
+        Args:
+            amount: Number of tokens to take
+            now: The current ``time.monotonic()``
+
+        Returns:
+            Seconds to wait before the reservation is covered
+        """
+        self._level = min(self.capacity, self._level + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        self._level -= amount
+        return 0.0 if self._level >= 0 else -self._level / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Return ``amount`` tokens of a reservation that will not be used.
+
+        Not thread-safe on its own; callers must serialize calls.
+        """
+        self._level += amount
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available, negative while reservations are queued."""
+        return min(self.capacity, self._level + (time.monotonic() - self._updated_at) * self.rate)
+
+
+class RateLimiter:
+    """Request and token budget shared by every task and thread using it.
+
+    Each request takes one unit from the request bucket and its estimated token count from
+    the token bucket. Estimates are the prompt length divided by ``chars_per_token`` plus
+    ``max_tokens`` (or ``default_completion_tokens`` when the request does not set it).
+    One limiter can be shared by several clients using the same API key.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        request_burst: Optional[float] = None,
+        token_burst: Optional[float] = None,
+        chars_per_token: float = 4.0,
+        default_completion_tokens: int = 256,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            requests_per_second: Sustained request rate, or None for no request limit
+            tokens_per_minute: Sustained token rate, or None for no token limit
+            request_burst: Requests allowed in a burst, defaults to one second's worth
+            token_burst: Tokens allowed in a burst, defaults to one minute's worth
+            chars_per_token: Characters per token used to estimate prompt size
+            default_completion_tokens: Completion size assumed when ``max_tokens`` is not set
+        """
+        self.requests = (
+            None
+            if requests_per_second is None
+            else TokenBucket(requests_per_second, request_burst or max(requests_per_second, 1.0))
+        )
+        self.tokens = (
+            None if tokens_per_minute is None else TokenBucket(tokens_per_minute / 60, token_burst or tokens_per_minute)
+        )
+        self.chars_per_token = chars_per_token
+        self.default_completion_tokens = default_completion_tokens
+        self._lock = threading.Lock()
+
+    def estimate_tokens(self, request: ChatCompletionRequest) -> int:
+        """Estimate the tokens a request will consume.
+
+        Args:
+            request: The chat completion request
+
+        Returns:
+            Estimated prompt plus completion tokens
+        """
+        template = request.template if isinstance(request, TemplatedRequest) else None
+        if template is not None:
+            tail = request.messages[len(template.messages) :]
+            prompt_chars = template.prefix_chars + sum(len(message.content) for message in tail)
+        else:
+            prompt_chars = sum(len(message.content) for message in request.messages)
+        completion = request.max_tokens if request.max_tokens is not None else self.default_completion_tokens
+        return int(prompt_chars / self.chars_per_token) + completion
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve budget for one request.
+
+        Args:
+            tokens: Estimated tokens the request will consume
+
+        Returns:
+            Seconds to wait before sending the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self.requests is not None:
+                wait = self.requests.reserve(1, now)
+            if self.tokens is not None and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+            return wait
+
+    def refund(self, tokens: int = 0) -> None:
+        """Give back a reservation made by ``reserve`` for a request that will not be sent.
+
+        Args:
+            tokens: Estimated tokens passed to ``reserve``
+        """
+        with self._lock:
+            if self.requests is not None:
+                self.requests.refund(1)
+            if self.tokens is not None and tokens:
+                self.tokens.refund(tokens)
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until one request of ``tokens`` estimated tokens may be sent."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            except BaseException:
+                self.refund(tokens)
+                raise
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """Async version of acquire."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                # A cancelled waiter must not hold on to its place in the budget
+                self.refund(tokens)
+                raise
@@ -0,0 +1,191 @@
+"""Retry policies and circuit breaking for requests to the gateway."""
+
+import random
+import threading
+import time
+from collections.abc import Collection
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from .exceptions import CircuitOpenError
+
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header.
+
+    Args:
+        value: The header value, either delay seconds or an HTTP date
+
+    Returns:
+        The delay in seconds, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """When and how long to wait before retrying a failed request.
+
+    Delays grow exponentially from ``backoff_base`` up to ``backoff_max`` and use "full
+    jitter" (a uniform draw between zero and the exponential delay) so that many clients
+    failing together do not retry in lockstep. A ``Retry-After`` header from the gateway
+    takes precedence over the computed delay. No retry is attempted if it would end after
+    the ``deadline`` measured from the first attempt.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        jitter: bool = True,
+        deadline: Optional[float] = None,
+        retry_statuses: Collection[int] = RETRYABLE_STATUSES,
+        retry_exceptions: tuple[type[Exception], ...] = (httpx.TransportError,),
+        respect_retry_after: bool = True,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+            max_attempts: Maximum number of attempts, including the first one
+            backoff_base: Delay before the first retry, in seconds
+            backoff_max: Maximum delay between attempts, in seconds
+            jitter: Randomize delays with full jitter
+            deadline: Total time budget for all attempts, in seconds
+            retry_statuses: Response status codes that are retried
+            retry_exceptions: Exception types that are retried
+            respect_retry_after: Wait as long as the ``Retry-After`` header asks
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = retry_exceptions
+        self.respect_retry_after = respect_retry_after
+
+    def backoff(self, attempt: int) -> float:
+        """Return the delay before the retry following ``attempt``.
+
+        Args:
+            attempt: Number of attempts made so far, starting at 1
+
+        Returns:
+            The delay in seconds
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def next_delay(
+        self,
+        attempt: int,
+        elapsed: float,
+        response: Optional[httpx.Response] = None,
+        error: Optional[Exception] = None,
+    ) -> Optional[float]:
+        """Decide whether to retry after a failed attempt.
+
+        Args:
+            attempt: Number of attempts made so far, starting at 1
+            elapsed: Seconds since the first attempt started
+            response: The failed response, if one was received
+            error: The exception raised, if no response was received
+
+        Returns:
+            Seconds to wait before the next attempt, or None to give up
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if response is not None:
+            if response.status_code not in self.retry_statuses:
+                return None
+        elif not isinstance(error, self.retry_exceptions):
+            return None
+
+        delay = self.backoff(attempt)
+        if response is not None and self.respect_retry_after:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                delay = retry_after
+        if self.deadline is not None and elapsed + delay >= self.deadline:
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit for an endpoint opens and
+    requests to it fail fast with :class:`CircuitOpenError`. Once ``recovery_timeout`` has
+    passed a single trial request is let through: success closes the circuit, failure opens
+    it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0) -> None:
+        """Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds the circuit stays open before a trial request
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures: dict[str, int] = {}
+        self._opened_at: dict[str, float] = {}
+        self._trial_in_flight: set[str] = set()
+        self._lock = threading.Lock()
+
+    def is_open(self, endpoint: str) -> bool:
+        """Return whether the circuit for ``endpoint`` is open."""
+        return endpoint in self._opened_at
+
+    def before_request(self, endpoint: str) -> None:
+        """Check that a request to ``endpoint`` may be sent.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and no trial request is due
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(endpoint)
+            if opened_at is None:
+                return
+            retry_in = opened_at + self.recovery_timeout - time.monotonic()
+            if retry_in > 0 or endpoint in self._trial_in_flight:
+                raise CircuitOpenError(endpoint, max(retry_in, 0.0))
+            self._trial_in_flight.add(endpoint)
+
+    def record_success(self, endpoint: str) -> None:
+        """Record a successful request to ``endpoint``."""
+        with self._lock:
+            self._failures.pop(endpoint, None)
+            self._opened_at.pop(endpoint, None)
+            self._trial_in_flight.discard(endpoint)
+
+    def release(self, endpoint: str) -> None:
+        """Forget a trial request to ``endpoint`` that ended without an outcome, e.g. on cancellation."""
+        with self._lock:
+            self._trial_in_flight.discard(endpoint)
+
+    def record_failure(self, endpoint: str) -> None:
+        """Record a failed request to ``endpoint``."""
+        with self._lock:
+            failures = self._failures.get(endpoint, 0) + 1
+            self._failures[endpoint] = failures
+            if failures >= self.failure_threshold or endpoint in self._trial_in_flight:
+                self._opened_at[endpoint] = time.monotonic()
+            self._trial_in_flight.discard(endpoint)
@@ -0,0 +1,193 @@
+"""Priority scheduling of async calls sharing one concurrency budget."""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Mapping
+from typing import Optional
+
+from .metrics import Histogram
+
+DEFAULT_WEIGHTS = {"interactive": 8.0, "bulk": 1.0}
+
+
+class PriorityClass:
+    """Queue and counters of one priority class.
+
+    Attributes:
+        name: Name of the class
+        weight: Share of the capacity the class gets when every class is busy
+        reserved: Slots only this class may use
+        in_flight: Calls of the class holding a slot
+        granted: Calls of the class granted a slot so far
+        queue_wait: Seconds each call waited for its slot
+    """
+
+    __slots__ = ("name", "weight", "reserved", "in_flight", "granted", "queue_wait", "waiters", "virtual_time")
+
+    def __init__(self, name: str, weight: float, reserved: int = 0) -> None:
+        """Initialize an empty class."""
+        self.name = name
+        self.weight = weight
+        self.reserved = reserved
+        self.in_flight = 0
+        self.granted = 0
+        self.queue_wait = Histogram()
+        self.waiters: deque[tuple[asyncio.Future[None], float]] = deque()
+        self.virtual_time = 0.0
+
+    @property
+    def queued(self) -> int:
+        """Calls of the class waiting for a slot."""
+        return len(self.waiters)
+
+
+class PriorityScheduler:
+    """Share ``capacity`` concurrent calls between priority classes with weighted fair queuing.
+
+    When calls of several classes are waiting, each class gets slots in proportion to its
+    weight, so bulk work keeps progressing without crowding out interactive calls. A class
+    may also reserve slots that other classes never use, so it finds capacity free at once
+    even while another class is saturating the client. Unused capacity of idle classes is
+    shared; a class coming back from idle does not get to catch up on the slots it missed.
+
+    The scheduler belongs to one event loop.
+
+    Attributes:
+        capacity: Maximum number of calls in flight across all classes
+        classes: The priority classes, by name
+        default: Class of calls made without a priority
+    """
+
+    PERCENTILES = (0.5, 0.9, 0.99)
+
+    def __init__(
+        self,
+        capacity: int,
+        weights: Optional[Mapping[str, float]] = None,
+        *,
+        reserved: Optional[Mapping[str, int]] = None,
+        default: Optional[str] = None,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            capacity: Maximum number of calls in flight across all classes
+            weights: Weight of each priority class, defaults to ``interactive`` 8 and ``bulk`` 1
+            reserved: Slots reserved for some classes
+            default: Class of calls made without a priority, defaults to the first class
+        """
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        reserved = reserved or {}
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not weights or any(weight <= 0 for weight in weights.values()):
+            raise ValueError("At least one class is required and weights must be positive")
+        if set(reserved) - set(weights):
+            raise ValueError(f"Unknown priority classes in reserved: {sorted(set(reserved) - set(weights))}")
+        if sum(reserved.values()) > capacity:
+            raise ValueError("Reserved slots exceed the capacity")
+        self.capacity = capacity
+        self.classes = {name: PriorityClass(name, weight, reserved.get(name, 0)) for name, weight in weights.items()}
+        self.default = next(iter(self.classes)) if default is None else default
+        if self.default not in self.classes:
+            raise ValueError(f"Unknown default priority class: {self.default!r}")
+        self._in_flight = 0
+        self._virtual_time = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        """Calls holding a slot, across all classes."""
+        return self._in_flight
+
+    async def acquire(self, priority: Optional[str] = None) -> None:
+        """Wait for a slot for a call of class ``priority``."""
+        cls = self._class(priority)
+        enqueued = time.monotonic()
+        if not cls.waiters:
+            # The class was idle: it starts at the current virtual time rather than its own
+            cls.virtual_time = max(cls.virtual_time, self._virtual_time)
+            if self._can_grant(cls) and not any(other.waiters for other in self.classes.values()):
+                self._grant(cls, enqueued)
+                return
+        waiter = asyncio.get_running_loop().create_future()
+        cls.waiters.append((waiter, enqueued))
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the caller was cancelled
+                self.release(cls.name)
+            else:
+                cls.waiters = deque(entry for entry in cls.waiters if entry[0] is not waiter)
+            raise
+
+    def release(self, priority: Optional[str] = None) -> None:
+        """Free the slot of a call of class ``priority`` and hand it to the next waiter."""
+        cls = self._class(priority)
+        cls.in_flight -= 1
+        self._in_flight -= 1
+        self._dispatch()
+
+    def export(self) -> dict[str, dict[str, float]]:
+        """Export the queue depth, slots in use and queue wait of every class.
+
+        Returns:
+            Metrics keyed by class, including the mean, max and percentiles of the queue wait
+        """
+        summary: dict[str, dict[str, float]] = {}
+        for name, cls in self.classes.items():
+            wait = cls.queue_wait
+            stats = {
+                "queued": float(cls.queued),
+                "in_flight": float(cls.in_flight),
+                "granted": float(cls.granted),
+                "wait_mean": wait.mean,
+                "wait_max": wait.max,
+            }
+            for p in self.PERCENTILES:
+                stats[f"wait_p{round(p * 100)}"] = wait.percentile(p)
+            summary[name] = stats
+        return summary
+
+    def _class(self, priority: Optional[str]) -> PriorityClass:
+        """Return the class named ``priority``, or the default class."""
+        try:
+            return self.classes[self.default if priority is None else priority]
+        except KeyError:
+            raise ValueError(f"Unknown priority class: {priority!r}") from None
+
+    def _can_grant(self, cls: PriorityClass) -> bool:
+        """Return whether a call of ``cls`` may take a slot now."""
+        free = self.capacity - self._in_flight
+        if free <= 0:
+            return False
+        if cls.in_flight < cls.reserved:
+            return True
+        unused_reserved = sum(
+            max(0, other.reserved - other.in_flight) for other in self.classes.values() if other is not cls
+        )
+        return free > unused_reserved
+
+    def _grant(self, cls: PriorityClass, enqueued: float) -> None:
+        """Give a slot to a call of ``cls`` and advance the class's virtual time."""
+        self._virtual_time = cls.virtual_time
+        cls.virtual_time += 1 / cls.weight
+        cls.in_flight += 1
+        cls.granted += 1
+        self._in_flight += 1
+        cls.queue_wait.record(time.monotonic() - enqueued)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting calls, the class furthest behind its share first."""
+        while True:
+            eligible = [cls for cls in self.classes.values() if cls.waiters and self._can_grant(cls)]
+            if not eligible:
+                return
+            cls = min(eligible, key=lambda cls: cls.virtual_time)
+            waiter, enqueued = cls.waiters.popleft()
+            if waiter.done():
+                continue
+            self._grant(cls, enqueued)
+            waiter.set_result(None)
@@ -0,0 +1,102 @@
+"""JSON serialization of request and response models straight to and from bytes."""
+
+import importlib.util
+from typing import Any, Literal, TypeVar, Union
+
+from pydantic import BaseModel, TypeAdapter
+
+from .models import Message
+from .templates import TemplatedRequest
+
+T = TypeVar("T")
+
+JSONBackend = Literal["pydantic", "orjson"]
+
+_type_adapters: dict[Any, TypeAdapter[Any]] = {}
+
+
+def get_type_adapter(tp: Any) -> TypeAdapter[Any]:
+    """Return a cached TypeAdapter for the given type.
+
+    Args:
+        tp: The type to build an adapter for
+
+    Returns:
+        The shared TypeAdapter instance for ``tp``
+    """
+    adapter = _type_adapters.get(tp)
+    if adapter is None:
+        adapter = _type_adapters[tp] = TypeAdapter(tp)
+    return adapter
+
+
+class Serializer:
+    """Encode request models to JSON bytes and validate responses from raw bytes.
+
+    The default ``pydantic`` backend uses cached TypeAdapters so that requests are encoded
+    by pydantic-core directly into bytes and responses are validated from the raw body in a
+    single pass, without an intermediate ``dict``. The ``orjson`` backend parses and encodes
+    with orjson instead, which can be faster on some payload shapes.
+    """
+
+    def __init__(self, backend: JSONBackend = "pydantic") -> None:
+        """Initialize the serializer.
+
+        Args:
+            backend: JSON backend to use, either ``pydantic`` or ``orjson``
+        """
+        if backend not in ("pydantic", "orjson"):
+            raise ValueError(f"Unknown JSON backend: {backend!r}")
+        if backend == "orjson" and importlib.util.find_spec("orjson") is None:
+            raise ImportError("The orjson backend requires the 'orjson' package: pip install 'llmgateway-sdk[orjson]'")
+        self.backend = backend
+
+    def dumps(self, model: BaseModel) -> bytes:
+        """Encode a model as JSON bytes, leaving out ``None`` fields.
+
+        Args:
+            model: The model to encode
+
+        Returns:
+            The JSON body
+        """
+        if isinstance(model, TemplatedRequest) and model.template is not None:
+            return self._dumps_templated(model)
+        if self.backend == "orjson":
+            import orjson
+
+            return orjson.dumps(model.model_dump(exclude_none=True))
+        return get_type_adapter(type(model)).dump_json(model, exclude_none=True)
+
+    def _dumps_templated(self, request: TemplatedRequest) -> bytes:
+        """Encode a templated request, reusing the encoded prefix of its template."""
+        template = request.template
+        assert template is not None
+        tail = request.messages[len(template.messages) :]
+        exclude = {"model", "messages"}
+        if self.backend == "orjson":
+            import orjson
+
+            encoded_tail = orjson.dumps([message.model_dump(exclude_none=True) for message in tail])
+            fields = orjson.dumps(request.model_dump(exclude=exclude, exclude_none=True))
+        else:
+            encoded_tail = get_type_adapter(list[Message]).dump_json(tail, exclude_none=True)
+            fields = get_type_adapter(type(request)).dump_json(request, exclude=exclude, exclude_none=True)
+        return template.encode(request, encoded_tail, fields)
+
+    def loads(self, tp: type[T], data: Union[bytes, str]) -> T:
+        """Validate raw JSON bytes into an instance of ``tp``.
+
+        Args:
+            tp: The type to validate into
+            data: The raw JSON body or text
+
+        Returns:
+            The validated instance
+        """
+        adapter = get_type_adapter(tp)
+        if self.backend == "orjson":
+            import orjson
+
+            return adapter.validate_python(orjson.loads(data))
+        return adapter.validate_json(data)
@@ -0,0 +1,149 @@
+"""Incremental server-sent events (SSE) decoding for streamed chat completions."""
+
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+DONE_SENTINEL = b"[DONE]"
+
+
+class SSEDecoder:
+    """Incremental decoder for ``text/event-stream`` bodies.
+
+    Raw network chunks are fed in as they arrive and complete ``data`` payloads come out as
+    bytes, ready to be validated with ``model_validate_json``. Lines are never decoded to
+    ``str``, multi-line ``data`` fields are joined as the SSE spec requires, comments and
+    other fields are skipped, and the ``[DONE]`` sentinel ends the stream.
+
+    Bare JSON lines (newline-delimited JSON without ``data:`` framing) are also accepted and
+    emitted as one payload per line.
+    """
+
+    __slots__ = ("_buffer", "_data", "_done")
+
+    def __init__(self) -> None:
+        """Initialize the decoder."""
+        self._buffer = bytearray()
+        self._data: list[bytes] = []
+        self._done = False
+
+    @property
+    def done(self) -> bool:
+        """Whether the ``[DONE]`` sentinel has been received."""
+        return self._done
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Feed a chunk of raw bytes.
+
+        Args:
+            chunk: Bytes read from the response body
+
+        Returns:
+            The payloads of the events completed by this chunk
+        """
+        events: list[bytes] = []
+        if self._done or not chunk:
+            return events
+
+        buffer = self._buffer
+        start = len(buffer)
+        buffer += chunk
+        if chunk.find(b"\n") == -1:
+            return events
+
+        # Only the tail of the buffer can contain new line breaks.
+        pos = 0
+        newline = buffer.find(b"\n", start)
+        while newline != -1:
+            end = newline - 1 if newline > pos and buffer[newline - 1] == 0x0D else newline
+            self._process_line(bytes(buffer[pos:end]), events)
+            pos = newline + 1
+            if self._done:
+                break
+            newline = buffer.find(b"\n", pos)
+        del buffer[:pos]
+        return events
+
+    def flush(self) -> list[bytes]:
+        """Flush any buffered event at the end of the stream.
+
+        Returns:
+            The payloads of any events left in the buffer
+        """
+        events: list[bytes] = []
+        if self._done:
+            return events
+        if self._buffer:
+            line = bytes(self._buffer.rstrip(b"\r"))
+            self._buffer.clear()
+            self._process_line(line, events)
+        if not self._done:
+            self._dispatch(events)
+        return events
+
+    def _process_line(self, line: bytes, events: list[bytes]) -> None:
+        """Process a single line without its terminator."""
+        if not line:
+            self._dispatch(events)
+            return
+
+        first = line[0]
+        if first == 0x3A:  # ":" comment line
+            return
+        if first == 0x7B:  # "{" bare JSON line
+            self._dispatch(events)
+            events.append(line)
+            return
+        if line.startswith(b"data:"):
+            value = line[6:] if line[5:6] == b" " else line[5:]
+            self._data.append(value)
+            return
+        if line == DONE_SENTINEL:
+            self._done = True
+        # Other fields (event, id, retry) carry nothing the client needs.
+
+    def _dispatch(self, events: list[bytes]) -> None:
+        """Dispatch the pending ``data`` lines as one event."""
+        data = self._data
+        if not data:
+            return
+        payload = data[0] if len(data) == 1 else b"\n".join(data)
+        data.clear()
+        if payload == DONE_SENTINEL:
+            self._done = True
+        else:
+            events.append(payload)
+
+
+def iter_sse_events(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decode an iterable of raw byte chunks into SSE event payloads.
+
+    Args:
+        chunks: Raw byte chunks, typically from ``httpx.Response.iter_bytes()``
+
+    Yields:
+        Each event payload until the stream ends or ``[DONE]`` is received
+    """
+    decoder = SSEDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+        if decoder.done:
+            return
+    yield from decoder.flush()
+
+
+async def aiter_sse_events(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Async version of iter_sse_events.
+
+    Args:
+        chunks: Raw byte chunks, typically from ``httpx.Response.aiter_bytes()``
+
+    Yields:
+        Each event payload until the stream ends or ``[DONE]`` is received
+    """
+    decoder = SSEDecoder()
+    async for chunk in chunks:
+        for event in decoder.feed(chunk):
+            yield event
+        if decoder.done:
+            return
+    for event in decoder.flush():
+        yield event
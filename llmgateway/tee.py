@@ -0,0 +1,235 @@
+"""Fan-out of one async stream to several consumers, with bounded buffers."""
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from typing import Any, Generic, Literal, Optional, TypeVar
+
+from .exceptions import SlowConsumerError
+
+T = TypeVar("T")
+
+SlowConsumerPolicy = Literal["block", "drop", "detach"]
+
+
+class TeeConsumer(Generic[T]):
+    """One consumer of a StreamTee, iterating over its own bounded buffer.
+
+    Attributes:
+        dropped: Number of items dropped because the buffer was full, with the ``drop`` policy
+        detached: Whether the consumer fell behind and was detached, with the ``detach`` policy
+        closed: Whether the consumer was closed or reached the end of the stream
+    """
+
+    def __init__(self, tee: "StreamTee[T]") -> None:
+        """Initialize an empty consumer of ``tee``."""
+        self._tee = tee
+        self._items: deque[T] = deque()
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._finished = False
+        self._error: Optional[BaseException] = None
+        self.dropped = 0
+        self.detached = False
+        self.closed = False
+
+    @property
+    def buffered(self) -> int:
+        """Number of items waiting in the buffer."""
+        return len(self._items)
+
+    def __aiter__(self) -> "TeeConsumer[T]":
+        """Return the consumer itself."""
+        return self
+
+    async def __anext__(self) -> T:
+        """Return the next item, waiting for the upstream stream if the buffer is empty."""
+        self._tee._start()
+        while not self._items:
+            if self.detached:
+                raise SlowConsumerError(self._tee.buffer_size)
+            if self._finished or self.closed:
+                self.closed = True
+                if self._error is not None:
+                    raise self._error
+                raise StopAsyncIteration
+            self._readable.clear()
+            await self._readable.wait()
+        item = self._items.popleft()
+        self._writable.set()
+        return item
+
+    async def aclose(self) -> None:
+        """Stop consuming, freeing the buffer; the upstream stream is closed once every consumer is."""
+        if not self.closed:
+            self._close()
+            if all(consumer.closed for consumer in self._tee.consumers):
+                await self._tee._stop()
+
+    async def __aenter__(self) -> "TeeConsumer[T]":
+        """Enter the async context manager."""
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close the consumer."""
+        await self.aclose()
+
+    async def _offer(self, item: T, size: int, policy: SlowConsumerPolicy) -> None:
+        """Add an item to the buffer, applying ``policy`` if it is full."""
+        while len(self._items) >= size and not self.closed:
+            if policy == "drop":
+                self.dropped += 1
+                return
+            if policy == "detach":
+                self._detach()
+                return
+            self._writable.clear()
+            await self._writable.wait()
+        if not self.closed:
+            self._items.append(item)
+            self._readable.set()
+
+    def _close(self) -> None:
+        """Stop feeding the consumer and free its buffer."""
+        self.closed = True
+        self._items.clear()
+        self._writable.set()
+
+    def _detach(self) -> None:
+        """Stop feeding the consumer, which raises SlowConsumerError once it reads again."""
+        self.detached = self.closed = True
+        self._items.clear()
+        self._readable.set()
+
+    def _finish(self, error: Optional[BaseException]) -> None:
+        """Mark the end of the upstream stream, after the items already buffered."""
+        self._finished = True
+        self._error = error
+        self._readable.set()
+
+
+class StreamTee(Generic[T]):
+    """Split one async stream into several consumers sharing a single upstream request.
+
+    A background task reads the upstream stream and appends each item to the buffer of every
+    open consumer. Items are shared, not copied. Buffers hold at most ``buffer_size`` items,
+    and ``policy`` decides what happens when a consumer falls that far behind:
+
+    - ``block``: the upstream stream is not read until the consumer catches up, so every
+      consumer sees every item and the slowest one sets the pace
+    - ``drop``: items are skipped for that consumer only, and counted in its ``dropped``
+    - ``detach``: the consumer is cut off and raises ``SlowConsumerError``, and the others
+      carry on
+
+    An upstream error is raised by every consumer once it has read the items before it. The
+    upstream stream, and with it the HTTP response, is closed as soon as it ends or every
+    consumer is closed. Closing the tee, or leaving its ``async with`` block, closes all of
+    them.
+
+    Example:
+        >>> stream = await client.achat_completions(request)
+        >>> async with StreamTee(stream, 3) as (websocket, logger, moderation):
+        ...     await asyncio.gather(forward(websocket), log(logger), moderate(moderation))
+
+    Attributes:
+        consumers: The consumers, in order
+        buffer_size: Maximum number of items buffered per consumer
+        policy: What happens when a consumer's buffer is full
+    """
+
+    def __init__(
+        self,
+        stream: AsyncIterator[T],
+        consumers: int = 2,
+        *,
+        buffer_size: int = 64,
+        policy: SlowConsumerPolicy = "block",
+    ) -> None:
+        """Wrap a stream returned by ``achat_completions``, or any async iterator.
+
+        The upstream stream is read once a consumer starts iterating.
+
+        Args:
+            stream: The upstream stream
+            consumers: Number of consumers
+            buffer_size: Maximum number of items buffered per consumer
+            policy: ``block``, ``drop`` or ``detach``, applied when a consumer's buffer is full
+        """
+        if consumers < 1:
+            raise ValueError("At least one consumer is required")
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be at least 1")
+        if policy not in ("block", "drop", "detach"):
+            raise ValueError(f"Unknown slow consumer policy: {policy!r}")
+        self.buffer_size = buffer_size
+        self.policy = policy
+        self.consumers = tuple(TeeConsumer(self) for _ in range(consumers))
+        self._stream = stream
+        self._task: Optional[asyncio.Future[None]] = None
+        self._upstream_closed = False
+
+    def __iter__(self) -> Iterator[TeeConsumer[T]]:
+        """Iterate over the consumers, for unpacking."""
+        return iter(self.consumers)
+
+    def __getitem__(self, index: int) -> TeeConsumer[T]:
+        """Return a consumer."""
+        return self.consumers[index]
+
+    def __len__(self) -> int:
+        """Return the number of consumers."""
+        return len(self.consumers)
+
+    async def aclose(self) -> None:
+        """Close every consumer and the upstream stream."""
+        for consumer in self.consumers:
+            consumer._close()
+        await self._stop()
+
+    async def __aenter__(self) -> "StreamTee[T]":
+        """Start reading the upstream stream."""
+        self._start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close every consumer and the upstream stream."""
+        await self.aclose()
+
+    def _start(self) -> None:
+        """Start the task reading the upstream stream, unless it is running."""
+        if self._task is None and not self._upstream_closed:
+            self._task = asyncio.ensure_future(self._pump())
+
+    async def _pump(self) -> None:
+        """Read the upstream stream into the buffers of the open consumers."""
+        error: Optional[BaseException] = None
+        try:
+            async for item in self._stream:
+                for consumer in self.consumers:
+                    if not consumer.closed:
+                        await consumer._offer(item, self.buffer_size, self.policy)
+                if all(consumer.closed for consumer in self.consumers):
+                    break
+        except Exception as exc:
+            error = exc
+        finally:
+            for consumer in self.consumers:
+                consumer._finish(error)
+            await self._close_upstream()
+
+    async def _close_upstream(self) -> None:
+        """Close the upstream stream and its HTTP response, once."""
+        if self._upstream_closed:
+            return
+        self._upstream_closed = True
+        aclose = getattr(self._stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    async def _stop(self) -> None:
+        """Stop reading the upstream stream and close it."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.wait([self._task])
+        # A task cancelled before it started never ran its cleanup
+        await self._close_upstream()
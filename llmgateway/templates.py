@@ -0,0 +1,125 @@
+"""Reusable conversation prefixes encoded once."""
+
+from collections.abc import Iterable
+from typing import Any, Optional, Union
+
+from pydantic import PrivateAttr, TypeAdapter
+from pydantic_core import to_json
+
+from .models import ChatCompletionRequest, Message
+
+MessageLike = Union[Message, dict[str, Any]]
+
+
+def _messages_adapter() -> TypeAdapter[list[Message]]:
+    """Return the adapter for lists of messages, built on first use."""
+    from .serialization import get_type_adapter
+
+    return get_type_adapter(list[Message])
+
+
+class TemplatedRequest(ChatCompletionRequest):
+    """A chat completion request whose leading messages come from a :class:`PromptTemplate`.
+
+    It behaves like any other ``ChatCompletionRequest``; the client recognizes it and reuses
+    the template's encoded prefix instead of serializing the whole conversation again.
+    """
+
+    _template: Optional["PromptTemplate"] = PrivateAttr(default=None)
+
+    @property
+    def template(self) -> Optional["PromptTemplate"]:
+        """The template the request was built from, if its prefix is still intact."""
+        template = self._template
+        if template is None or not template.is_prefix_of(self.messages):
+            return None
+        return template
+
+
+class PromptTemplate:
+    """A shared system prompt and few-shot examples, validated and encoded once.
+
+    Agents often resend the same long prefix with every request. The template validates the
+    prefix messages once and keeps them as ready-made JSON bytes, so building and encoding a
+    request only costs as much as the messages appended after the prefix.
+
+    Example:
+        >>> template = PromptTemplate([{"role": "system", "content": "You are terse."}], model="gpt-4")
+        >>> request = template.build([{"role": "user", "content": "Hi"}], temperature=0)
+
+    The prefix messages are shared by every request built from the template and must not be
+    modified.
+
+    Attributes:
+        messages: The validated prefix messages
+        defaults: Request fields used unless overridden in :meth:`build`
+    """
+
+    def __init__(self, messages: Iterable[MessageLike], **defaults: Any) -> None:
+        """Validate and encode the prefix.
+
+        Args:
+            messages: The prefix messages
+            **defaults: Default ``ChatCompletionRequest`` fields, such as ``model``
+        """
+        if "messages" in defaults:
+            raise TypeError("Pass the prefix messages positionally")
+        self.messages: tuple[Message, ...] = tuple(_messages_adapter().validate_python(list(messages)))
+        validated = ChatCompletionRequest.model_validate({"model": "", "messages": [], **defaults})
+        self.defaults = validated.model_dump(include=set(defaults))
+        self.prefix_chars = sum(len(message.content) for message in self.messages)
+        # The messages joined by commas, without the enclosing brackets
+        self.encoded_prefix: bytes = _messages_adapter().dump_json(list(self.messages), exclude_none=True)[1:-1]
+
+    def build(self, messages: Iterable[MessageLike] = (), **fields: Any) -> TemplatedRequest:
+        """Build a request made of the prefix followed by ``messages``.
+
+        Only the appended messages and the given fields are validated.
+
+        Args:
+            messages: Messages appended after the prefix
+            **fields: Request fields overriding the template defaults
+
+        Returns:
+            The request
+        """
+        tail = _messages_adapter().validate_python(list(messages))
+        values = {**self.defaults, **fields}
+        if not values.get("model"):
+            raise ValueError("A model is required, either in the template or when building the request")
+        # Validate the scalar fields only, then attach the already validated messages
+        request = TemplatedRequest.model_validate({**values, "messages": []})
+        request.messages = [*self.messages, *tail]
+        request._template = self
+        return request
+
+    def is_prefix_of(self, messages: list[Message]) -> bool:
+        """Return whether ``messages`` still starts with this template's own messages."""
+        if len(messages) < len(self.messages):
+            return False
+        return all(ours is theirs for ours, theirs in zip(self.messages, messages))
+
+    def encode(self, request: ChatCompletionRequest, tail: bytes, fields: bytes) -> bytes:
+        """Splice the encoded prefix into a request body.
+
+        The result is byte for byte what encoding the whole request would produce.
+
+        Args:
+            request: The request, starting with this template's messages
+            tail: The encoded list of messages following the prefix
+            fields: The encoded object of the request fields other than model and messages
+
+        Returns:
+            The JSON body
+        """
+        parts = [b'{"model":', to_json(request.model), b',"messages":[', self.encoded_prefix]
+        if tail != b"[]":
+            if self.messages:
+                parts.append(b",")
+            parts.append(tail[1:-1])
+        parts.append(b"]")
+        if fields != b"{}":
+            parts += (b",", fields[1:])
+        else:
+            parts.append(b"}")
+        return b"".join(parts)
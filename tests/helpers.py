@@ -0,0 +1,72 @@
+"""Request, client and catalog builders shared by the test modules."""
+
+import asyncio
+import time
+
+import httpx
+
+from llmgateway import ChatCompletionRequest, LLMGatewayClient, Message
+
+REQUEST = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="Hi")])
+STREAM_REQUEST = REQUEST.model_copy(update={"stream": True})
+
+
+def make_request(content="Hello!", stream=False, **kwargs):
+    """Build a chat completion request with one user message."""
+    return ChatCompletionRequest(
+        model="gpt-4", messages=[Message(role="user", content=content)], stream=stream, **kwargs
+    )
+
+
+def make_client(gateway, **kwargs):
+    """Build a client served by a mock ``gateway`` with ``handle`` and ``ahandle`` methods."""
+    return LLMGatewayClient(
+        api_key="test",
+        transport=httpx.MockTransport(gateway.handle),
+        async_transport=httpx.MockTransport(gateway.ahandle),
+        **kwargs,
+    )
+
+
+def make_stream_client(body=None, delay=0.0, **kwargs):
+    """Build a client whose gateway waits ``delay`` seconds, then streams ``body`` or answers."""
+
+    def handler(request):
+        time.sleep(delay)
+        return httpx.Response(200, stream=body) if body is not None else httpx.Response(200, json={"message": "Hi"})
+
+    async def async_handler(request):
+        await asyncio.sleep(delay)
+        return httpx.Response(200, stream=body) if body is not None else httpx.Response(200, json={"message": "Hi"})
+
+    return LLMGatewayClient(
+        api_key="test",
+        transport=httpx.MockTransport(handler),
+        async_transport=httpx.MockTransport(async_handler),
+        **kwargs,
+    )
+
+
+def make_model(model_id, provider_id, input_modalities=("text",), parameters=("temperature",), prompt="0.03"):
+    """Build a model entry as returned by /v1/models."""
+    return {
+        "id": model_id,
+        "name": model_id.upper(),
+        "created": 1677610602,
+        "architecture": {"input_modalities": list(input_modalities), "output_modalities": ["text"]},
+        "top_provider": {"is_moderated": True},
+        "providers": [
+            {"providerId": provider_id, "modelName": model_id, "pricing": {"prompt": prompt, "completion": "0.06"}}
+        ],
+        "pricing": {"prompt": prompt, "completion": "0.06", "image": "n/a"},
+        "supported_parameters": list(parameters),
+    }
+
+
+CATALOG = {
+    "data": [
+        make_model("gpt-4", "openai", parameters=("temperature", "tools")),
+        make_model("gpt-4o", "openai", input_modalities=("text", "image")),
+        make_model("claude", "anthropic", prompt="0.015"),
+    ]
+}
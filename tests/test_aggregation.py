@@ -0,0 +1,119 @@
+"""Tests for streamed completion aggregation."""
+
+import json
+
+import httpx
+import pytest
+
+from llmgateway.aggregation import AsyncStreamAggregator, StreamAggregator, TextAccumulator
+
+from .helpers import STREAM_REQUEST, make_stream_client
+
+
+class TrackedStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """SSE body recording how many chunks were read and whether it was closed."""
+
+    def __init__(self, chunks):
+        """Initialize with the text of each chunk."""
+        self.events = [f"data: {json.dumps({'message': chunk})}\n\n".encode() for chunk in chunks]
+        self.events.append(b"data: [DONE]\n\n")
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        """Yield the events."""
+        for event in self.events:
+            self.sent += 1
+            yield event
+
+    async def __aiter__(self):
+        """Yield the events."""
+        for event in self.events:
+            self.sent += 1
+            yield event
+
+    def close(self):
+        """Record the close."""
+        self.closed = True
+
+    async def aclose(self):
+        """Record the close."""
+        self.closed = True
+
+
+@pytest.mark.parametrize(
+    ("chunks", "stop", "expected"),
+    [
+        (["Hello", " world"], ["\n\n"], "Hello world"),
+        (["Hello", " wor", "ld\n", "\nBye"], ["\n\n"], "Hello world"),
+        (["ab", "cS", "TO", "Pde"], ["STOP"], "abc"),
+        (["abc"], ["c", "bc"], "a"),
+        (["a", "b"], ["abc"], "ab"),
+    ],
+)
+def test_stop_sequences_across_chunks(chunks, stop, expected):
+    """Test that stop sequences are found even when split across chunks."""
+    accumulator = TextAccumulator(stop=stop)
+    emitted = "".join(accumulator.feed(chunk) for chunk in chunks) + accumulator.flush()
+    assert emitted == accumulator.text == expected
+    assert accumulator.finish_reason == ("stop" if expected != "".join(chunks) else None)
+
+
+def test_length_cap():
+    """Test that the text is cut at the length cap."""
+    accumulator = TextAccumulator(max_chars=7)
+    assert [accumulator.feed(chunk) for chunk in ("abcd", "efgh", "ijk")] == ["abcd", "efg", ""]
+    assert (accumulator.text, accumulator.finish_reason) == ("abcdefg", "length")
+
+
+@pytest.mark.parametrize(
+    ("chunk", "expected"),
+    [("abcdefSTOP", ("abcd", "length", None)), ("abcdSTOP", ("abcd", "stop", "STOP"))],
+)
+def test_length_cap_and_stop_sequence_in_same_chunk(chunk, expected):
+    """Test that the cap wins when it cuts the text before the stop sequence, and not otherwise."""
+    accumulator = TextAccumulator(stop=["STOP"], max_chars=4)
+    assert accumulator.feed(chunk) == "abcd"
+    assert (accumulator.text, accumulator.finish_reason, accumulator.stop_sequence) == expected
+
+
+def test_stream_aggregator_stops_and_closes():
+    """Test that a stop sequence ends the stream and closes the HTTP response at once."""
+    body = TrackedStream(["The answer", " is 42.", "\n\nExplanation:", " ..."] * 50)
+    client = make_stream_client(body)
+    with StreamAggregator(client.chat_completions(STREAM_REQUEST), stop=["\n\n"]) as stream:
+        assert "".join(stream) == "The answer is 42."
+    assert stream.response.message == "The answer is 42."
+    assert (stream.finish_reason, stream.stop_sequence) == ("stop", "\n\n")
+    assert body.closed
+    assert body.sent < len(body.events)
+
+
+def test_stream_aggregator_collect_whole_stream():
+    """Test that the whole stream is collected when no stop condition is met."""
+    body = TrackedStream([str(i) for i in range(100)])
+    response = StreamAggregator(make_stream_client(body).chat_completions(STREAM_REQUEST)).collect()
+    assert response.message == "".join(str(i) for i in range(100))
+    assert body.closed
+
+
+def test_stream_aggregator_closed_on_early_exit():
+    """Test that leaving the with block early closes the response."""
+    body = TrackedStream(["a"] * 100)
+    with StreamAggregator(make_stream_client(body).chat_completions(STREAM_REQUEST)) as stream:
+        for _ in stream:
+            break
+    assert body.closed
+
+
+@pytest.mark.asyncio
+async def test_async_stream_aggregator():
+    """Test the async aggregator with a length cap."""
+    body = TrackedStream(["abc"] * 100)
+    client = make_stream_client(body)
+    async with AsyncStreamAggregator(await client.achat_completions(STREAM_REQUEST), max_chars=10) as stream:
+        response = await stream.collect()
+    assert response.message == "abcabcabca"
+    assert stream.finish_reason == "length"
+    assert body.closed
+    assert body.sent < len(body.events)
@@ -0,0 +1,229 @@
+"""Tests for multi-endpoint load balancing and failover."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from llmgateway import ChatCompletionRequest, CircuitBreaker, LoadBalancer, RetryPolicy
+
+from .helpers import REQUEST, make_client
+
+URLS = ["https://eu.example.com", "https://us.example.com"]
+STREAM_BODY = b'data: {"message": "a"}\n\ndata: [DONE]\n\n'
+
+
+class Gateways:
+    """Mock deployments, keyed by host, that can be taken down."""
+
+    def __init__(self):
+        """Initialize with every deployment up."""
+        self.down = {}
+        self.hits = []
+
+    def handle(self, request):
+        """Handle a request."""
+        host = request.url.host
+        self.hits.append((host, request.url.path))
+        failure = self.down.get(host)
+        if failure == "connect":
+            raise httpx.ConnectError("connection refused", request=request)
+        if failure is not None:
+            return httpx.Response(failure)
+        if request.url.path == "/":
+            return httpx.Response(200, json={"status": "ok"})
+        if b'"stream":true' in request.content:
+            return httpx.Response(200, content=iter([STREAM_BODY]))
+        return httpx.Response(200, json={"message": host})
+
+    async def ahandle(self, request):
+        """Handle a request from the async client."""
+        return self.handle(request)
+
+
+@pytest.fixture
+def gateways():
+    """Fixture for the mock deployments."""
+    return Gateways()
+
+
+def test_least_outstanding_spreads_requests():
+    """Test that the endpoint with the fewest requests in flight is picked."""
+    balancer = LoadBalancer(URLS, strategy="least_outstanding")
+    first = balancer.acquire()
+    second = balancer.acquire()
+    assert {first.base_url, second.base_url} == set(URLS)
+    balancer.release(first, 0.1)
+    assert balancer.acquire() is first
+
+
+def test_ewma_prefers_faster_endpoint():
+    """Test that the endpoint with the lowest latency is picked."""
+    balancer = LoadBalancer(URLS)
+    slow, fast = balancer.endpoints
+    for latency, endpoint in ((0.5, slow), (0.05, fast)):
+        balancer.acquire(exclude=[e for e in balancer.endpoints if e is not endpoint])
+        balancer.release(endpoint, latency)
+    assert all(balancer.acquire() is fast for _ in range(3))
+    # Queued requests raise the cost of the fast endpoint until the slow one is cheaper
+    for _ in range(10):
+        balancer.acquire()
+    assert slow.outstanding > 0
+
+
+def test_error_rate_takes_endpoint_out_of_rotation():
+    """Test that an endpoint failing too often stops receiving requests."""
+    balancer = LoadBalancer(URLS, min_requests=3)
+    bad, good = balancer.endpoints
+    for _ in range(5):
+        balancer.acquire(exclude=[good])
+        balancer.release(bad, failed=True)
+    assert not bad.healthy
+    assert balancer.healthy_endpoints == [good]
+    assert all(balancer.acquire() is good for _ in range(5))
+    balancer.probe_done(bad, True)
+    assert bad.healthy and bad.error_rate == 0.0
+
+
+def test_all_unhealthy_still_routes():
+    """Test that requests are still sent when every endpoint is out of rotation."""
+    balancer = LoadBalancer(URLS)
+    for endpoint in balancer.endpoints:
+        endpoint.healthy = False
+    assert balancer.acquire() is not None
+
+
+def test_invalid_configuration():
+    """Test that invalid settings are rejected."""
+    with pytest.raises(ValueError):
+        LoadBalancer([])
+    with pytest.raises(ValueError):
+        LoadBalancer(URLS, strategy="round_robin")
+
+
+def test_requests_use_endpoint_pools(gateways):
+    """Test that requests go to the balanced endpoints, each with its own client."""
+    client = make_client(gateways, load_balancer=LoadBalancer(URLS, strategy="least_outstanding"))
+    hosts = {client.chat_completions(REQUEST).message for _ in range(10)}
+    assert hosts == {"eu.example.com", "us.example.com"}
+    assert set(client._endpoint_clients) == set(URLS)
+    assert client._client is None
+
+
+@pytest.mark.parametrize("failure", ["connect", 503])
+def test_failover(gateways, failure):
+    """Test that a failing request is retried at once on another endpoint."""
+    gateways.down["eu.example.com"] = failure
+    balancer = LoadBalancer(URLS)
+    client = make_client(gateways, load_balancer=balancer)
+    for _ in range(5):
+        assert client.chat_completions(REQUEST).message == "us.example.com"
+    eu = balancer.endpoints[0]
+    assert eu.failures >= 1
+    assert all(endpoint.outstanding == 0 for endpoint in balancer.endpoints)
+
+
+def test_no_failover_for_client_errors(gateways):
+    """Test that non-retryable statuses are raised without trying another endpoint."""
+    gateways.down = {"eu.example.com": 400, "us.example.com": 400}
+    client = make_client(gateways, load_balancer=LoadBalancer(URLS))
+    with pytest.raises(httpx.HTTPStatusError):
+        client.chat_completions(REQUEST)
+    assert len(gateways.hits) == 1
+
+
+def test_every_endpoint_down(gateways):
+    """Test that each endpoint is tried once before the retry policy applies."""
+    gateways.down = {"eu.example.com": "connect", "us.example.com": "connect"}
+    client = make_client(gateways, load_balancer=LoadBalancer(URLS), retry=RetryPolicy(max_attempts=2, backoff_base=0))
+    with pytest.raises(httpx.ConnectError):
+        client.chat_completions(REQUEST)
+    assert len(gateways.hits) == 4
+
+
+def test_circuit_breaker_per_endpoint(gateways):
+    """Test that circuits are kept per endpoint and open circuits are avoided."""
+    gateways.down["eu.example.com"] = "connect"
+    breaker = CircuitBreaker(failure_threshold=1)
+    client = make_client(gateways, load_balancer=LoadBalancer(URLS), circuit_breaker=breaker)
+    for _ in range(5):
+        assert client.chat_completions(REQUEST).message == "us.example.com"
+    assert breaker.is_open("https://eu.example.com/v1/chat/completions")
+    assert [host for host, _ in gateways.hits].count("eu.example.com") == 1
+
+
+def test_stream_counts_as_outstanding_until_closed(gateways):
+    """Test that a streamed request holds its endpoint until the stream is consumed."""
+    balancer = LoadBalancer(URLS)
+    client = make_client(gateways, load_balancer=balancer)
+    stream = client.chat_completions(ChatCompletionRequest(**{**REQUEST.model_dump(), "stream": True}))
+    assert next(stream).message == "a"
+    assert sum(endpoint.outstanding for endpoint in balancer.endpoints) == 1
+    stream.close()
+    assert sum(endpoint.outstanding for endpoint in balancer.endpoints) == 0
+
+
+def test_probes_restore_endpoints(gateways):
+    """Test that background health probes put endpoints back into rotation."""
+    balancer = LoadBalancer(URLS, health_check_interval=0.0)
+    eu = balancer.endpoints[0]
+    eu.healthy = False
+    client = make_client(gateways, load_balancer=balancer)
+    client.chat_completions(REQUEST)
+    deadline = time.monotonic() + 2
+    while not eu.healthy and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert eu.healthy
+    assert ("eu.example.com", "/") in gateways.hits
+
+
+@pytest.mark.asyncio
+async def test_async_failover_and_probes(gateways):
+    """Test failover and health probes with the async client."""
+    gateways.down["eu.example.com"] = 502
+    balancer = LoadBalancer(URLS, health_check_interval=0.0)
+    client = make_client(gateways, load_balancer=balancer)
+    response = await client.achat_completions(REQUEST)
+    assert response.message == "us.example.com"
+    assert client._probe_tasks
+    await client.aclose()
+    assert set(client._async_endpoint_clients) == set()
+
+
+def test_health_check_single_endpoint(gateways):
+    """Test that health_check probes the endpoint with the given base URL only."""
+    gateways.down["eu.example.com"] = 502
+    client = make_client(gateways, load_balancer=LoadBalancer(URLS))
+    assert client.health_check("https://us.example.com") == {"status": "ok"}
+    with pytest.raises(httpx.HTTPStatusError):
+        client.health_check("https://eu.example.com")
+    with pytest.raises(ValueError):
+        client.health_check("https://ap.example.com")
+    assert gateways.hits == [("us.example.com", "/"), ("eu.example.com", "/")]
+
+
+@pytest.mark.asyncio
+async def test_aclose_awaits_cancelled_probes(gateways):
+    """Test that aclose cancels hanging probes and waits for them without marking their endpoint down."""
+    probed = asyncio.Event()
+
+    async def ahandle(request):
+        if request.url.path == "/":
+            probed.set()
+            await asyncio.sleep(10)
+        return gateways.handle(request)
+
+    gateways.ahandle = ahandle
+    balancer = LoadBalancer(URLS, health_check_interval=0.0)
+    eu = balancer.endpoints[0]
+    eu.healthy = False
+    client = make_client(gateways, load_balancer=balancer)
+    await client.achat_completions(REQUEST)
+    await asyncio.wait_for(probed.wait(), 1)
+    probes = set(client._probe_tasks)
+    await client.aclose()
+    assert probes and all(task.done() for task in probes)
+    assert not client._probe_tasks
+    assert [endpoint.healthy for endpoint in balancer.endpoints] == [False, True]
+    assert balancer.due_for_probe() == balancer.endpoints
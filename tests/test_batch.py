@@ -0,0 +1,374 @@
+"""Tests for the bounded-concurrency batch API."""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from llmgateway import BatchResult, LLMGatewayClient, LLMGatewayError
+from llmgateway.batch import __main__ as batch_main
+from llmgateway.batch import aiter_bounded, iter_bounded
+from llmgateway.batch.runner import CHECKPOINT_SUFFIX, Checkpoint, merge_shards, run_batch, shard_path
+from llmgateway.models import ChatCompletionResponse
+
+from .helpers import make_request
+
+
+@pytest.fixture
+def client():
+    """Fixture for a client whose gateway echoes the prompt and tracks concurrency."""
+    state = {"in_flight": 0, "peak": 0}
+
+    async def handler(request):
+        content = json.loads(request.content)["messages"][0]["content"]
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.01 if content != "slow" else 0.05)
+        state["in_flight"] -= 1
+        if content == "fail":
+            return httpx.Response(500, json={"error": {}})
+        return httpx.Response(200, json={"message": content})
+
+    client = LLMGatewayClient(api_key="test-api-key", async_transport=httpx.MockTransport(handler))
+    client.state = state
+    return client
+
+
+@pytest.mark.asyncio
+async def test_achat_completions_many_ordered(client):
+    """Test that results keep input order and errors are captured per item."""
+    requests = [make_request(str(i)) for i in range(20)]
+    requests[3] = make_request("fail")
+    results = await client.achat_completions_many(requests, max_concurrency=4)
+
+    assert [result.index for result in results] == list(range(20))
+    assert not results[3].ok
+    assert isinstance(results[3].error, httpx.HTTPStatusError)
+    assert all(result.response.message == str(result.index) for result in results if result.index != 3)
+    assert client.state["peak"] == 4
+
+
+@pytest.mark.asyncio
+async def test_aiter_chat_completions_many_as_completed(client):
+    """Test that results are yielded as they complete."""
+    requests = [make_request("slow"), make_request("fast")]
+    results = [result async for result in client.aiter_chat_completions_many(requests, max_concurrency=2)]
+    assert [result.index for result in results] == [1, 0]
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_streaming_requests(client):
+    """Test that streaming requests fail individually."""
+    results = await client.achat_completions_many([make_request("a", stream=True), make_request("b")])
+    assert isinstance(results[0].error, ValueError)
+    assert results[1].response.message == "b"
+
+
+@pytest.mark.asyncio
+async def test_aiter_bounded_early_exit_cancels_workers():
+    """Test that leaving the iterator early cancels in-flight work."""
+    cancelled = []
+
+    async def send(request):
+        content = request.messages[0].content
+        if content != "0":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(content)
+                raise
+        return ChatCompletionResponse(message=content)
+
+    iterator = aiter_bounded(send, (make_request(str(i)) for i in range(1000)), 2)
+    first = await iterator.__anext__()
+    assert isinstance(first, BatchResult)
+    assert first.response.message == "0"
+    await iterator.aclose()
+    assert sorted(cancelled) == ["1", "2"]
+
+
+@pytest.mark.asyncio
+async def test_aiter_bounded_input_error():
+    """Test that an error raised by the input iterable is propagated."""
+
+    def requests():
+        yield make_request("a")
+        raise RuntimeError("bad input")
+
+    async def send(request):
+        return ChatCompletionResponse(message="ok")
+
+    with pytest.raises(RuntimeError, match="bad input"):
+        _ = [result async for result in aiter_bounded(send, requests(), 2)]
+
+
+@pytest.mark.asyncio
+async def test_aiter_bounded_base_exception_from_func():
+    """Test that a BaseException raised by a call reaches the consumer instead of leaving it waiting."""
+
+    class Abort(BaseException):
+        pass
+
+    cancelled = []
+
+    async def send(request):
+        if request.messages[0].content == "abort":
+            raise Abort
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(request.messages[0].content)
+            raise
+
+    async def consume():
+        return [result async for result in aiter_bounded(send, map(make_request, ["a", "abort", "b"]), 3)]
+
+    with pytest.raises(Abort):
+        await asyncio.wait_for(consume(), 1)
+    assert sorted(cancelled) == ["a", "b"]
+
+
+@pytest.fixture
+def sync_client():
+    """Fixture for a sync client whose gateway echoes the prompt and tracks concurrency."""
+    state = {"in_flight": 0, "peak": 0, "threads": set()}
+    lock = threading.Lock()
+
+    def handler(request):
+        content = json.loads(request.content)["messages"][0]["content"]
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            state["threads"].add(threading.get_ident())
+        time.sleep(0.01 if content != "slow" else 0.05)
+        with lock:
+            state["in_flight"] -= 1
+        if content == "fail":
+            return httpx.Response(500, json={"error": {}})
+        return httpx.Response(200, json={"message": content})
+
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(handler))
+    client.state = state
+    yield client
+    client.close()
+
+
+def test_chat_completions_many_ordered(sync_client):
+    """Test that the sync batch keeps input order, captures errors and bounds concurrency."""
+    requests = [make_request(str(i)) for i in range(40)]
+    requests[3] = make_request("fail")
+    requests[5] = make_request("x", stream=True)
+    started = time.monotonic()
+    results = sync_client.chat_completions_many(requests, max_concurrency=8)
+
+    assert time.monotonic() - started < 40 * 0.01
+    assert [result.index for result in results] == list(range(40))
+    assert isinstance(results[3].error, httpx.HTTPStatusError)
+    assert isinstance(results[5].error, ValueError)
+    assert all(result.response.message == str(result.index) for result in results if result.index not in (3, 5))
+    assert sync_client.state["peak"] == 8
+    assert len(sync_client.state["threads"]) > 1
+    assert sync_client._client is not None and not sync_client._endpoint_clients
+
+
+def test_iter_chat_completions_many_as_completed(sync_client):
+    """Test that sync results are yielded as they complete."""
+    results = list(sync_client.iter_chat_completions_many([make_request("slow"), make_request("fast")]))
+    assert [result.index for result in results] == [1, 0]
+
+
+def test_iter_bounded_early_exit_cancels_pending():
+    """Test that closing the iterator cancels the calls not started yet."""
+    calls = []
+
+    def func(request):
+        calls.append(request)
+        time.sleep(0.01)
+        return ChatCompletionResponse(message="ok")
+
+    def requests():
+        for i in range(1000):
+            yield make_request(str(i))
+
+    with ThreadPoolExecutor(2) as executor:
+        results = iter_bounded(func, requests(), 2, executor)
+        next(results)
+        results.close()
+    assert len(calls) <= 4
+
+
+def test_close_cancels_sync_batch(sync_client):
+    """Test that closing the client cancels the requests of a running batch."""
+    results = sync_client.iter_chat_completions_many((make_request("slow") for _ in range(1000)), max_concurrency=500)
+    first = next(results)
+    sync_client.close()
+    rest = []
+    with pytest.raises(LLMGatewayError):
+        for result in results:
+            rest.append(result)
+    assert first.ok
+    assert any(isinstance(result.error, CancelledError) for result in rest)
+    assert len(rest) < 999
+
+
+def write_requests(path, contents):
+    """Write a JSONL file of requests, one per content."""
+    with open(path, "w") as file:
+        for content in contents:
+            file.write(make_request(content).model_dump_json() + "\n" if content is not None else "not json\n")
+
+
+def read_results(path):
+    """Read a JSONL file of results, keyed by index."""
+    with open(path) as file:
+        return {result["index"]: result for result in map(json.loads, file)}
+
+
+@pytest.mark.asyncio
+async def test_run_batch(client, tmp_path):
+    """Test that every input line gets exactly one result."""
+    source, output = tmp_path / "requests.jsonl", tmp_path / "results.jsonl"
+    write_requests(source, ["a", "fail", None, "b"])
+    summary = await run_batch(client, str(source), str(output), concurrency=2)
+
+    assert (summary.succeeded, summary.failed, summary.skipped) == (2, 2, 0)
+    results = read_results(output)
+    assert results[0]["response"] == {"message": "a"}
+    assert results[1]["error"]["type"] == "HTTPStatusError"
+    assert results[2]["error"]["type"] == "ValidationError"
+    assert results[3]["response"] == {"message": "b"}
+
+    # Running again finds everything done
+    summary = await run_batch(client, str(source), str(output))
+    assert (summary.succeeded, summary.skipped) == (0, 4)
+    assert len(read_results(output)) == 4
+
+
+@pytest.mark.asyncio
+async def test_run_batch_resumes_from_checkpoint(client, tmp_path):
+    """Test that a crashed run redoes only the lines after its last checkpoint."""
+    source, output = tmp_path / "requests.jsonl", tmp_path / "results.jsonl"
+    write_requests(source, [str(i) for i in range(6)])
+    await run_batch(client, str(source), str(output))
+
+    # Simulate a crash after lines 0, 1 and 3 were checkpointed and line 4 was written
+    lines = output.read_bytes().splitlines(keepends=True)
+    kept = [line for line in lines if json.loads(line)["index"] in (0, 1, 3)]
+    output.write_bytes(b"".join(kept) + b'{"index":4,"response":{"message":"4"}}\n')
+    checkpoint = Checkpoint(str(output) + CHECKPOINT_SUFFIX)
+    checkpoint.done_below, checkpoint.done = 2, [[3, 3]]
+    checkpoint.save(sum(map(len, kept)))
+
+    summary = await run_batch(client, str(source), str(output))
+    assert (summary.succeeded, summary.skipped) == (3, 3)
+    lines = output.read_text().splitlines()
+    assert sorted(json.loads(line)["index"] for line in lines) == list(range(6))
+
+
+@pytest.mark.asyncio
+async def test_run_batch_refuses_to_overwrite(client, tmp_path):
+    """Test that an existing output without a checkpoint is not overwritten by default."""
+    source, output = tmp_path / "requests.jsonl", tmp_path / "results.jsonl"
+    write_requests(source, ["a"])
+    output.write_text("precious\n")
+    with pytest.raises(FileExistsError):
+        await run_batch(client, str(source), str(output))
+    await run_batch(client, str(source), str(output), overwrite=True)
+    assert list(read_results(output)) == [0]
+
+
+@pytest.mark.asyncio
+async def test_run_batch_shards(client, tmp_path):
+    """Test that shards split the input and merge into one output."""
+    source, output = tmp_path / "requests.jsonl", tmp_path / "results.jsonl"
+    write_requests(source, [str(i) for i in range(7)])
+    for shard in range(3):
+        await run_batch(client, str(source), shard_path(str(output), shard), shard=shard, shards=3)
+    merge_shards(str(output), 3)
+    results = read_results(output)
+    assert sorted(results) == list(range(7))
+    assert all(results[i]["response"]["message"] == str(i) for i in range(7))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["requests.jsonl", "results.jsonl"]
+
+
+def test_checkpoint_memory_is_bounded():
+    """Test that the checkpoint only keeps finished lines above the watermark."""
+    checkpoint = Checkpoint("unused", shard=1, shards=2)
+    for index in (3, 5, 1):
+        checkpoint.mark_done(index)
+    assert (checkpoint.done_below, checkpoint.done) == (7, [])
+    checkpoint.mark_done(11)
+    assert (checkpoint.done_below, checkpoint.done) == (7, [[11, 11]])
+    assert checkpoint.is_done(4) and not checkpoint.is_done(9)
+
+
+def test_checkpoint_ranges_stay_few_behind_slow_line(tmp_path):
+    """Test that lines finished far ahead of a slow early line are kept and saved as ranges."""
+    path = tmp_path / "results.jsonl.checkpoint"
+    checkpoint = Checkpoint(str(path))
+    for index in range(2, 10_000):
+        if index != 5000:
+            checkpoint.mark_done(index)
+    assert checkpoint.done == [[2, 4999], [5001, 9999]]
+    checkpoint.save(0)
+    assert path.stat().st_size < 200
+
+    restored = Checkpoint(str(path))
+    checked = (0, 1, 2, 4999, 5000, 5001, 9999, 10_000)
+    assert [index for index in checked if restored.is_done(index)] == [2, 4999, 5001, 9999]
+    restored.mark_done(5000)
+    restored.mark_done(0)
+    assert (restored.done_below, restored.done) == (1, [[2, 9999]])
+    restored.mark_done(1)
+    assert (restored.done_below, restored.done) == (10_000, [])
+
+
+@pytest.fixture
+def main(monkeypatch):
+    """Fixture running the command line with worker threads instead of processes and a mock gateway."""
+
+    async def echo(request):
+        return httpx.Response(200, json={"message": json.loads(request.content)["messages"][0]["content"]})
+
+    def make_client(**kwargs):
+        return LLMGatewayClient(**kwargs, async_transport=httpx.MockTransport(echo))
+
+    monkeypatch.setattr(batch_main, "LLMGatewayClient", make_client)
+    monkeypatch.setattr(batch_main, "ProcessPoolExecutor", ThreadPoolExecutor)
+    return lambda *args: batch_main.main([*map(str, args), "--api-key", "test"])
+
+
+def test_main_processes_overwrite_and_resume(main, client, tmp_path):
+    """Test that the multi-process run honours --overwrite and resumes and re-merges after a crash."""
+    source, output = tmp_path / "requests.jsonl", tmp_path / "results.jsonl"
+    write_requests(source, [str(i) for i in range(7)])
+    output.write_text("precious\n")
+    assert main(source, output, "--processes", "2") == 1
+    assert main(source, output, "--processes", "2", "--overwrite") == 0
+    assert sorted(read_results(output)) == list(range(7))
+
+    # Simulate a crash while merging: the shards are finished but the output is partial
+    for shard in range(2):
+        asyncio.run(run_batch(client, str(source), shard_path(str(output), shard), shard=shard, shards=2))
+    output.write_text(output.read_text().splitlines(keepends=True)[0])
+    assert main(source, output, "--processes", "2") == 0
+    results = read_results(output)
+    assert sorted(results) == list(range(7))
+    assert all(results[i]["response"]["message"] == str(i) for i in range(7))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["requests.jsonl", "results.jsonl"]
+
+
+@pytest.mark.asyncio
+async def test_run_batch_refuses_missing_checkpointed_output(client, tmp_path):
+    """Test that a checkpoint whose output is gone is not resumed into an output padded with NUL bytes."""
+    source, output = tmp_path / "requests.jsonl", tmp_path / "results.jsonl"
+    write_requests(source, ["a", "b"])
+    await run_batch(client, str(source), str(output))
+    output.unlink()
+    with pytest.raises(FileNotFoundError):
+        await run_batch(client, str(source), str(output))
+    assert not output.exists()
@@ -0,0 +1,142 @@
+"""Tests for the response cache."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from llmgateway import LLMGatewayClient, MemoryCache, SQLiteCache
+
+from .helpers import make_request
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    """Fixture for each cache backend."""
+    if request.param == "memory":
+        yield MemoryCache(maxsize=2)
+    else:
+        cache = SQLiteCache(tmp_path / "cache.db", max_entries=2)
+        yield cache
+        cache.close()
+
+
+def counting_transport(calls):
+    """Build a transport that counts requests."""
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"message": f"response {len(calls)}"})
+
+    return handler
+
+
+def test_cache_hits_and_misses(cache):
+    """Test that repeated deterministic requests are served from the cache."""
+    calls = []
+    client = LLMGatewayClient(
+        api_key="test-api-key", transport=httpx.MockTransport(counting_transport(calls)), cache=cache
+    )
+    first = client.chat_completions(make_request(temperature=0.0))
+    second = client.chat_completions(make_request(temperature=0.0))
+    assert first == second
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_rate == 0.5
+
+
+def test_cache_skips_sampled_requests(cache):
+    """Test that non-deterministic requests bypass the cache."""
+    calls = []
+    client = LLMGatewayClient(
+        api_key="test-api-key", transport=httpx.MockTransport(counting_transport(calls)), cache=cache
+    )
+    client.chat_completions(make_request(temperature=0.7))
+    client.chat_completions(make_request(temperature=0.7))
+    client.chat_completions(make_request(temperature=0.0), use_cache=False)
+    assert len(calls) == 3
+    assert len(cache) == 0
+
+
+def test_cache_lru_eviction(cache):
+    """Test that the least recently used entry is evicted."""
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+
+
+def test_cache_ttl(cache, monkeypatch):
+    """Test that expired entries are not returned."""
+    now = 1000.0
+    monkeypatch.setattr("llmgateway.cache.time.time", lambda: now)
+    cache.ttl = 10
+    cache.set("a", b"1")
+    assert cache.get("a") == b"1"
+    now = 1011.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_survives_restart(tmp_path):
+    """Test that entries persist across cache instances."""
+    cache = SQLiteCache(tmp_path / "cache.db")
+    cache.set("a", b"1")
+    cache.close()
+    cache = SQLiteCache(tmp_path / "cache.db")
+    assert cache.get("a") == b"1"
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_async_cache(cache):
+    """Test that the async path uses the cache."""
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"message": "Hi"})
+
+    client = LLMGatewayClient(api_key="test-api-key", async_transport=httpx.MockTransport(handler), cache=cache)
+    await client.achat_completions(make_request(temperature=0.0))
+    response = await client.achat_completions(make_request(temperature=0.0))
+    assert response.message == "Hi"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_sqlite_cache_off_event_loop(tmp_path, monkeypatch):
+    """Test that SQLite lookups and writes from the async path run outside the event loop thread."""
+    cache = SQLiteCache(tmp_path / "cache.db")
+    threads = []
+    for method in ("_get", "_set"):
+        original = getattr(SQLiteCache, method)
+
+        def record(self, *args, original=original):
+            threads.append(threading.get_ident())
+            return original(self, *args)
+
+        monkeypatch.setattr(SQLiteCache, method, record)
+    client = LLMGatewayClient(
+        api_key="test-api-key",
+        async_transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"message": "Hi"})),
+        cache=cache,
+    )
+    await client.achat_completions(make_request(temperature=0.0))
+    assert (await client.achat_completions(make_request(temperature=0.0))).message == "Hi"
+    assert len(threads) == 3
+    assert threading.get_ident() not in threads
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_counters_thread_safe(cache):
+    """Test that concurrent lookups are all counted."""
+    cache.set("a", b"1")
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda i: cache.get("a" if i % 2 else "b"), range(2000)))
+    assert (cache.hits, cache.misses) == (1000, 1000)
+    assert cache.hit_rate == 0.5
@@ -0,0 +1,199 @@
+"""Tests for the indexed model catalog."""
+
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+from llmgateway import LLMGatewayClient, ModelPrices
+
+from .helpers import CATALOG
+
+
+class Gateway:
+    """Mock /v1/models endpoint supporting conditional requests."""
+
+    def __init__(self):
+        """Initialize the gateway."""
+        self.requests = []
+        self.etag = '"v1"'
+
+    def __call__(self, request):
+        """Handle a request."""
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304)
+        return httpx.Response(200, json=CATALOG, headers={"ETag": self.etag})
+
+
+@pytest.fixture
+def gateway():
+    """Fixture for the mock gateway."""
+    return Gateway()
+
+
+def test_catalog_indexes(gateway):
+    """Test the catalog lookups."""
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(gateway))
+    catalog = client.catalog
+    assert client.catalog is catalog
+    assert catalog.get("gpt-4").name == "GPT-4"
+    assert catalog.get("missing") is None
+    assert "claude" in catalog
+    assert len(catalog) == 3
+    assert [model.id for model in catalog.by_provider("openai")] == ["gpt-4", "gpt-4o"]
+    assert [model.id for model in catalog.by_input_modality("image")] == ["gpt-4o"]
+    assert len(catalog.by_output_modality("text")) == 3
+    assert [model.id for model in catalog.by_parameter("tools")] == ["gpt-4"]
+    assert catalog.by_provider("unknown") == []
+    assert catalog.prices("claude") == ModelPrices(prompt=0.015, completion=0.06)
+    assert len(gateway.requests) == 1
+
+
+def test_catalog_conditional_refresh(gateway):
+    """Test that refreshes send the ETag and keep the snapshot on 304."""
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(gateway))
+    assert client.catalog.refresh() is True
+    snapshot = client.catalog.snapshot
+    assert client.catalog.refresh() is False
+    assert gateway.requests[-1].headers["If-None-Match"] == '"v1"'
+    assert client.catalog.snapshot is snapshot
+    gateway.etag = '"v2"'
+    assert client.catalog.refresh() is True
+    assert client.catalog.snapshot is not snapshot
+
+
+def test_catalog_background_refresh_when_stale(gateway):
+    """Test that a stale catalog answers immediately and refreshes in the background."""
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(gateway), catalog_ttl=0.0)
+    client.catalog.refresh()
+    assert client.catalog.get("gpt-4") is not None
+    deadline = time.monotonic() + 5
+    while len(gateway.requests) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(gateway.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_catalog_async(gateway):
+    """Test the catalog from async code."""
+    client = LLMGatewayClient(api_key="test-api-key", async_transport=httpx.MockTransport(gateway), catalog_ttl=0.0)
+    with pytest.raises(RuntimeError):
+        client.catalog.get("gpt-4")
+    await client.catalog.arefresh()
+    assert client.catalog.get("gpt-4") is not None
+    assert len(client.catalog._tasks) == 1
+    await asyncio.sleep(0.01)
+    assert len(gateway.requests) == 2
+    assert not client.catalog._tasks
+    assert client._client is None
+
+
+@pytest.mark.asyncio
+async def test_catalog_failed_background_refresh(gateway, tmp_path):
+    """Test that a failed background refresh from a stale file keeps serving it and is not retried at once."""
+    path = tmp_path / "models.json"
+    await LLMGatewayClient(
+        api_key="test-api-key", async_transport=httpx.MockTransport(gateway), catalog_path=path
+    ).catalog.arefresh()
+    old = time.time() - 600
+    os.utime(path, (old, old))
+
+    def unavailable(request):
+        gateway.requests.append(request)
+        return httpx.Response(503)
+
+    client = LLMGatewayClient(
+        api_key="test-api-key", async_transport=httpx.MockTransport(unavailable), catalog_path=path
+    )
+    client.catalog.jitter = 0.0
+    assert client.catalog.get("gpt-4") is not None
+    (task,) = client.catalog._tasks
+    await asyncio.gather(task, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert not client.catalog._tasks
+    assert client.catalog.get("gpt-4") is not None
+    assert len(gateway.requests) == 2
+
+
+def test_catalog_persisted_between_processes(gateway, tmp_path):
+    """Test that a new client starts from the persisted catalog without waiting on the gateway."""
+    path = tmp_path / "catalog" / "models.json"
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(gateway), catalog_path=path)
+    assert client.catalog.get("gpt-4") is not None
+    assert path.exists()
+
+    restarted = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(gateway), catalog_path=path)
+    assert restarted.catalog.get("claude").name == "CLAUDE"
+    assert restarted.catalog.snapshot.etag == '"v1"'
+    assert len(gateway.requests) == 1
+
+
+def test_catalog_stale_file_revalidated_in_background(gateway, tmp_path):
+    """Test that a stale persisted catalog is served at once and revalidated after the jitter delay."""
+    path = tmp_path / "models.json"
+    LLMGatewayClient(
+        api_key="test-api-key", transport=httpx.MockTransport(gateway), catalog_path=path
+    ).catalog.refresh()
+    old = time.time() - 600
+    os.utime(path, (old, old))
+
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(gateway), catalog_path=path)
+    client.catalog.jitter = 3600.0
+    assert client.catalog.get("gpt-4") is not None
+    assert len(gateway.requests) == 1
+
+    client.catalog._retry_at = 0.0
+    assert client.catalog.get("gpt-4") is not None
+    deadline = time.monotonic() + 5
+    while path.stat().st_mtime <= old and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(gateway.requests) == 2
+    assert gateway.requests[-1].headers["If-None-Match"] == '"v1"'
+    assert path.stat().st_mtime > old
+
+
+def test_catalog_fresh_file_expiry_jittered(gateway, tmp_path, monkeypatch):
+    """Test that a fresh persisted catalog is revalidated at a random time after it expires, not when it expires."""
+    path = tmp_path / "models.json"
+    LLMGatewayClient(
+        api_key="test-api-key", transport=httpx.MockTransport(gateway), catalog_path=path
+    ).catalog.refresh()
+    monkeypatch.setattr("llmgateway.catalog.random.uniform", lambda low, high: high)
+
+    client = LLMGatewayClient(
+        api_key="test-api-key", transport=httpx.MockTransport(gateway), catalog_path=path, catalog_ttl=60.0
+    )
+    client.catalog.jitter = 30.0
+    snapshot = client.catalog.snapshot
+    assert client.catalog._retry_at == pytest.approx(snapshot.fetched_at + 90.0)
+
+    snapshot.fetched_at -= 70.0
+    assert client.catalog.get("gpt-4") is not None
+    assert len(gateway.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_catalog_persisted_async(gateway, tmp_path):
+    """Test that async code can look up a persisted catalog without refreshing first."""
+    path = tmp_path / "models.json"
+    client = LLMGatewayClient(api_key="test-api-key", async_transport=httpx.MockTransport(gateway), catalog_path=path)
+    await client.catalog.arefresh()
+    restarted = LLMGatewayClient(
+        api_key="test-api-key", async_transport=httpx.MockTransport(gateway), catalog_path=path
+    )
+    assert [model.id for model in restarted.catalog.by_provider("openai")] == ["gpt-4", "gpt-4o"]
+    assert len(gateway.requests) == 1
+
+
+def test_catalog_corrupt_file_is_replaced(gateway, tmp_path):
+    """Test that an unreadable persisted catalog is ignored and overwritten after fetching."""
+    path = tmp_path / "models.json"
+    path.write_bytes(b'{"format": 1}\n{"data": [')
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(gateway), catalog_path=path)
+    assert len(client.catalog) == 3
+    assert len(gateway.requests) == 1
+    assert path.read_bytes().startswith(b'{"format": 1, "etag": "\\"v1\\""')
+    assert [entry.name for entry in tmp_path.iterdir()] == ["models.json"]
@@ -1,11 +1,14 @@
 """Tests for the LLMGateway client."""
 
-from unittest.mock import AsyncMock
+import subprocess
+import sys
 
 import httpx
 import pytest
 
+import llmgateway
 from llmgateway import LLMGatewayClient
+from llmgateway.client import default_ssl_context
 from llmgateway.models import (
     ChatCompletionRequest,
     Message,
@@ -79,6 +82,94 @@ def test_client_initialization(api_key):
     assert client.timeout == 30.0
 
 
+def test_client_creates_transports_lazily(api_key):
+    """Test that no HTTP client is created until it is first used."""
+    client = LLMGatewayClient(api_key=api_key)
+    assert client._client is None
+    assert client._async_client is None
+    sync_client = client._get_client()
+    assert client._get_client() is sync_client
+    assert client._async_client is None
+    client.close()
+    assert client._client is None
+
+
+def test_client_pool_configuration(api_key):
+    """Test that pool limits are exposed on the client."""
+    client = LLMGatewayClient(api_key=api_key, max_connections=500, max_keepalive_connections=50, keepalive_expiry=30.0)
+    assert client.limits == httpx.Limits(max_connections=500, max_keepalive_connections=50, keepalive_expiry=30.0)
+    client.close()
+
+
+def test_client_shared_transport(api_key, mock_response):
+    """Test that an injected transport is used and left open on close."""
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=mock_response))
+    first = LLMGatewayClient(api_key=api_key, transport=transport)
+    second = LLMGatewayClient(api_key=api_key, transport=transport)
+    assert first.health_check() == mock_response
+    first.close()
+    assert second.health_check() == mock_response
+    second.close()
+
+
+def test_client_shares_ssl_context(api_key):
+    """Test that every connection pool reuses one SSL context instead of loading the CA bundle again."""
+    first = LLMGatewayClient(api_key=api_key)
+    second = LLMGatewayClient(api_key=api_key, base_url="https://other.example")
+    contexts = {
+        first._get_client()._transport._pool._ssl_context,
+        first._get_async_client()._transport._pool._ssl_context,
+        second._get_client()._transport._pool._ssl_context,
+    }
+    assert contexts == {default_ssl_context(http2=False)}
+    assert default_ssl_context(http2=True) is not default_ssl_context(http2=False)
+    first.close()
+    second.close()
+
+
+def test_ssl_context_not_shared_across_http_versions(api_key):
+    """Test that HTTP/1.1 and HTTP/2 clients use separate SSL contexts, as connecting sets their ALPN protocols."""
+    pytest.importorskip("h2")
+    http1 = LLMGatewayClient(api_key=api_key)
+    http2 = LLMGatewayClient(api_key=api_key, http2=True)
+    http1_context = http1._get_client()._transport._pool._ssl_context
+    http2_context = http2._get_async_client()._transport._pool._ssl_context
+    assert http1_context is default_ssl_context(http2=False)
+    assert http2_context is default_ssl_context(http2=True)
+    assert http1_context is not http2_context
+    http1.close()
+    http2.close()
+
+
+def test_lazy_package_exports():
+    """Test that public names resolve on first access and importing the package loads nothing else."""
+    code = (
+        "import sys, llmgateway\n"
+        "assert not {'httpx', 'pydantic', 'llmgateway.client'} & set(sys.modules)\n"
+        "from llmgateway import Message\n"
+        "assert 'llmgateway.client' not in sys.modules\n"
+        "assert not llmgateway.models.ModelList.__pydantic_complete__\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+    for name in llmgateway.__all__:
+        assert getattr(llmgateway, name).__name__ == name
+    assert set(llmgateway.__all__) <= set(dir(llmgateway))
+    with pytest.raises(AttributeError):
+        llmgateway.Missing  # noqa: B018
+
+
+@pytest.mark.asyncio
+async def test_async_context_manager_closes_both_pools(api_key):
+    """Test that aclose releases both the sync and async clients."""
+    async with LLMGatewayClient(api_key=api_key) as client:
+        sync_client = client._get_client()
+        async_client = client._get_async_client()
+    assert sync_client.is_closed
+    assert async_client.is_closed
+    assert client._client is None
+    assert client._async_client is None
+
+
 def test_health_check(client, mock_response):
     """Test the health check."""
 
@@ -128,6 +219,24 @@ def test_chat_completions_streaming(client):
     assert responses[1].message == "How can I help you?"
 
 
+def test_chat_completions_streaming_sse(client):
+    """Test the chat completions streaming with SSE framing."""
+
+    def handler(request):
+        content = b'data: {"message": "Hello!"}\n\ndata: {"message": "Bye!"}\n\ndata: [DONE]\n\n'
+        return httpx.Response(200, content=content, headers={"content-type": "text/event-stream"})
+
+    transport = httpx.MockTransport(handler)
+    client._client = httpx.Client(transport=transport, base_url=client.base_url)
+    request_obj = ChatCompletionRequest(
+        model="gpt-4",
+        messages=[Message(role="user", content="Hello!")],
+        stream=True,
+    )
+    responses = list(client.chat_completions(request_obj))
+    assert [response.message for response in responses] == ["Hello!", "Bye!"]
+
+
 def test_list_models(client, mock_models_response):
     """Test the list models."""
 
@@ -148,10 +257,7 @@ async def test_async_health_check(client, mock_response):
     """Test the async health check."""
 
     async def handler(request):
-        resp = httpx.Response(200, json=mock_response)
-        resp.raise_for_status = AsyncMock()
-        resp.json = AsyncMock(return_value=mock_response)
-        return resp
+        return httpx.Response(200, json=mock_response)
 
     transport = httpx.MockTransport(handler)
     client._async_client = httpx.AsyncClient(transport=transport, base_url=client.base_url)
@@ -164,11 +270,7 @@ async def test_async_chat_completions(client):
     """Test the async chat completions."""
 
     async def handler(request):
-        data = {"message": "Hello! How can I help you?"}
-        resp = httpx.Response(200, json=data)
-        resp.raise_for_status = AsyncMock()
-        resp.json = AsyncMock(return_value=data)
-        return resp
+        return httpx.Response(200, json={"message": "Hello! How can I help you?"})
 
     transport = httpx.MockTransport(handler)
     client._async_client = httpx.AsyncClient(transport=transport, base_url=client.base_url)
@@ -186,9 +288,7 @@ async def test_async_chat_completions_streaming(client):
 
     async def handler(request):
         content = b'{"message": "Hello!"}\n{"message": "How can I help you?"}'
-        resp = httpx.Response(200, content=content, headers={"transfer-encoding": "chunked"})
-        resp.raise_for_status = AsyncMock()
-        return resp
+        return httpx.Response(200, content=content, headers={"transfer-encoding": "chunked"})
 
     transport = httpx.MockTransport(handler)
     client._async_client = httpx.AsyncClient(transport=transport, base_url=client.base_url)
@@ -210,10 +310,7 @@ async def test_async_list_models(client, mock_models_response):
     """Test the async list models."""
 
     async def handler(request):
-        resp = httpx.Response(200, json=mock_models_response)
-        resp.raise_for_status = AsyncMock()
-        resp.json = AsyncMock(return_value=mock_models_response)
-        return resp
+        return httpx.Response(200, json=mock_models_response)
 
     transport = httpx.MockTransport(handler)
     client._async_client = httpx.AsyncClient(transport=transport, base_url=client.base_url)
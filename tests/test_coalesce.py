@@ -0,0 +1,206 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from llmgateway import LLMGatewayClient, LLMGatewayError
+from llmgateway.coalesce import SingleFlight
+
+from .helpers import make_request
+
+
+@pytest.fixture
+def gateway():
+    """Fixture for a slow mock gateway counting upstream requests."""
+
+    async def handler(request):
+        handler.calls.append(request)
+        await asyncio.sleep(0.02)
+        if request.url.path == "/v1/models":
+            return httpx.Response(200, json={"data": []})
+        if b'"stream":true' in request.content:
+            return httpx.Response(200, content=b'data: {"message": "a"}\n\ndata: {"message": "b"}\n\ndata: [DONE]\n\n')
+        return httpx.Response(200, json={"message": "Hi"})
+
+    handler.calls = []
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_call(gateway):
+    """Test that concurrent identical requests send one upstream request."""
+    client = LLMGatewayClient(api_key="test-api-key", async_transport=httpx.MockTransport(gateway), coalesce=True)
+    responses = await asyncio.gather(*(client.achat_completions(make_request()) for _ in range(10)))
+    assert {response.message for response in responses} == {"Hi"}
+    assert len({id(response) for response in responses}) == 10
+    assert len(gateway.calls) == 1
+
+    await asyncio.gather(client.achat_completions(make_request("a")), client.achat_completions(make_request("b")))
+    assert len(gateway.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_list_models_coalesced(gateway):
+    """Test that concurrent model listings share one upstream request."""
+    client = LLMGatewayClient(api_key="test-api-key", async_transport=httpx.MockTransport(gateway), coalesce=True)
+    await asyncio.gather(*(client.alist_models() for _ in range(5)))
+    assert len(gateway.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_streams_coalesced(gateway):
+    """Test that concurrent identical streams share one upstream stream."""
+    client = LLMGatewayClient(api_key="test-api-key", async_transport=httpx.MockTransport(gateway), coalesce=True)
+
+    async def consume():
+        return [chunk.message async for chunk in await client.achat_completions(make_request(stream=True))]
+
+    results = await asyncio.gather(*(consume() for _ in range(3)))
+    assert results == [["a", "b"]] * 3
+    assert len(gateway.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_others():
+    """Test that one waiter leaving keeps the shared call running for the rest."""
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("key", call))
+    second = asyncio.ensure_future(flight.do("key", call))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await second == "done"
+    assert first.cancelled()
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_cancelled_when_all_waiters_leave():
+    """Test that the shared call is cancelled once nobody waits for it."""
+    flight = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.ensure_future(flight.do("key", call))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_late_subscriber_and_errors():
+    """Test that late subscribers get the full stream and errors reach every subscriber."""
+    flight = SingleFlight()
+    step = asyncio.Event()
+
+    async def upstream():
+        yield b"1"
+        await step.wait()
+        yield b"2"
+        raise RuntimeError("upstream failed")
+
+    first = flight.stream("key", upstream)
+    assert await first.__anext__() == b"1"
+    second = flight.stream("key", upstream)
+    assert await second.__anext__() == b"1"
+    step.set()
+    assert await first.__anext__() == b"2"
+    assert await second.__anext__() == b"2"
+    with pytest.raises(RuntimeError):
+        await first.__anext__()
+    with pytest.raises(RuntimeError):
+        await second.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_stream_upstream_closed_when_all_subscribers_leave():
+    """Test that the shared stream is closed once every subscriber has left."""
+    flight = SingleFlight()
+    closed = asyncio.Event()
+
+    async def upstream():
+        try:
+            yield b"1"
+            await asyncio.sleep(10)
+        finally:
+            closed.set()
+
+    subscriber = flight.stream("key", upstream)
+    assert await subscriber.__anext__() == b"1"
+    await subscriber.aclose()
+    await asyncio.wait_for(closed.wait(), 1)
+
+
+@pytest.mark.asyncio
+async def test_caller_after_cancellation_starts_new_call():
+    """Test that a caller arriving while the abandoned call is being cancelled gets a fresh call."""
+    flight = SingleFlight()
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        try:
+            await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.01)  # slow cleanup, such as closing a connection
+            raise
+        return calls
+
+    waiter = asyncio.ensure_future(flight.do("key", call))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert await flight.do("key", call) == 2
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_subscriber_after_cancellation_gets_full_stream():
+    """Test that a subscriber arriving while the abandoned stream is being closed gets a full new stream."""
+    flight = SingleFlight()
+
+    async def upstream():
+        yield b"0"
+        await asyncio.sleep(0.01)
+        yield b"1"
+
+    subscriber = flight.stream("key", upstream)
+    assert await subscriber.__anext__() == b"0"
+    await subscriber.aclose()
+    assert [item async for item in flight.stream("key", upstream)] == [b"0", b"1"]
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_ends_with_error():
+    """Test that a shared stream cancelled before its end fails instead of ending cleanly."""
+    flight = SingleFlight()
+
+    async def upstream():
+        yield b"0"
+        await asyncio.sleep(10)
+
+    subscriber = flight.stream("key", upstream)
+    assert await subscriber.__anext__() == b"0"
+    broadcast = flight._streams["key"]
+    broadcast.task.cancel()
+    with pytest.raises(LLMGatewayError):
+        await subscriber.__anext__()
@@ -0,0 +1,140 @@
+"""Tests for request and response compression."""
+
+import asyncio
+import gzip
+
+import httpx
+import pytest
+
+from llmgateway import HedgingPolicy, LLMGatewayClient, RequestCompression
+
+from .helpers import make_client, make_request
+
+STREAM_BODY = b'data: {"message": "a"}\n\ndata: {"message": "b"}\n\ndata: [DONE]\n\n'
+
+
+class Gateway:
+    """Mock gateway decoding compressed requests and gzipping its responses."""
+
+    def __init__(self):
+        """Initialize with no recorded requests."""
+        self.requests = []
+
+    def handle(self, request):
+        """Handle a request."""
+        body = request.content
+        encoding = request.headers.get("Content-Encoding")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "zstd":
+            import zstandard
+
+            body = zstandard.ZstdDecompressor().decompress(body)
+        self.requests.append((request, body))
+        content = STREAM_BODY if b'"stream":true' in body else b'{"message": "Hi"}'
+        return httpx.Response(200, content=gzip.compress(content), headers={"Content-Encoding": "gzip"})
+
+    async def ahandle(self, request):
+        """Handle a request from the async client."""
+        return self.handle(request)
+
+
+def test_large_bodies_are_compressed():
+    """Test that bodies above the threshold are gzipped and small ones are not."""
+    gateway = Gateway()
+    client = make_client(gateway, compression=RequestCompression(threshold=1024))
+
+    assert client.chat_completions(make_request("x" * 10_000)).message == "Hi"
+    assert client.chat_completions(make_request("x" * 10)).message == "Hi"
+
+    (large, large_body), (small, _) = gateway.requests
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert len(large.content) < len(large_body) / 10
+    assert large_body == client._serializer.dumps(make_request("x" * 10_000))
+    assert "Content-Encoding" not in small.headers
+
+
+def test_compression_disabled_by_default():
+    """Test that bodies are sent as is unless compression is enabled."""
+    gateway = Gateway()
+    make_client(gateway).chat_completions(make_request("x" * 100_000))
+    request, body = gateway.requests[0]
+    assert "Content-Encoding" not in request.headers
+    assert request.content == body
+
+
+def test_accept_encoding_advertised():
+    """Test that compressed responses are negotiated."""
+    gateway = Gateway()
+    make_client(gateway).chat_completions(make_request("x" * 10))
+    assert "gzip" in gateway.requests[0][0].headers["Accept-Encoding"]
+
+
+def test_compressed_stream():
+    """Test that compressed streamed responses are decoded."""
+    gateway = Gateway()
+    client = make_client(gateway, compression=RequestCompression(threshold=0))
+    messages = [chunk.message for chunk in client.chat_completions(make_request("x" * 10, stream=True))]
+    assert messages == ["a", "b"]
+    assert gateway.requests[0][0].headers["Content-Encoding"] == "gzip"
+
+
+@pytest.mark.asyncio
+async def test_async_compression():
+    """Test compression with the async client, streamed and not."""
+    gateway = Gateway()
+    client = make_client(gateway, compression=RequestCompression(threshold=1024))
+
+    response = await client.achat_completions(make_request("x" * 10_000))
+    assert response.message == "Hi"
+    stream = await client.achat_completions(make_request("x" * 10_000, stream=True))
+    assert [chunk.message async for chunk in stream] == ["a", "b"]
+    assert all(request.headers["Content-Encoding"] == "gzip" for request, _ in gateway.requests)
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_hedged_attempts_share_compressed_body(monkeypatch):
+    """Test that a body is compressed once per call, however many hedged attempts send it."""
+    gateway = Gateway()
+    encoded, arrived = [], []
+    encode = RequestCompression.encode
+
+    def counting_encode(self, body, headers):
+        encoded.append(body)
+        return encode(self, body, headers)
+
+    async def slow_first(request):
+        arrived.append(request)
+        if len(arrived) == 1:
+            await asyncio.sleep(0.2)
+        return gateway.handle(request)
+
+    monkeypatch.setattr(RequestCompression, "encode", counting_encode)
+    client = LLMGatewayClient(
+        api_key="test",
+        async_transport=httpx.MockTransport(slow_first),
+        compression=RequestCompression(threshold=0),
+        hedging=HedgingPolicy(delay=0.01, max_hedge_rate=1.0),
+    )
+    assert (await client.achat_completions(make_request("x" * 10_000))).message == "Hi"
+    assert len(arrived) == 2
+    assert arrived[0].content == arrived[1].content
+    assert len(encoded) == 1
+    await client.aclose()
+
+
+def test_zstd():
+    """Test zstd compression when zstandard is installed."""
+    pytest.importorskip("zstandard")
+    gateway = Gateway()
+    client = make_client(gateway, compression=RequestCompression("zstd", threshold=0))
+    client.chat_completions(make_request("x" * 10_000))
+    assert gateway.requests[0][0].headers["Content-Encoding"] == "zstd"
+    assert "zstd" in gateway.requests[0][0].headers["Accept-Encoding"]
+
+
+def test_invalid_algorithm():
+    """Test that unknown algorithms are rejected."""
+    with pytest.raises(ValueError):
+        RequestCompression("brotli")
@@ -0,0 +1,141 @@
+"""Tests for the adaptive concurrency limiter."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from llmgateway import AdaptiveConcurrencyLimiter, ChatCompletionRequest, LLMGatewayClient, Message
+
+REQUEST = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="Hi")])
+
+
+@pytest.mark.asyncio
+async def test_additive_increase_while_saturated():
+    """Test that the limit grows by about one per window of successful requests at the limit."""
+    limiter = AdaptiveConcurrencyLimiter(4, latency_tolerance=None)
+    for _ in range(10):
+        permits = [await limiter.acquire() for _ in range(limiter.limit)]
+        for permit in permits:
+            limiter.release(permit, latency=0.1)
+    assert 8 <= limiter.limit <= 12
+    assert limiter.decreases == 0
+
+
+@pytest.mark.asyncio
+async def test_no_increase_while_idle():
+    """Test that the limit does not grow when it is far from being used."""
+    limiter = AdaptiveConcurrencyLimiter(10)
+    for _ in range(100):
+        limiter.release(await limiter.acquire(), latency=0.1)
+    assert limiter.limit == 10
+
+
+@pytest.mark.asyncio
+async def test_multiplicative_decrease_once_per_window():
+    """Test that failures of requests started before a cut do not cut the limit again."""
+    limiter = AdaptiveConcurrencyLimiter(16)
+    permits = [await limiter.acquire() for _ in range(8)]
+    for permit in permits:
+        limiter.release(permit, overloaded=True)
+    assert (limiter.limit, limiter.decreases) == (8, 1)
+    limiter.release(await limiter.acquire(), overloaded=True)
+    assert (limiter.limit, limiter.decreases) == (4, 2)
+    for _ in range(5):
+        limiter.release(await limiter.acquire(), overloaded=True)
+    assert limiter.limit == limiter.min_limit
+
+
+@pytest.mark.asyncio
+async def test_latency_spike_decreases():
+    """Test that a latency far above the average cuts the limit."""
+    limiter = AdaptiveConcurrencyLimiter(10, latency_tolerance=2.0)
+    for _ in range(20):
+        limiter.release(await limiter.acquire(), latency=0.1)
+    limiter.release(await limiter.acquire(), latency=1.0)
+    assert (limiter.limit, limiter.decreases) == (5, 1)
+    assert 0.1 < limiter.latency < 0.2
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_and_fifo():
+    """Test that requests over the limit queue in arrival order."""
+    limiter = AdaptiveConcurrencyLimiter(1)
+    permit = await limiter.acquire()
+    order = []
+
+    async def wait(name):
+        granted = await limiter.acquire()
+        order.append(name)
+        limiter.release(granted)
+
+    tasks = [asyncio.ensure_future(wait(name)) for name in "abc"]
+    await asyncio.sleep(0)
+    assert (limiter.in_flight, limiter.queue_depth) == (1, 3)
+    tasks[1].cancel()
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 2
+    limiter.release(permit)
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert order == ["a", "c"]
+    assert (limiter.in_flight, limiter.queue_depth) == (0, 0)
+
+
+def test_invalid_limits():
+    """Test that inconsistent limits are rejected."""
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(5, min_limit=10)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(5, backoff_ratio=1.0)
+
+
+@pytest.mark.asyncio
+async def test_client_backs_off_on_429():
+    """Test that 429s from the gateway cut the client's limit and slots are always freed."""
+    overloaded = True
+    in_flight = peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.005)
+        in_flight -= 1
+        if overloaded:
+            return httpx.Response(429, json={"error": "slow down"})
+        return httpx.Response(200, json={"message": "Hi"})
+
+    limiter = AdaptiveConcurrencyLimiter(32, latency_tolerance=None)
+    client = LLMGatewayClient(api_key="test", async_transport=httpx.MockTransport(handler), concurrency_limiter=limiter)
+    results = await client.achat_completions_many([REQUEST] * 50, max_concurrency=50)
+    assert all(not result.ok for result in results)
+    assert limiter.limit < 32
+    assert peak <= 32
+    assert (limiter.in_flight, limiter.queue_depth) == (0, 0)
+
+    overloaded = False
+    limit = limiter.limit
+    for _ in range(5):
+        await client.achat_completions_many([REQUEST] * 100, max_concurrency=100)
+    assert limiter.limit > limit
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_client_stream_holds_slot_until_closed():
+    """Test that a streamed response keeps its slot until the stream is closed."""
+
+    async def body():
+        yield b'data: {"message": "a"}\n\n'
+        yield b'data: {"message": "b"}\n\ndata: [DONE]\n\n'
+
+    async def handler(request):
+        return httpx.Response(200, content=body())
+
+    limiter = AdaptiveConcurrencyLimiter(2)
+    client = LLMGatewayClient(api_key="test", async_transport=httpx.MockTransport(handler), concurrency_limiter=limiter)
+    stream = await client.achat_completions(REQUEST.model_copy(update={"stream": True}))
+    assert (await stream.__anext__()).message == "a"
+    assert limiter.in_flight == 1
+    assert [chunk.message async for chunk in stream] == ["b"]
+    assert limiter.in_flight == 0
@@ -0,0 +1,179 @@
+"""Tests for per-request deadlines."""
+
+import asyncio
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+
+from llmgateway import (
+    Deadlines,
+    FirstChunkTimeoutError,
+    IdleTimeoutError,
+    LLMGatewayClient,
+    TotalTimeoutError,
+)
+
+from .helpers import REQUEST, STREAM_REQUEST, make_stream_client
+
+EVENT = b'data: {"message": "a"}\n\n'
+
+
+class SlowStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """SSE body sleeping for the given number of seconds before each event."""
+
+    def __init__(self, delays):
+        """Initialize with the delay before each event."""
+        self.delays = delays
+        self.closed = False
+
+    def __iter__(self):
+        """Yield the events."""
+        for delay in self.delays:
+            time.sleep(delay)
+            yield EVENT
+
+    async def __aiter__(self):
+        """Yield the events."""
+        for delay in self.delays:
+            await asyncio.sleep(delay)
+            yield EVENT
+
+    def close(self):
+        """Record the close."""
+        self.closed = True
+
+    async def aclose(self):
+        """Record the close."""
+        self.closed = True
+
+
+def test_deadlines_validation():
+    """Test that deadlines must be positive."""
+    with pytest.raises(ValueError):
+        Deadlines(idle=0)
+
+
+@pytest.mark.asyncio
+async def test_first_chunk_deadline():
+    """Test that a slow first chunk raises at once and closes the stream."""
+    body = SlowStream([5.0])
+    client = make_stream_client(body)
+    stream = await client.achat_completions(STREAM_REQUEST, deadlines=Deadlines(first_chunk=0.05))
+    started = time.monotonic()
+    with pytest.raises(FirstChunkTimeoutError):
+        async for _ in stream:
+            pass
+    assert time.monotonic() - started < 1
+    assert body.closed
+
+
+@pytest.mark.asyncio
+async def test_idle_deadline():
+    """Test that a stalled stream raises an idle timeout after its first chunks."""
+    body = SlowStream([0, 0, 5.0])
+    client = make_stream_client(body, deadlines=Deadlines(first_chunk=1, idle=0.05))
+    chunks = []
+    with pytest.raises(IdleTimeoutError) as exc_info:
+        async for chunk in await client.achat_completions(STREAM_REQUEST):
+            chunks.append(chunk)
+    assert len(chunks) == 2
+    assert exc_info.value.limit == 0.05
+    assert isinstance(exc_info.value, TimeoutError)
+    assert body.closed
+
+
+@pytest.mark.asyncio
+async def test_total_deadline_non_streaming():
+    """Test that a non-streaming call is cancelled once its total deadline passes."""
+    client = make_stream_client(delay=5.0)
+    started = time.monotonic()
+    with pytest.raises(TotalTimeoutError):
+        await client.achat_completions(REQUEST, deadlines=Deadlines(first_chunk=1, total=0.05))
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.asyncio
+async def test_fast_calls_unaffected():
+    """Test that calls within their deadlines succeed."""
+    deadlines = Deadlines(first_chunk=1, idle=1, total=2)
+    client = make_stream_client(SlowStream([0, 0, 0]), deadlines=deadlines)
+    assert len([chunk async for chunk in await client.achat_completions(STREAM_REQUEST)]) == 3
+    assert (await make_stream_client(deadlines=deadlines).achat_completions(REQUEST)).message == "Hi"
+
+
+def test_sync_idle_deadline_checked_per_chunk():
+    """Test that the sync client raises once a chunk arrives after the idle deadline."""
+    body = SlowStream([0, 0.1, 0])
+    client = make_stream_client(body)
+    chunks = []
+    with pytest.raises(IdleTimeoutError):
+        for chunk in client.chat_completions(STREAM_REQUEST, deadlines=Deadlines(idle=0.05)):
+            chunks.append(chunk)
+    assert len(chunks) == 1
+    assert body.closed
+
+
+@pytest.fixture
+def stalled_server(request):
+    """Fixture for a local server sending response headers and the chunks in ``request.param``, then nothing."""
+    chunks = getattr(request, "param", [])
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    connections = []
+
+    def serve():
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            connection.recv(65536)
+            connection.sendall(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n"
+                + b"".join(b"%x\r\n%s\r\n" % (len(chunk), chunk) for chunk in chunks)
+            )
+            connections.append(connection)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}"
+    server.close()
+    for connection in connections:
+        connection.close()
+
+
+def test_sync_first_chunk_deadline_bounds_socket_reads(stalled_server):
+    """Test that the sync client stops waiting on a stalled stream at the first chunk deadline."""
+    with LLMGatewayClient(api_key="test", base_url=stalled_server, timeout=30) as client:
+        started = time.monotonic()
+        with pytest.raises(FirstChunkTimeoutError):
+            for _ in client.chat_completions(STREAM_REQUEST, deadlines=Deadlines(first_chunk=0.2)):
+                pass
+        assert time.monotonic() - started < 2
+
+
+@pytest.mark.parametrize("stalled_server", [[b'data: {"message": "a"}\n\n']], indirect=True)
+def test_sync_idle_deadline_bounds_socket_reads(stalled_server):
+    """Test that the sync client stops waiting on a stream stalled after one chunk at the idle deadline."""
+    chunks = []
+    with LLMGatewayClient(api_key="test", base_url=stalled_server, timeout=4) as client:
+        started = time.monotonic()
+        with pytest.raises(IdleTimeoutError):
+            for chunk in client.chat_completions(STREAM_REQUEST, deadlines=Deadlines(idle=0.2)):
+                chunks.append(chunk.message)
+        assert time.monotonic() - started < 2
+    assert chunks == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_idle_deadline_counts_from_response_headers(stalled_server):
+    """Test that the async client enforces the idle deadline on a body that never sends its first chunk."""
+    async with LLMGatewayClient(api_key="test", base_url=stalled_server, timeout=4) as client:
+        started = time.monotonic()
+        with pytest.raises(IdleTimeoutError):
+            async for _ in await client.achat_completions(STREAM_REQUEST, deadlines=Deadlines(idle=0.2)):
+                pass
+        assert time.monotonic() - started < 2
@@ -0,0 +1,118 @@
+"""Tests for hedged requests."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from llmgateway import HedgingPolicy, LLMGatewayClient
+from llmgateway.hedging import hedged
+
+from .helpers import make_request
+
+
+def test_percentile_delay():
+    """Test that the hedge delay follows observed latencies."""
+    policy = HedgingPolicy(percentile=0.9, min_samples=10, initial_delay=2.0)
+    assert policy.delay == 2.0
+    for latency in range(1, 11):
+        policy.record_latency(latency / 10)
+    assert policy.delay == pytest.approx(0.9)
+    assert HedgingPolicy(delay=0.3).delay == 0.3
+
+
+def test_hedge_rate_cap():
+    """Test that hedges are capped to a fraction of requests."""
+    policy = HedgingPolicy(max_hedge_rate=0.5)
+    policy.requests = 4
+    assert policy.try_hedge()
+    assert policy.try_hedge()
+    assert not policy.try_hedge()
+    assert policy.hedge_rate == 0.5
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_and_loser_cancelled():
+    """Test that a hedge wins over a slow primary, which is then cancelled."""
+    policy = HedgingPolicy(delay=0.01, max_hedge_rate=1.0)
+    cancelled = []
+    attempts = []
+
+    async def call():
+        attempt = len(attempts)
+        attempts.append(attempt)
+        try:
+            await asyncio.sleep(1 if attempt == 0 else 0)
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return attempt
+
+    assert await hedged(call, policy) == 1
+    assert cancelled == [0]
+    assert (policy.requests, policy.hedges_sent, policy.hedges_won) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_fast_request_is_not_hedged():
+    """Test that requests faster than the delay are not hedged."""
+    policy = HedgingPolicy(delay=1.0, max_hedge_rate=1.0)
+
+    async def call():
+        return "fast"
+
+    assert await hedged(call, policy) == "fast"
+    assert policy.hedges_sent == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_falls_back_to_hedge():
+    """Test that a failing call does not win over a succeeding one."""
+    policy = HedgingPolicy(delay=0.01, max_hedge_rate=1.0)
+    attempts = []
+
+    async def call():
+        attempts.append(None)
+        if len(attempts) == 1:
+            await asyncio.sleep(0.02)
+            raise httpx.ConnectError("reset")
+        await asyncio.sleep(0.05)
+        return "hedge"
+
+    assert await hedged(call, policy) == "hedge"
+
+
+@pytest.mark.asyncio
+async def test_client_hedging():
+    """Test hedging through the client."""
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+        return httpx.Response(200, json={"message": f"response {len(calls)}"})
+
+    policy = HedgingPolicy(delay=0.01, max_hedge_rate=1.0)
+    client = LLMGatewayClient(api_key="test-api-key", async_transport=httpx.MockTransport(handler), hedging=policy)
+    response = await client.achat_completions(make_request())
+    assert response.message == "response 2"
+    assert policy.hedges_won == 1
+
+
+def test_counters_shared_across_threads():
+    """Test that a policy shared by threads, each with its own event loop, counts every request."""
+    policy = HedgingPolicy(delay=10)
+
+    async def call():
+        return "ok"
+
+    def run(_):
+        for _ in range(200):
+            asyncio.run(hedged(call, policy))
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(run, range(8)))
+    assert (policy.requests, policy.hedges_sent, policy.hedges_won) == (1600, 0, 0)
+    assert policy.hedge_rate == 0.0
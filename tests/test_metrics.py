@@ -0,0 +1,132 @@
+"""Tests for request instrumentation."""
+
+import httpx
+import pytest
+
+from llmgateway import (
+    LLMGatewayClient,
+    MetricsRecorder,
+    OpenTelemetryInstrumentation,
+    RequestTiming,
+)
+from llmgateway.metrics import Histogram
+
+from .helpers import make_request
+
+STREAM_BODY = b'data: {"message": "a"}\n\ndata: {"message": "b"}\n\ndata: {"message": "c"}\n\ndata: [DONE]\n\n'
+
+
+def handler(request):
+    """Mock gateway handler."""
+    if request.url.path == "/v1/models":
+        return httpx.Response(200, json={"data": []})
+    if request.url.path == "/fail":
+        return httpx.Response(500)
+    if b'"stream":true' in request.content:
+        return httpx.Response(200, content=STREAM_BODY)
+    return httpx.Response(200, json={"message": "Hi"})
+
+
+async def async_handler(request):
+    """Async mock gateway handler."""
+    return handler(request)
+
+
+def test_histogram_percentiles():
+    """Test that percentiles are within the bucket precision."""
+    histogram = Histogram(precision=0.01)
+    for value in range(1, 1001):
+        histogram.record(value / 1000)
+    assert histogram.count == 1000
+    assert histogram.percentile(0.5) == pytest.approx(0.5, rel=0.02)
+    assert histogram.percentile(0.99) == pytest.approx(0.99, rel=0.02)
+    assert histogram.percentile(1.0) == 1.0
+    assert histogram.mean == pytest.approx(0.5005)
+    assert Histogram().percentile(0.5) == 0.0
+
+
+def test_request_timing_trace_events():
+    """Test that httpcore trace events fill in the connection phases."""
+    timing = RequestTiming("GET", "/")
+    timing.start_attempt()
+    for event in (
+        "connection.connect_tcp.started",
+        "connection.connect_tcp.complete",
+        "connection.start_tls.complete",
+        "http11.send_request_headers.started",
+        "http11.receive_response_headers.complete",
+    ):
+        timing.trace(event, {})
+    timing.finish()
+    assert timing.pool_wait is not None
+    assert timing.connect is not None
+    assert 0 <= timing.pool_wait <= timing.time_to_headers <= timing.total
+
+
+def test_sync_client_records_metrics():
+    """Test that sync calls and streams are recorded per endpoint."""
+    recorder = MetricsRecorder()
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(handler), instrumentation=recorder)
+    client.chat_completions(make_request())
+    client.list_models()
+    chunks = list(client.chat_completions(make_request(stream=True)))
+    assert len(chunks) == 3
+    with pytest.raises(httpx.HTTPStatusError):
+        client._request("GET", "/fail")
+
+    summary = recorder.export()
+    assert summary["/v1/chat/completions"]["total"]["count"] == 2
+    assert summary["/v1/chat/completions"]["time_to_headers"]["count"] == 2
+    assert summary["/v1/chat/completions"]["time_to_first_chunk"]["count"] == 1
+    assert summary["/v1/chat/completions"]["chunk_gap"]["count"] == 2
+    assert summary["/v1/models"]["total"]["count"] == 1
+    assert set(summary["/v1/models"]["total"]) >= {"p50", "p90", "p95", "p99", "mean", "max"}
+    assert recorder.errors == {"/fail": 1}
+
+
+@pytest.mark.asyncio
+async def test_async_client_records_stream_metrics():
+    """Test that async streams report chunk timings once consumed."""
+    timings = []
+
+    class Hook(MetricsRecorder):
+        def on_request_end(self, timing):
+            timings.append(timing)
+            super().on_request_end(timing)
+
+    client = LLMGatewayClient(
+        api_key="test-api-key", async_transport=httpx.MockTransport(async_handler), instrumentation=Hook()
+    )
+    await client.achat_completions(make_request())
+    _ = [chunk async for chunk in await client.achat_completions(make_request(stream=True))]
+    assert [timing.stream for timing in timings] == [False, True]
+    assert timings[1].chunks == 3
+    assert timings[1].status_code == 200
+    assert timings[1].attempts == 1
+    assert timings[1].time_to_first_chunk <= timings[1].total
+
+
+def test_opentelemetry_instrumentation():
+    """Test that timings are recorded on OpenTelemetry histograms."""
+    recorded = []
+
+    class FakeHistogram:
+        def __init__(self, name):
+            self.name = name
+
+        def record(self, value, attributes):
+            recorded.append((self.name, attributes))
+
+    class FakeMeter:
+        def create_histogram(self, name, unit):
+            return FakeHistogram(name)
+
+    client = LLMGatewayClient(
+        api_key="test-api-key",
+        transport=httpx.MockTransport(handler),
+        instrumentation=OpenTelemetryInstrumentation(meter=FakeMeter()),
+    )
+    client.chat_completions(make_request())
+    names = {name for name, _ in recorded}
+    assert "llmgateway.client.total" in names
+    assert recorded[0][1]["http.response.status_code"] == 200
@@ -0,0 +1,101 @@
+"""Tests for the lazy model list."""
+
+import json
+
+import httpx
+import pytest
+
+from llmgateway import LazyModelList, LLMGatewayClient, Model
+from llmgateway.serialization import Serializer
+
+from .helpers import CATALOG, make_model
+
+BODY = json.dumps({"object": "list", **CATALOG, "meta": {"count": 3}}, indent=2).encode()
+
+
+@pytest.fixture(params=["pydantic", "orjson"])
+def serializer(request):
+    """Fixture for a serializer of each backend."""
+    pytest.importorskip(request.param)
+    return Serializer(request.param)
+
+
+def test_models_validated_on_access(serializer):
+    """Test that models are validated on first access only and match the eager parse."""
+    models = LazyModelList(BODY, serializer=serializer)
+    assert len(models) == 3
+    assert models.ids == ["gpt-4", "gpt-4o", "claude"]
+    assert models._models == [None, None, None]
+    model = models.get("gpt-4o")
+    assert model == Model(**CATALOG["data"][1])
+    assert models.get("gpt-4o") is model
+    assert models._models[0] is None
+    assert models.get("missing") is None
+    assert models.has("claude")
+    assert not models.has("missing")
+    assert model in models
+    assert Model(**{**CATALOG["data"][1], "name": "other"}) not in models
+    assert "claude" not in models
+    assert [model.id for model in models] == models.ids
+    assert [model.id for model in models[1:]] == ["gpt-4o", "claude"]
+    assert json.loads(models.raw("claude")) == CATALOG["data"][2]
+
+
+def test_filter_and_projection():
+    """Test that filtered models are dropped and projected fields are read without validation."""
+    models = LazyModelList(
+        BODY,
+        where=lambda entry: entry["providers"][0]["providerId"] == "openai",
+        fields=["pricing.prompt", "architecture.input_modalities", "missing.field"],
+    )
+    assert models.ids == ["gpt-4", "gpt-4o"]
+    assert models.column("architecture.input_modalities") == [["text"], ["text", "image"]]
+    assert models.column("id") == ["gpt-4", "gpt-4o"]
+    assert models.rows()[0] == {
+        "id": "gpt-4",
+        "pricing.prompt": "0.03",
+        "architecture.input_modalities": ["text"],
+        "missing.field": None,
+    }
+    assert models._models == [None, None]
+    with pytest.raises(ValueError):
+        models.column("name")
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"[]", b'{"object": "list"}', b'{"data": [{"name": "no id"}]}', b'{"data": [1', b'{"data": [] "x": 1}'],
+)
+def test_invalid_body(body):
+    """Test that malformed responses are rejected."""
+    with pytest.raises(ValueError):
+        LazyModelList(body)
+
+
+def test_empty_list():
+    """Test a response without models."""
+    models = LazyModelList(b'{"data": []}', fields=["name"])
+    assert len(models) == 0
+    assert models.rows() == []
+
+
+def test_client_list_models_lazy():
+    """Test the lazy listing from the sync client."""
+    client = LLMGatewayClient(
+        api_key="test", transport=httpx.MockTransport(lambda request: httpx.Response(200, content=BODY))
+    )
+    models = client.list_models_lazy(where=lambda entry: "image" in entry["architecture"]["input_modalities"])
+    assert models.ids == ["gpt-4o"]
+    assert models[0].providers[0].providerId == "openai"
+
+
+@pytest.mark.asyncio
+async def test_client_alist_models_lazy():
+    """Test the lazy listing from the async client."""
+    data = {"data": [make_model(f"model-{i}", "openai") for i in range(100)]}
+    client = LLMGatewayClient(
+        api_key="test", async_transport=httpx.MockTransport(lambda request: httpx.Response(200, json=data))
+    )
+    models = await client.alist_models_lazy(fields=["name"])
+    assert len(models) == 100
+    assert models.column("name")[42] == "MODEL-42"
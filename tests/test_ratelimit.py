@@ -0,0 +1,158 @@
+"""Tests for the client-side rate limiter."""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from llmgateway import (
+    AdaptiveConcurrencyLimiter,
+    ChatCompletionRequest,
+    LLMGatewayClient,
+    LoadBalancer,
+    Message,
+    RateLimiter,
+)
+from llmgateway.ratelimit import TokenBucket
+
+
+def test_token_bucket_reservations_queue_in_order():
+    """Test that reservations beyond the burst wait in arrival order."""
+    bucket = TokenBucket(rate=10.0, capacity=2.0)
+    now = bucket._updated_at
+    assert bucket.reserve(1, now) == 0.0
+    assert bucket.reserve(1, now) == 0.0
+    assert bucket.reserve(1, now) == pytest.approx(0.1)
+    assert bucket.reserve(1, now) == pytest.approx(0.2)
+    assert bucket.reserve(1, now + 1.0) == pytest.approx(0.0)
+
+
+def test_token_bucket_caps_refill_at_capacity():
+    """Test that idle time does not accumulate more than the burst."""
+    bucket = TokenBucket(rate=1.0, capacity=2.0)
+    now = bucket._updated_at + 100
+    assert bucket.reserve(2, now) == 0.0
+    assert bucket.reserve(1, now) == pytest.approx(1.0)
+
+
+def test_estimate_tokens():
+    """Test token estimates from prompt length and max_tokens."""
+    limiter = RateLimiter(tokens_per_minute=1000, default_completion_tokens=100)
+    request = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="x" * 400)])
+    assert limiter.estimate_tokens(request) == 200
+    request.max_tokens = 10
+    assert limiter.estimate_tokens(request) == 110
+
+
+def test_token_budget_limits_requests():
+    """Test that the token budget delays requests once exhausted."""
+    limiter = RateLimiter(tokens_per_minute=600)
+    assert limiter.reserve(600) == 0.0
+    assert limiter.reserve(60) == pytest.approx(6.0, rel=0.01)
+
+
+def test_limiter_is_thread_safe():
+    """Test that concurrent reservations from threads each get a distinct slot."""
+    limiter = RateLimiter(requests_per_second=100, request_burst=1)
+    waits = []
+
+    def reserve():
+        for _ in range(50):
+            waits.append(limiter.reserve())
+
+    threads = [threading.Thread(target=reserve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(waits) == pytest.approx(1.99, abs=0.05)
+
+
+def test_client_acquires_before_each_request(monkeypatch):
+    """Test that the sync client waits for the limiter."""
+    sleeps = []
+    monkeypatch.setattr("llmgateway.ratelimit.time.sleep", sleeps.append)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"message": "Hi"}))
+    client = LLMGatewayClient(
+        api_key="test-api-key", transport=transport, rate_limiter=RateLimiter(requests_per_second=1)
+    )
+    request = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="Hi")])
+    client.chat_completions(request)
+    client.chat_completions(request)
+    assert len(sleeps) == 1
+    assert sleeps[0] == pytest.approx(1.0, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_async_client_shares_limiter():
+    """Test that concurrent async requests are spread out by the limiter."""
+    loop = asyncio.get_running_loop()
+    sent_at = []
+
+    async def handler(request):
+        sent_at.append(loop.time())
+        return httpx.Response(200, json={"message": "Hi"})
+
+    limiter = RateLimiter(requests_per_second=50, request_burst=1)
+    client = LLMGatewayClient(
+        api_key="test-api-key", async_transport=httpx.MockTransport(handler), rate_limiter=limiter
+    )
+    request = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="Hi")])
+    await asyncio.gather(*(client.achat_completions(request) for _ in range(5)))
+    assert sent_at[-1] - sent_at[0] == pytest.approx(0.08, abs=0.03)
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_requests_not_in_flight():
+    """Test that requests waiting on the rate limit hold no concurrency permit or endpoint slot."""
+    in_flight = []
+
+    async def handler(request):
+        in_flight.append((limiter.in_flight, sum(endpoint.outstanding for endpoint in balancer.endpoints)))
+        return httpx.Response(200, json={"message": "Hi"})
+
+    limiter = AdaptiveConcurrencyLimiter()
+    balancer = LoadBalancer(["https://eu.example.com", "https://us.example.com"])
+    client = LLMGatewayClient(
+        api_key="test-api-key",
+        async_transport=httpx.MockTransport(handler),
+        rate_limiter=RateLimiter(requests_per_second=50, request_burst=1),
+        concurrency_limiter=limiter,
+        load_balancer=balancer,
+    )
+    request = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="Hi")])
+    await asyncio.gather(*(client.achat_completions(request) for _ in range(5)))
+    assert in_flight == [(1, 1)] * 5
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_refund_reservations():
+    """Test that cancelled waiters give their reservations back instead of delaying later callers."""
+    limiter = RateLimiter(requests_per_second=10, tokens_per_minute=600)
+    for _ in range(10):
+        await limiter.aacquire(10)
+    waiters = [asyncio.ensure_future(limiter.aacquire(10)) for _ in range(20)]
+    await asyncio.sleep(0)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await limiter.aacquire(10)
+    assert loop.time() - started < 0.2
+
+
+def test_interrupted_sync_wait_refunds_reservation(monkeypatch):
+    """Test that a sync waiter interrupted while sleeping gives its reservation back."""
+    limiter = RateLimiter(requests_per_second=1)
+
+    def interrupt(seconds):
+        raise KeyboardInterrupt
+
+    limiter.acquire()
+    monkeypatch.setattr("llmgateway.ratelimit.time.sleep", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        limiter.acquire()
+    assert limiter.requests.available == pytest.approx(0, abs=0.05)
@@ -0,0 +1,162 @@
+"""Tests for retry policies and circuit breaking."""
+
+import httpx
+import pytest
+
+from llmgateway import ChatCompletionRequest, CircuitBreaker, CircuitOpenError, LLMGatewayClient, Message, RetryPolicy
+from llmgateway.retry import parse_retry_after
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Fixture recording sleeps instead of waiting."""
+    recorded = []
+
+    async def async_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr("llmgateway.client.time.sleep", recorded.append)
+    monkeypatch.setattr("llmgateway.client.asyncio.sleep", async_sleep)
+    return recorded
+
+
+def scripted(*outcomes):
+    """Build a handler returning (or raising) the given outcomes in order."""
+    calls = []
+
+    def handler(request):
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(request)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    handler.calls = calls
+    return handler
+
+
+def test_parse_retry_after():
+    """Test Retry-After parsing."""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_backoff_is_capped():
+    """Test exponential backoff without jitter."""
+    policy = RetryPolicy(backoff_base=1.0, backoff_max=5.0, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+    jittered = RetryPolicy(backoff_base=1.0, backoff_max=5.0)
+    assert all(0 <= jittered.backoff(4) <= 5.0 for _ in range(100))
+
+
+def test_retries_retryable_status(sleeps):
+    """Test that 503 responses are retried until success."""
+    handler = scripted(httpx.Response(503), httpx.Response(503), httpx.Response(200, json={"ok": True}))
+    client = LLMGatewayClient(
+        api_key="test-api-key",
+        transport=httpx.MockTransport(handler),
+        retry=RetryPolicy(max_attempts=3, backoff_base=1.0, jitter=False),
+    )
+    assert client.health_check() == {"ok": True}
+    assert len(handler.calls) == 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_respects_retry_after_and_gives_up(sleeps):
+    """Test that Retry-After is honoured and the last error is raised."""
+    handler = scripted(httpx.Response(429, headers={"Retry-After": "7"}))
+    client = LLMGatewayClient(
+        api_key="test-api-key", transport=httpx.MockTransport(handler), retry=RetryPolicy(max_attempts=2)
+    )
+    with pytest.raises(httpx.HTTPStatusError) as exc_info:
+        client.health_check()
+    assert exc_info.value.response.status_code == 429
+    assert sleeps == [7.0]
+
+
+def test_deadline_budget(sleeps):
+    """Test that no retry is attempted past the deadline."""
+    handler = scripted(httpx.Response(503, headers={"Retry-After": "10"}))
+    client = LLMGatewayClient(
+        api_key="test-api-key",
+        transport=httpx.MockTransport(handler),
+        retry=RetryPolicy(max_attempts=5, deadline=5.0),
+    )
+    with pytest.raises(httpx.HTTPStatusError):
+        client.health_check()
+    assert len(handler.calls) == 1
+
+
+def test_non_retryable_status(sleeps):
+    """Test that client errors are not retried."""
+    handler = scripted(httpx.Response(400))
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(handler), retry=RetryPolicy())
+    with pytest.raises(httpx.HTTPStatusError):
+        client.health_check()
+    assert len(handler.calls) == 1
+
+
+def test_retries_transport_errors(sleeps):
+    """Test that transport errors are retried."""
+    handler = scripted(httpx.ConnectError("refused"), httpx.Response(200, json={"ok": True}))
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(handler), retry=RetryPolicy())
+    assert client.health_check() == {"ok": True}
+    assert len(handler.calls) == 2
+
+
+def test_circuit_breaker(monkeypatch):
+    """Test that the circuit opens, fails fast and recovers after a successful trial."""
+    now = 100.0
+    monkeypatch.setattr("llmgateway.retry.time.monotonic", lambda: now)
+    handler = scripted(httpx.Response(500), httpx.Response(500), httpx.Response(200, json={"ok": True}))
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10.0)
+    client = LLMGatewayClient(api_key="test-api-key", transport=httpx.MockTransport(handler), circuit_breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            client.health_check()
+    assert breaker.is_open("/")
+    with pytest.raises(CircuitOpenError):
+        client.health_check()
+    assert len(handler.calls) == 2
+
+    now = 111.0
+    assert client.health_check() == {"ok": True}
+    assert not breaker.is_open("/")
+
+
+def test_circuit_breaker_failed_trial_reopens(monkeypatch):
+    """Test that a failed trial request opens the circuit again."""
+    now = 100.0
+    monkeypatch.setattr("llmgateway.retry.time.monotonic", lambda: now)
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10.0)
+    breaker.record_failure("/v1/models")
+    now = 111.0
+    breaker.before_request("/v1/models")
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("/v1/models")
+    breaker.record_failure("/v1/models")
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("/v1/models")
+
+
+@pytest.mark.asyncio
+async def test_async_retries(sleeps):
+    """Test retries on the async path, including streams."""
+
+    async def handler(request):
+        handler.calls += 1
+        if handler.calls == 1:
+            return httpx.Response(502)
+        return httpx.Response(200, content=b'data: {"message": "Hi"}\n\n')
+
+    handler.calls = 0
+    client = LLMGatewayClient(
+        api_key="test-api-key", async_transport=httpx.MockTransport(handler), retry=RetryPolicy(jitter=False)
+    )
+    request = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="Hi")], stream=True)
+    chunks = [chunk async for chunk in await client.achat_completions(request)]
+    assert [chunk.message for chunk in chunks] == ["Hi"]
+    assert handler.calls == 2
+    assert sleeps == [0.5]
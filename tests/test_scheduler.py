@@ -0,0 +1,158 @@
+"""Tests for the priority scheduler."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from llmgateway import ChatCompletionRequest, LLMGatewayClient, Message, PriorityScheduler
+
+REQUEST = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="Hi")])
+
+
+async def drain(scheduler, calls):
+    """Queue ``calls`` behind a held slot and return the order the classes were granted in."""
+    await scheduler.acquire()
+    order = []
+
+    async def call(priority):
+        await scheduler.acquire(priority)
+        order.append(priority)
+        await asyncio.sleep(0)
+        scheduler.release(priority)
+
+    tasks = [asyncio.ensure_future(call(priority)) for priority in calls]
+    await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_weighted_fair_share():
+    """Test that classes waiting together get slots in proportion to their weights."""
+    scheduler = PriorityScheduler(1, {"interactive": 3.0, "bulk": 1.0})
+    order = await drain(scheduler, ["bulk"] * 40 + ["interactive"] * 40)
+    assert order[:20].count("interactive") == 15
+    assert order[-10:] == ["bulk"] * 10
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_idle_class_does_not_catch_up():
+    """Test that a class coming back from idle shares the capacity instead of monopolizing it."""
+    scheduler = PriorityScheduler(1, {"interactive": 1.0, "bulk": 1.0})
+    await drain(scheduler, ["bulk"] * 20)
+    order = await drain(scheduler, ["bulk"] * 10 + ["interactive"] * 10)
+    assert order[:4].count("interactive") == 2
+
+
+@pytest.mark.asyncio
+async def test_reserved_capacity():
+    """Test that bulk calls never take the slots reserved for interactive calls."""
+    scheduler = PriorityScheduler(4, reserved={"interactive": 1})
+    bulk = [asyncio.ensure_future(scheduler.acquire("bulk")) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert sum(task.done() for task in bulk) == 3
+    await asyncio.wait_for(scheduler.acquire("interactive"), 1)
+    assert scheduler.classes["bulk"].queued == 2
+    scheduler.release("interactive")
+    await asyncio.sleep(0)
+    assert scheduler.classes["bulk"].queued == 2
+    for _ in range(3):
+        scheduler.release("bulk")
+    await asyncio.gather(*bulk)
+    assert scheduler.in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_removed():
+    """Test that a cancelled call leaves the queue and a granted then cancelled call frees its slot."""
+    scheduler = PriorityScheduler(1)
+    await scheduler.acquire("bulk")
+    waiting = asyncio.ensure_future(scheduler.acquire("bulk"))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    assert scheduler.classes["bulk"].queued == 0
+
+    granted = asyncio.ensure_future(scheduler.acquire("interactive"))
+    await asyncio.sleep(0)
+    scheduler.release("bulk")
+    granted.cancel()
+    await asyncio.gather(granted, return_exceptions=True)
+    assert scheduler.in_flight == 0
+    await asyncio.wait_for(scheduler.acquire(), 1)
+
+
+@pytest.mark.asyncio
+async def test_export_queue_wait():
+    """Test that the queue wait is exported per class."""
+    scheduler = PriorityScheduler(1)
+    await scheduler.acquire("interactive")
+    waiting = asyncio.ensure_future(scheduler.acquire("bulk"))
+    await asyncio.sleep(0.02)
+    metrics = scheduler.export()
+    assert metrics["bulk"]["queued"] == 1
+    assert metrics["interactive"]["in_flight"] == 1
+    scheduler.release("interactive")
+    await waiting
+    metrics = scheduler.export()
+    assert metrics["bulk"]["granted"] == 1
+    assert metrics["bulk"]["wait_max"] >= 0.02
+    assert metrics["interactive"]["wait_max"] < 0.02
+    assert set(metrics["bulk"]) >= {"wait_mean", "wait_p50", "wait_p90", "wait_p99"}
+
+
+def test_invalid_configuration():
+    """Test that inconsistent classes and reservations are rejected."""
+    with pytest.raises(ValueError):
+        PriorityScheduler(2, reserved={"interactive": 3})
+    with pytest.raises(ValueError):
+        PriorityScheduler(2, reserved={"batch": 1})
+    with pytest.raises(ValueError):
+        PriorityScheduler(2, {"interactive": 0.0})
+    with pytest.raises(ValueError):
+        PriorityScheduler(2, default="batch")
+
+
+@pytest.mark.asyncio
+async def test_unknown_priority():
+    """Test that calls with an unknown priority class are rejected."""
+    with pytest.raises(ValueError):
+        await PriorityScheduler(2).acquire("batch")
+
+
+@pytest.mark.asyncio
+async def test_client_priorities_share_capacity():
+    """Test that the client's calls go through the scheduler and streams hold their slot until closed."""
+    in_flight = peak = 0
+
+    async def body():
+        yield b'data: {"message": "a"}\n\n'
+        yield b'data: {"message": "b"}\n\ndata: [DONE]\n\n'
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        if b'"stream":true' in request.content:
+            return httpx.Response(200, content=body())
+        return httpx.Response(200, json={"message": "Hi"})
+
+    scheduler = PriorityScheduler(3, reserved={"interactive": 1})
+    client = LLMGatewayClient(api_key="test", async_transport=httpx.MockTransport(handler), scheduler=scheduler)
+    results = await client.achat_completions_many([REQUEST] * 20, max_concurrency=20, priority="bulk")
+    assert all(result.ok for result in results)
+    assert peak <= 2
+    assert scheduler.export()["bulk"]["granted"] == 20
+
+    response = await client.achat_completions(REQUEST, priority="interactive")
+    assert response.message == "Hi"
+    stream = await client.achat_completions(REQUEST.model_copy(update={"stream": True}), priority="interactive")
+    assert (await stream.__anext__()).message == "a"
+    assert scheduler.classes["interactive"].in_flight == 1
+    assert [chunk.message async for chunk in stream] == ["b"]
+    assert scheduler.in_flight == 0
@@ -0,0 +1,40 @@
+"""Tests for request and response serialization."""
+
+import json
+
+import pytest
+
+from llmgateway.models import ChatCompletionRequest, ChatCompletionResponse, Message, ModelList
+from llmgateway.serialization import Serializer, get_type_adapter
+
+
+@pytest.fixture(params=["pydantic", "orjson"])
+def serializer(request):
+    """Fixture for a serializer of each backend."""
+    pytest.importorskip(request.param)
+    return Serializer(request.param)
+
+
+def test_type_adapters_are_cached():
+    """Test that adapters are built once per type."""
+    assert get_type_adapter(ModelList) is get_type_adapter(ModelList)
+
+
+def test_dumps_excludes_none(serializer):
+    """Test that requests are encoded without None fields."""
+    request = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="Hi")], temperature=0.0)
+    body = serializer.dumps(request)
+    assert isinstance(body, bytes)
+    assert json.loads(body) == request.model_dump(exclude_none=True)
+
+
+def test_loads_from_bytes(serializer):
+    """Test that responses are validated from raw bytes."""
+    response = serializer.loads(ChatCompletionResponse, b'{"message": "Hello!"}')
+    assert response == ChatCompletionResponse(message="Hello!")
+
+
+def test_unknown_backend():
+    """Test that an unknown backend is rejected."""
+    with pytest.raises(ValueError):
+        Serializer("ujson")
@@ -0,0 +1,79 @@
+"""Tests for the SSE stream decoder."""
+
+import pytest
+
+from llmgateway.streaming import SSEDecoder, aiter_sse_events, iter_sse_events
+
+
+def test_decoder_sse_framing():
+    """Test that data lines are emitted per event and comments are skipped."""
+    decoder = SSEDecoder()
+    events = decoder.feed(b': keep-alive\n\ndata: {"message": "a"}\n\nevent: chunk\ndata: {"message": "b"}\n\n')
+    assert events == [b'{"message": "a"}', b'{"message": "b"}']
+    assert not decoder.done
+
+
+def test_decoder_split_across_chunks():
+    """Test that events and CRLF terminators split across chunks are reassembled."""
+    decoder = SSEDecoder()
+    stream = b'data: {"message": "hello"}\r\n\r\ndata: {"message": "world"}\r\n\r\n'
+    events = []
+    for i in range(len(stream)):
+        events.extend(decoder.feed(stream[i : i + 1]))
+    events.extend(decoder.flush())
+    assert events == [b'{"message": "hello"}', b'{"message": "world"}']
+
+
+def test_decoder_multiline_data():
+    """Test that multi-line data fields are joined with newlines."""
+    decoder = SSEDecoder()
+    assert decoder.feed(b"data: first\ndata:second\n\n") == [b"first\nsecond"]
+
+
+def test_decoder_done_sentinel():
+    """Test that the [DONE] sentinel ends the stream."""
+    decoder = SSEDecoder()
+    events = decoder.feed(b'data: {"message": "a"}\n\ndata: [DONE]\n\ndata: {"message": "b"}\n\n')
+    assert events == [b'{"message": "a"}']
+    assert decoder.done
+    assert decoder.feed(b'data: {"message": "c"}\n\n') == []
+    assert decoder.flush() == []
+
+
+def test_decoder_bare_json_lines():
+    """Test that newline-delimited JSON without SSE framing is accepted."""
+    decoder = SSEDecoder()
+    events = decoder.feed(b'{"message": "a"}\n{"message": "b"}')
+    events.extend(decoder.flush())
+    assert events == [b'{"message": "a"}', b'{"message": "b"}']
+
+
+def test_decoder_flush_unterminated_event():
+    """Test that a trailing event without a blank line is emitted on flush."""
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"message": "a"}') == []
+    assert decoder.flush() == [b'{"message": "a"}']
+
+
+def test_iter_sse_events_stops_at_done():
+    """Test that iteration stops reading once [DONE] is received."""
+    consumed = []
+
+    def chunks():
+        for chunk in (b"data: 1\n\n", b"data: [DONE]\n\n", b"data: 2\n\n"):
+            consumed.append(chunk)
+            yield chunk
+
+    assert list(iter_sse_events(chunks())) == [b"1"]
+    assert len(consumed) == 2
+
+
+@pytest.mark.asyncio
+async def test_aiter_sse_events():
+    """Test the async event iterator."""
+
+    async def chunks():
+        for chunk in (b"data: 1\n", b"\ndata: 2\n\n", b"data: [DONE]\n\n"):
+            yield chunk
+
+    assert [event async for event in aiter_sse_events(chunks())] == [b"1", b"2"]
@@ -0,0 +1,166 @@
+"""Tests for the stream tee."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from llmgateway import ChatCompletionRequest, LLMGatewayClient, Message, SlowConsumerError, StreamTee
+
+
+class Upstream:
+    """Async upstream stream recording how many items were read and whether it was closed."""
+
+    def __init__(self, count, error=None):
+        """Initialize with the number of items to yield and an optional final error."""
+        self.count = count
+        self.error = error
+        self.sent = 0
+        self.closed = False
+
+    def __aiter__(self):
+        """Return the upstream itself."""
+        return self
+
+    async def __anext__(self):
+        """Yield the next number."""
+        if self.sent == self.count:
+            if self.error is not None:
+                raise self.error
+            raise StopAsyncIteration
+        self.sent += 1
+        await asyncio.sleep(0)
+        return self.sent - 1
+
+    async def aclose(self):
+        """Record the close."""
+        self.closed = True
+
+
+async def collect(consumer, delay=0.0):
+    """Read every item of a consumer, sleeping ``delay`` seconds per item."""
+    items = []
+    async for item in consumer:
+        items.append(item)
+        await asyncio.sleep(delay)
+    return items
+
+
+async def anext_item(consumer):
+    """Return the next item of a consumer."""
+    return await consumer.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_every_consumer_sees_every_item():
+    """Test that with the block policy every consumer receives the whole stream."""
+    upstream = Upstream(100)
+    async with StreamTee(upstream, 3, buffer_size=4) as tee:
+        results = await asyncio.gather(*(collect(consumer) for consumer in tee))
+    assert results == [list(range(100))] * 3
+    assert upstream.closed
+
+
+@pytest.mark.asyncio
+async def test_block_policy_bounds_buffers():
+    """Test that a slow consumer pauses the upstream stream instead of growing its buffer."""
+    upstream = Upstream(1000)
+    fast, slow = StreamTee(upstream, 2, buffer_size=8)
+    fast_items = asyncio.ensure_future(collect(fast))
+    for _ in range(3):
+        await anext_item(slow)
+        await asyncio.sleep(0.01)
+        assert slow.buffered <= 8
+        assert upstream.sent <= 3 + 8 + 1
+    await slow.aclose()
+    assert await fast_items == list(range(1000))
+
+
+@pytest.mark.asyncio
+async def test_drop_policy():
+    """Test that a slow consumer misses items without slowing the others down."""
+    upstream = Upstream(200)
+    async with StreamTee(upstream, 2, buffer_size=4, policy="drop") as (fast, slow):
+        fast_items, slow_items = await asyncio.gather(collect(fast), collect(slow, delay=0.001))
+    assert fast_items == list(range(200))
+    assert len(slow_items) + slow.dropped == 200
+    assert slow.dropped > 0
+    assert slow_items == sorted(slow_items)
+
+
+@pytest.mark.asyncio
+async def test_detach_policy():
+    """Test that a slow consumer is detached with an error and the others carry on."""
+    upstream = Upstream(200)
+    async with StreamTee(upstream, 2, buffer_size=4, policy="detach") as (fast, slow):
+        fast_items, slow_result = await asyncio.gather(
+            collect(fast), collect(slow, delay=0.001), return_exceptions=True
+        )
+    assert fast_items == list(range(200))
+    assert isinstance(slow_result, SlowConsumerError)
+    assert slow.detached and slow.buffered == 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_error_reaches_every_consumer():
+    """Test that an upstream error is raised by every consumer after the items before it."""
+    upstream = Upstream(5, error=httpx.ReadError("boom"))
+    tee = StreamTee(upstream, 2)
+    for consumer in tee:
+        items = []
+        with pytest.raises(httpx.ReadError):
+            async for item in consumer:
+                items.append(item)
+        assert items == list(range(5))
+    assert upstream.closed
+
+
+@pytest.mark.asyncio
+async def test_closing_every_consumer_closes_upstream():
+    """Test that the upstream stream stops once every consumer has gone."""
+    upstream = Upstream(10_000)
+    first, second = StreamTee(upstream, 2, buffer_size=2)
+    async with first, second:
+        assert await anext_item(first) == 0
+        assert await anext_item(second) == 0
+    assert upstream.closed
+    assert upstream.sent < 10
+    with pytest.raises(StopAsyncIteration):
+        await anext_item(first)
+
+
+@pytest.mark.asyncio
+async def test_close_before_start():
+    """Test that closing a tee that never started closes the upstream stream."""
+    upstream = Upstream(10)
+    tee = StreamTee(upstream, 2)
+    await tee.aclose()
+    assert upstream.closed and upstream.sent == 0
+
+
+def test_invalid_arguments():
+    """Test that invalid arguments are rejected."""
+    with pytest.raises(ValueError):
+        StreamTee(Upstream(1), 0)
+    with pytest.raises(ValueError):
+        StreamTee(Upstream(1), buffer_size=0)
+    with pytest.raises(ValueError):
+        StreamTee(Upstream(1), policy="wait")
+
+
+@pytest.mark.asyncio
+async def test_tee_client_stream_sends_one_request():
+    """Test that consumers of a teed completion stream share one upstream request."""
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        body = b"".join(b'data: {"message": "%d"}\n\n' % i for i in range(20)) + b"data: [DONE]\n\n"
+        return httpx.Response(200, content=body)
+
+    client = LLMGatewayClient(api_key="test", async_transport=httpx.MockTransport(handler))
+    request = ChatCompletionRequest(model="gpt-4", messages=[Message(role="user", content="Hi")], stream=True)
+    async with StreamTee(await client.achat_completions(request), 3) as tee:
+        results = await asyncio.gather(*(collect(consumer) for consumer in tee))
+    assert [[chunk.message for chunk in chunks] for chunks in results] == [[str(i) for i in range(20)]] * 3
+    assert len(calls) == 1
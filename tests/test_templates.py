@@ -0,0 +1,82 @@
+"""Tests for prompt templates."""
+
+import pytest
+
+from llmgateway.models import ChatCompletionRequest, Message
+from llmgateway.ratelimit import RateLimiter
+from llmgateway.serialization import Serializer
+from llmgateway.templates import PromptTemplate, TemplatedRequest
+
+PREFIX = [
+    {"role": "system", "content": "You are a terse assistant. Réponds brièvement."},
+    {"role": "user", "content": "2 + 2?"},
+    {"role": "assistant", "content": "4"},
+]
+
+
+@pytest.fixture(params=["pydantic", "orjson"])
+def serializer(request):
+    """Fixture for a serializer of each backend."""
+    pytest.importorskip(request.param)
+    return Serializer(request.param)
+
+
+def plain(request):
+    """Return an equivalent request not built from a template."""
+    return ChatCompletionRequest.model_validate(request.model_dump())
+
+
+@pytest.mark.parametrize("tail", [[], [{"role": "user", "content": "3 + 3?"}]])
+def test_encoding_matches_plain_request(serializer, tail):
+    """Test that the spliced body is identical to encoding the whole request."""
+    template = PromptTemplate(PREFIX, model="gpt-4", temperature=0)
+    request = template.build(tail, max_tokens=10)
+    assert request.template is template
+    assert serializer.dumps(request) == serializer.dumps(plain(request))
+
+
+def test_empty_prefix(serializer):
+    """Test a template without messages."""
+    request = PromptTemplate([], model="gpt-4").build([Message(role="user", content="Hi")])
+    assert serializer.dumps(request) == serializer.dumps(plain(request))
+
+
+def test_build_shares_prefix_messages():
+    """Test that the prefix is validated once and shared by every request."""
+    template = PromptTemplate(PREFIX, model="gpt-4")
+    first, second = template.build([{"role": "user", "content": "a"}]), template.build()
+    assert isinstance(first, TemplatedRequest)
+    assert first.messages[0] is second.messages[0] is template.messages[0]
+    assert [message.content for message in first.messages] == [m["content"] for m in PREFIX] + ["a"]
+
+
+def test_build_overrides_defaults():
+    """Test that fields given to build override the template defaults."""
+    template = PromptTemplate(PREFIX, model="gpt-4", temperature=0.5)
+    request = template.build(model="gpt-4o", stream=True)
+    assert (request.model, request.temperature, request.stream) == ("gpt-4o", 0.5, True)
+
+
+def test_build_validates_fields():
+    """Test that invalid fields and a missing model are rejected."""
+    with pytest.raises(ValueError):
+        PromptTemplate(PREFIX).build()
+    with pytest.raises(ValueError):
+        PromptTemplate(PREFIX, model="gpt-4").build([{"role": "user"}])
+    with pytest.raises(ValueError):
+        PromptTemplate(PREFIX, model="gpt-4").build(response_format={"type": "xml"})
+
+
+def test_modified_prefix_falls_back_to_full_encoding(serializer):
+    """Test that a request whose prefix was replaced is encoded from scratch."""
+    request = PromptTemplate(PREFIX, model="gpt-4").build([{"role": "user", "content": "a"}])
+    request.messages[0] = Message(role="system", content="Something else")
+    assert request.template is None
+    assert serializer.dumps(request) == serializer.dumps(plain(request))
+
+
+def test_rate_limiter_estimate():
+    """Test that token estimates are the same with and without a template."""
+    limiter = RateLimiter(tokens_per_minute=1000)
+    request = PromptTemplate(PREFIX, model="gpt-4").build([{"role": "user", "content": "x" * 40}])
+    assert limiter.estimate_tokens(request) == limiter.estimate_tokens(plain(request))